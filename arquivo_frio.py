@@ -0,0 +1,84 @@
+"""
+Arquivo frio de anos fechados
+
+Lançamentos de anos antigos quase nunca são vistos, mas ocupavam memória e
+tempo de leitura a cada início. Um ano arquivado sai do dados_financeiros.json
+e vai para arquivo/AAAA.jsonl.gz: um lançamento por linha (no formato do
+arquivo de dados), com cada mês em um membro gzip separado. O índice
+(arquivo/indice.json) guarda, por mês, a posição e o tamanho do membro e o
+rollup do mês, então totais e categorias continuam disponíveis sem abrir o
+arquivo, e um mês é lido sozinho com um seek quando o histórico ou uma busca
+precisam dele.
+
+    {"versao": 1, "anos": {"2021": {"arquivo": "2021.jsonl.gz", "meses": {
+        "2021-01": {"inicio": 0, "tamanho": 5120, "linhas": 80, "total": 92, "rollup": {...}},
+        ...}}}}
+
+'linhas' conta os lançamentos gravados no arquivo; 'total' inclui as
+ocorrências de parcelamentos e contas fixas do mês, que continuam sendo
+geradas pelas regras.
+"""
+import gzip
+import json
+import os
+
+
+ARQUIVO_INDICE = "indice.json"
+VERSAO_ARQUIVO = 1
+
+
+def ler_indice(pasta):
+    """Índice do arquivo frio (vazio se ainda não há anos arquivados)"""
+    caminho = os.path.join(pasta, ARQUIVO_INDICE)
+    if not os.path.exists(caminho):
+        return {'versao': VERSAO_ARQUIVO, 'anos': {}}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        indice = json.load(f)
+    if indice.get('versao') != VERSAO_ARQUIVO:
+        raise ValueError(f"índice do arquivo frio em versão desconhecida: {indice.get('versao')}")
+    return indice
+
+
+def gravar_indice(pasta, indice):
+    """Grava o índice de uma vez (arquivo temporário + troca)"""
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, ARQUIVO_INDICE)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False)
+    os.replace(caminho + '.tmp', caminho)
+
+
+def gravar_ano(pasta, ano, meses):
+    """Grava os lançamentos de um ano, um membro gzip por mês
+
+    meses: {'AAAA-MM': [lançamentos já com valores em texto]}. Retorna o
+    nome do arquivo e {mês: {'inicio', 'tamanho', 'linhas'}} para o índice.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"{ano}.jsonl.gz"
+    caminho = os.path.join(pasta, nome)
+    posicoes = {}
+    with open(caminho + '.tmp', 'wb') as f:
+        for mes in sorted(meses):
+            texto = "".join(json.dumps(l, ensure_ascii=False) + "\n" for l in meses[mes])
+            membro = gzip.compress(texto.encode('utf-8'), compresslevel=6, mtime=0)
+            posicoes[mes] = {'inicio': f.tell(), 'tamanho': len(membro), 'linhas': len(meses[mes])}
+            f.write(membro)
+    os.replace(caminho + '.tmp', caminho)
+    return nome, posicoes
+
+
+def ler_mes(pasta, arquivo, info):
+    """Lê só o membro gzip de um mês (seek direto pela posição do índice)"""
+    if not info['linhas']:
+        return []
+    with open(os.path.join(pasta, arquivo), 'rb') as f:
+        f.seek(info['inicio'])
+        membro = f.read(info['tamanho'])
+    return [json.loads(linha) for linha in gzip.decompress(membro).decode('utf-8').splitlines()]
+
+
+def remover_ano(pasta, arquivo):
+    caminho = os.path.join(pasta, arquivo)
+    if os.path.exists(caminho):
+        os.remove(caminho)
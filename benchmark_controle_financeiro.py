@@ -0,0 +1,315 @@
+"""
+Benchmark do motor do Controle Financeiro (controle_financeiro_completo.py)
+
+Gera ledgers sintéticos reprodutíveis (mesma semente = mesmos dados), com
+lançamentos avulsos, parcelamentos e contas fixas, grava no formato dos
+arquivos do app e mede as operações principais. O resultado vai para um
+JSON, que pode ser comparado com uma execução anterior:
+
+    python benchmark_controle_financeiro.py --tamanhos 10000,100000 --saida atual.json
+    python benchmark_controle_financeiro.py --comparar base.json --saida atual.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from controle_financeiro_completo import ControleFinanceiro
+
+
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+ANOS_HISTORICO = 10
+
+# Fração das linhas geradas por cada tipo de registro
+FRACAO_PARCELAS = 0.15
+FRACAO_CONTAS_FIXAS = 0.05
+
+DESCRICOES = {
+    'Alimentação': ['Mercado', 'Padaria', 'Restaurante', 'Delivery', 'Feira'],
+    'Transporte': ['Combustível', 'Uber', 'Ônibus', 'Estacionamento', 'Pedágio'],
+    'Moradia': ['Aluguel', 'Condomínio', 'Luz', 'Água', 'Internet'],
+    'Saúde': ['Farmácia', 'Consulta', 'Plano de saúde', 'Exames'],
+    'Educação': ['Curso', 'Livros', 'Mensalidade'],
+    'Lazer': ['Cinema', 'Show', 'Viagem', 'Streaming', 'Bar'],
+    'Vestuário': ['Roupas', 'Calçados', 'Acessórios'],
+    'Salário': ['Salário', 'Adiantamento', 'Bônus'],
+    'Investimentos': ['Tesouro', 'CDB', 'Ações', 'Fundo'],
+    'Outros': ['Presente', 'Doação', 'Diversos']
+}
+
+
+def gerar_ledger(total_linhas, semente=42):
+    """Gera (lancamentos, contasFixas, planosParcelamento) com cerca de `total_linhas` linhas
+
+    Os valores já estão em centavos, como o motor os mantém em memória. As
+    datas cobrem os últimos ANOS_HISTORICO anos e alguns meses à frente
+    (parcelas a vencer).
+    """
+    rng = random.Random(semente)
+    hoje = datetime.now()
+    inicio = datetime(hoje.year - ANOS_HISTORICO, hoje.month, 1)
+    dias_historico = (hoje - inicio).days
+    categorias = list(DESCRICOES)
+    proximo_id = int(inicio.timestamp() * 1000)
+
+    def novo_id():
+        nonlocal proximo_id
+        proximo_id += rng.randint(1, 5000)
+        return proximo_id
+
+    def valor(categoria):
+        if categoria == 'Salário':
+            return rng.randint(300_000, 1_500_000)
+        if categoria == 'Moradia':
+            return rng.randint(5_000, 250_000)
+        return int(rng.lognormvariate(8.5, 1.0)) + 100
+
+    # Contas fixas: cada uma gera um lançamento por mês desde o início
+    meses_por_conta = ANOS_HISTORICO * 12
+    contas_fixas = []
+    for _ in range(max(1, int(total_linhas * FRACAO_CONTAS_FIXAS) // meses_por_conta)):
+        categoria = rng.choice(['Moradia', 'Educação', 'Saúde', 'Lazer'])
+        contas_fixas.append({
+            'id': novo_id(),
+            'descricao': rng.choice(DESCRICOES[categoria]),
+            'categoria': categoria,
+            'entrada': 0,
+            'saida': valor(categoria),
+            'investimento': 0,
+            'desnecessario': rng.random() < 0.1,
+            'inicio': inicio.strftime('%Y-%m'),
+            'dia': rng.randint(1, 28),
+            'ocorrencias': {}
+        })
+
+    # Parcelamentos de 2 a 12 parcelas, alguns já quitados
+    planos = []
+    linhas_parcelas = 0
+    while linhas_parcelas < total_linhas * FRACAO_PARCELAS:
+        categoria = rng.choice(['Vestuário', 'Educação', 'Lazer', 'Outros', 'Saúde'])
+        total_parcelas = rng.randint(2, 12)
+        data_inicial = inicio + timedelta(days=rng.randrange(dias_historico))
+        plano = {
+            'id': novo_id(),
+            'descricao': rng.choice(DESCRICOES[categoria]),
+            'categoria': categoria,
+            'tipo': 'saida',
+            'valorTotal': valor(categoria) * total_parcelas,
+            'totalParcelas': total_parcelas,
+            'dataInicial': data_inicial.strftime('%Y-%m-%d'),
+            'intervaloDias': 30,
+            'desnecessario': rng.random() < 0.2,
+            'ocorrencias': {}
+        }
+        for n in range(1, total_parcelas + 1):
+            if data_inicial + timedelta(days=30 * (n - 1)) <= hoje:
+                plano['ocorrencias'][str(n)] = {'statusPagamento': 'paga'}
+        planos.append(plano)
+        linhas_parcelas += total_parcelas
+
+    # Lançamentos avulsos completam o total
+    lancamentos = []
+    avulsos = total_linhas - linhas_parcelas - len(contas_fixas) * meses_por_conta
+    for _ in range(max(0, avulsos)):
+        categoria = rng.choice(categorias)
+        tipo = 'entrada' if categoria == 'Salário' else 'investimento' if categoria == 'Investimentos' else 'saida'
+        quantia = valor(categoria)
+        lancamentos.append({
+            'id': novo_id(),
+            'data': (inicio + timedelta(days=rng.randrange(dias_historico))).strftime('%Y-%m-%d'),
+            'descricao': rng.choice(DESCRICOES[categoria]),
+            'categoria': categoria,
+            'entrada': quantia if tipo == 'entrada' else 0,
+            'saida': quantia if tipo == 'saida' else 0,
+            'investimento': quantia if tipo == 'investimento' else 0,
+            'statusPagamento': 'paga' if rng.random() < 0.9 else 'nao-paga',
+            'desnecessario': tipo == 'saida' and rng.random() < 0.15,
+            'recorrente': False
+        })
+
+    return lancamentos, contas_fixas, planos
+
+
+def gravar_ledger(lancamentos, contas_fixas, planos):
+    """Grava um ledger gerado no diretório atual, no formato dos arquivos do app"""
+    controle = ControleFinanceiro(carregar=False)
+    controle.contasFixas = contas_fixas
+    controle.planosParcelamento = planos
+    controle.lancamentos = lancamentos + controle._expandir_regras()
+    controle._reconstruir_indices()
+    controle.categorizador = controle._treinar_categorizador()
+    controle.salvar_dados()
+    return len(controle.lancamentos)
+
+
+def medir(funcao, repeticoes, preparar=None):
+    """Executa `funcao` várias vezes e retorna estatísticas dos tempos em ms"""
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'repeticoes': repeticoes,
+        'minMs': round(min(tempos), 3),
+        'medianaMs': round(statistics.median(tempos), 3),
+        'mediaMs': round(statistics.fmean(tempos), 3),
+        'maxMs': round(max(tempos), 3)
+    }
+
+
+def executar_tamanho(total_linhas, semente, repeticoes):
+    """Gera um ledger de `total_linhas` linhas em um diretório temporário e mede as operações"""
+    resultados = {}
+    diretorio_original = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='bench_financeiro_') as diretorio:
+        os.chdir(diretorio)
+        try:
+            inicio = time.perf_counter()
+            linhas = gravar_ledger(*gerar_ledger(total_linhas, semente))
+            resultados['_linhas'] = linhas
+            resultados['_geracaoMs'] = round((time.perf_counter() - inicio) * 1000, 3)
+            resultados['_bytesArquivos'] = sum(os.path.getsize(nome) for nome in os.listdir('.'))
+
+            def carregar():
+                controle = ControleFinanceiro(carregar=False)
+                controle.carregar_dados()
+                return controle
+
+            resultados['carregar_dados'] = medir(carregar, repeticoes)
+
+            # Sem o cache binário: leitura dos JSON e reconstrução dos índices
+            def sem_cache():
+                os.remove('cache_dados.pickle')
+                return ()
+            resultados['carregar_dados_json'] = medir(carregar, repeticoes, sem_cache)
+            controle = carregar()
+
+            resultados['salvar_dados'] = medir(controle.salvar_dados, repeticoes)
+
+            # Sem rollups, o resumo agrega todas as linhas; com eles, só os meses em aberto
+            def sem_rollups():
+                controle._rollups = {}
+                return ()
+            resultados['calcular_resumo_frio'] = medir(controle.calcular_resumo, repeticoes, sem_rollups)
+            resultados['calcular_resumo'] = medir(controle.calcular_resumo, repeticoes)
+            resultados['calcular_por_categoria'] = medir(controle.calcular_por_categoria, repeticoes)
+            resultados['obter_parcelamentos'] = medir(controle.obter_parcelamentos, repeticoes)
+
+            # Virada de mês: remove as contas fixas do mês atual e volta o marcador
+            mes_atual = datetime.now().strftime('%Y-%m')
+            mes_anterior = (datetime.now().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+
+            def voltar_um_mes():
+                controle._remover_lancamentos(
+                    lambda l: 'contaFixaId' in l and l['data'].startswith(mes_atual)
+                )
+                controle._mes_contas_fixas = mes_anterior
+                return ()
+            resultados['verificar_contas_fixas_do_mes'] = medir(
+                controle.verificar_contas_fixas_do_mes, repeticoes, voltar_um_mes
+            )
+
+            # Mutações salvam o ledger inteiro; os alvos são sorteados com a mesma semente
+            rng = random.Random(semente)
+            ids = [l['id'] for l in controle.lancamentos]
+
+            def sortear_status():
+                return (rng.choice(ids), rng.choice(['paga', 'nao-paga']))
+            resultados['alterar_status_pagamento'] = medir(
+                controle.alterar_status_pagamento, repeticoes, sortear_status
+            )
+
+            def sortear_exclusao():
+                id_ = rng.choice(ids)
+                ids.remove(id_)
+                return (id_,)
+            resultados['excluir'] = medir(controle.excluir, repeticoes, sortear_exclusao)
+
+            grupos = [p['id'] for p in controle.planosParcelamento]
+
+            def sortear_grupo():
+                grupo_id = rng.choice(grupos)
+                grupos.remove(grupo_id)
+                return (grupo_id,)
+            resultados['excluir_grupo_parcelamento'] = medir(
+                controle.excluir_grupo_parcelamento, repeticoes, sortear_grupo
+            )
+        finally:
+            os.chdir(diretorio_original)
+
+    return resultados
+
+
+def comparar(atual, anterior, tolerancia):
+    """Lista as operações cuja mediana piorou mais que `tolerancia` (fração) em relação a outra execução"""
+    regressoes = []
+    for tamanho, operacoes in atual['resultados'].items():
+        base = anterior.get('resultados', {}).get(tamanho, {})
+        for operacao, tempos in operacoes.items():
+            if operacao.startswith('_') or operacao not in base:
+                continue
+            antes, depois = base[operacao]['medianaMs'], tempos['medianaMs']
+            if antes > 0 and depois > antes * (1 + tolerancia):
+                regressoes.append((tamanho, operacao, antes, depois))
+    return regressoes
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark do motor do Controle Financeiro")
+    parser.add_argument('--tamanhos', default=','.join(str(t) for t in TAMANHOS_PADRAO),
+                        help="quantidades de linhas separadas por vírgula (padrão: %(default)s)")
+    parser.add_argument('--semente', type=int, default=42, help="semente do gerador (padrão: %(default)s)")
+    parser.add_argument('--repeticoes', type=int, default=5, help="execuções por operação (padrão: %(default)s)")
+    parser.add_argument('--saida', default='benchmark_resultados.json', help="arquivo JSON de resultados")
+    parser.add_argument('--comparar', metavar='JSON', help="resultado anterior para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="piora relativa aceita na comparação (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    saida = os.path.abspath(args.saida)
+    resultado = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'semente': args.semente,
+            'repeticoes': args.repeticoes,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform()
+        },
+        'resultados': {}
+    }
+
+    for tamanho in (int(t) for t in args.tamanhos.split(',')):
+        print(f"▶ {tamanho:,} linhas...", flush=True)
+        operacoes = resultado['resultados'][str(tamanho)] = executar_tamanho(tamanho, args.semente, args.repeticoes)
+        for operacao, tempos in operacoes.items():
+            if not operacao.startswith('_'):
+                print(f"   {operacao:32s} {tempos['medianaMs']:10.2f} ms")
+
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            regressoes = comparar(resultado, json.load(f), args.tolerancia)
+        for tamanho, operacao, antes, depois in regressoes:
+            print(f"⚠️ {operacao} ({tamanho} linhas): {antes:.2f} ms → {depois:.2f} ms")
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
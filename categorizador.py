@@ -0,0 +1,215 @@
+"""
+Categorização automática pela descrição
+
+Um classificador bayesiano ingênuo sobre as palavras da descrição, treinado
+com os pares descrição → categoria (e desnecessário) do próprio histórico.
+O modelo é só um conjunto de contagens, então aprender um lançamento novo ou
+esquecer um excluído custa o número de palavras da descrição, sem retreinar.
+
+Enquanto a descrição é digitada, a última palavra ainda está incompleta: ela
+é completada pela palavra conhecida mais frequente com aquele prefixo (busca
+binária no vocabulário ordenado). Lotes (ex.: linhas de um extrato) são
+classificados de uma vez com numpy.
+
+As matrizes usadas na classificação são um retrato das contagens: aprender()
+e esquecer() só as marcam como desatualizadas, e atualizar() as refaz (no
+worker, depois de cada alteração). sugerir(), chamado a cada tecla na thread
+da interface, só lê o último retrato pronto.
+"""
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+
+_PALAVRA = re.compile(r'[a-z]+')
+
+# Abaixo desta confiança a sugestão não é aplicada automaticamente
+CONFIANCA_MINIMA = 0.5
+
+
+def tokenizar(descricao):
+    """Palavras normalizadas (sem acento, minúsculas) de uma descrição; números são ignorados"""
+    texto = unicodedata.normalize('NFKD', descricao.casefold())
+    texto = texto.encode('ascii', 'ignore').decode('ascii')
+    return [p for p in _PALAVRA.findall(texto) if len(p) > 1]
+
+
+class Categorizador:
+    """Contagens de palavras por categoria, com aprendizado incremental
+
+    aprender()/esquecer() podem ser chamados do worker enquanto a interface
+    chama sugerir(): uma trava protege as contagens, e as matrizes são
+    trocadas de uma vez por atualizar(), então sugerir() nunca as vê pela
+    metade.
+    """
+
+    def __init__(self):
+        self.documentos = {}  # categoria -> lançamentos vistos
+        self.palavras = {}  # palavra -> {categoria: ocorrências}
+        self.desnecessarias = {}  # palavra -> [em lançamentos desnecessários, total]
+        self.total_desnecessarios = [0, 0]
+        self.alterado = False
+        self._matrizes = None  # último retrato pronto
+        self._desatualizado = True
+        self._trava = threading.Lock()
+
+    def aprender(self, descricao, categoria, desnecessario=False, peso=1):
+        """Soma (peso=1) ou subtrai (peso=-1) um lançamento das contagens"""
+        with self._trava:
+            self.documentos[categoria] = self.documentos.get(categoria, 0) + peso
+            if self.documentos[categoria] <= 0:
+                del self.documentos[categoria]
+            self.total_desnecessarios[0] += peso if desnecessario else 0
+            self.total_desnecessarios[1] += peso
+
+            for palavra in set(tokenizar(descricao)):
+                contagem = self.palavras.setdefault(palavra, {})
+                contagem[categoria] = contagem.get(categoria, 0) + peso
+                if contagem[categoria] <= 0:
+                    del contagem[categoria]
+                desnecessaria = self.desnecessarias.setdefault(palavra, [0, 0])
+                desnecessaria[0] += peso if desnecessario else 0
+                desnecessaria[1] += peso
+                if not contagem:
+                    del self.palavras[palavra]
+                    del self.desnecessarias[palavra]
+
+            self.alterado = True
+            self._desatualizado = True
+
+    def esquecer(self, descricao, categoria, desnecessario=False):
+        self.aprender(descricao, categoria, desnecessario, peso=-1)
+
+    def atualizar(self):
+        """Refaz as matrizes se as contagens mudaram desde o último retrato e o retorna"""
+        with self._trava:
+            if not self._desatualizado:
+                return self._matrizes
+            self._matrizes = self._montar_matrizes()
+            self._desatualizado = False
+            return self._matrizes
+
+    def _montar_matrizes(self):
+        """Log-probabilidades por palavra e categoria (suavização de Laplace); chamado com a trava"""
+        categorias = sorted(self.documentos)
+        vocabulario = sorted(self.palavras)
+        coluna = {c: j for j, c in enumerate(categorias)}
+        contagens = np.zeros((len(vocabulario) + 1, len(categorias)))
+        frequencia = np.zeros(len(vocabulario), dtype=np.int64)
+        desnecessarias = np.zeros((len(vocabulario) + 1, 2))
+        for i, palavra in enumerate(vocabulario):
+            for categoria, n in self.palavras[palavra].items():
+                contagens[i, coluna[categoria]] = n
+            frequencia[i] = sum(self.palavras[palavra].values())
+            desnecessarias[i] = self.desnecessarias[palavra]
+
+        # A última linha é a palavra desconhecida: não pesa para nenhum lado
+        por_categoria = contagens.sum(axis=0) + len(vocabulario) + 1
+        verossimilhanca = np.log((contagens + 1) / por_categoria)
+        verossimilhanca[-1] = 0
+        documentos = np.array([self.documentos[c] for c in categorias], dtype=float)
+        priori = np.log(documentos / documentos.sum()) if len(categorias) else documentos
+
+        # Esquecer o que o modelo não aprendeu (um modelo antigo, por exemplo) deixa contagens
+        # negativas: as chances são calculadas com elas limitadas a zero
+        sim = np.maximum(desnecessarias[:, 0], 0)
+        nao = np.maximum(desnecessarias[:, 1] - sim, 0)
+        chances_desnecessario = np.log((sim + 1) / (nao + 1))
+        chances_desnecessario[-1] = 0
+        sim, total = self.total_desnecessarios
+        sim = max(sim, 0)
+        priori_desnecessario = np.log((sim + 1) / (max(total - sim, 0) + 1))
+
+        return {
+            'categorias': categorias,
+            'vocabulario': np.array(vocabulario, dtype=str),
+            'indice': {palavra: i for i, palavra in enumerate(vocabulario)},
+            'frequencia': frequencia,
+            'verossimilhanca': verossimilhanca,
+            'priori': priori,
+            'desnecessario': chances_desnecessario,
+            'prioriDesnecessario': priori_desnecessario
+        }
+
+    @staticmethod
+    def _completar(matrizes, prefixo):
+        """Índice da palavra mais frequente que começa com o prefixo, ou None"""
+        vocabulario = matrizes['vocabulario']
+        inicio = np.searchsorted(vocabulario, prefixo, side='left')
+        fim = np.searchsorted(vocabulario, prefixo + '\x7f', side='left')
+        if inicio == fim:
+            return None
+        return inicio + int(np.argmax(matrizes['frequencia'][inicio:fim]))
+
+    def classificar_lote(self, descricoes, parcial=False, atualizar=True):
+        """Sugere categoria e desnecessário para várias descrições de uma vez
+
+        Retorna uma lista, na ordem das descrições, de {'categoria',
+        'confianca', 'desnecessario'} ou None quando nenhuma palavra da
+        descrição é conhecida. Com parcial=True a última palavra de cada
+        descrição pode estar incompleta. Com atualizar=False usa o último
+        retrato das matrizes, mesmo desatualizado, sem refazê-lo.
+        """
+        matrizes = self.atualizar() if atualizar else self._matrizes
+        if matrizes is None or not matrizes['categorias']:
+            return [None] * len(descricoes)
+
+        indice = matrizes['indice']
+        desconhecida = len(matrizes['vocabulario'])
+        linhas, documentos = [], []
+        for d, descricao in enumerate(descricoes):
+            palavras = tokenizar(descricao)
+            ids = [indice.get(p, desconhecida) for p in palavras]
+            if parcial and ids and ids[-1] == desconhecida:
+                completada = self._completar(matrizes, palavras[-1])
+                ids[-1] = desconhecida if completada is None else completada
+            ids = [i for i in dict.fromkeys(ids) if i != desconhecida]
+            linhas += ids
+            documentos += [d] * len(ids)
+
+        linhas = np.array(linhas, dtype=np.int64)
+        documentos = np.array(documentos, dtype=np.int64)
+        pontos = np.tile(matrizes['priori'], (len(descricoes), 1))
+        np.add.at(pontos, documentos, matrizes['verossimilhanca'][linhas])
+        chances = np.full(len(descricoes), matrizes['prioriDesnecessario'])
+        np.add.at(chances, documentos, matrizes['desnecessario'][linhas])
+        conhecidas = np.bincount(documentos, minlength=len(descricoes))
+
+        # Confiança = probabilidade da melhor categoria (softmax dos log-escores)
+        pontos -= pontos.max(axis=1, keepdims=True)
+        probabilidades = np.exp(pontos)
+        probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+        melhores = probabilidades.argmax(axis=1)
+
+        return [
+            {
+                'categoria': matrizes['categorias'][melhores[d]],
+                'confianca': float(probabilidades[d, melhores[d]]),
+                'desnecessario': bool(chances[d] > 0)
+            } if conhecidas[d] else None
+            for d in range(len(descricoes))
+        ]
+
+    def sugerir(self, descricao):
+        """Sugestão para uma descrição ainda sendo digitada, com o último retrato (ver classificar_lote)"""
+        return self.classificar_lote([descricao], parcial=True, atualizar=False)[0]
+
+    def para_dict(self):
+        with self._trava:
+            return {
+                'documentos': self.documentos,
+                'palavras': self.palavras,
+                'desnecessarias': self.desnecessarias,
+                'totalDesnecessarios': self.total_desnecessarios
+            }
+
+    @classmethod
+    def de_dict(cls, dados):
+        categorizador = cls()
+        categorizador.documentos = dados['documentos']
+        categorizador.palavras = dados['palavras']
+        categorizador.desnecessarias = dados['desnecessarias']
+        categorizador.total_desnecessarios = dados['totalDesnecessarios']
+        return categorizador
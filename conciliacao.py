@@ -0,0 +1,148 @@
+"""
+Conciliação de extratos bancários com os lançamentos não pagos
+
+Cada linha do extrato (data, descrição e valor, negativo para débitos) é
+casada com um lançamento 'nao-paga' do mesmo valor e do mesmo sentido cuja
+data esteja dentro de uma janela de dias. Os lançamentos candidatos ficam em
+um índice por (sentido, valor), com as datas ordenadas em cada faixa, então
+cada linha custa uma busca binária em vez de uma varredura de todos os não
+pagos.
+
+As correspondências são só propostas: quem chama decide quais confirmar
+(ControleFinanceiro.aplicar_conciliacao grava todas de uma vez).
+"""
+import bisect
+import csv
+from datetime import datetime, timedelta
+
+from esquema_dados import para_centavos
+
+
+JANELA_DIAS = 5
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y")
+COLUNAS = {
+    'data': ('data', 'date', 'dt'),
+    'descricao': ('descricao', 'descrição', 'historico', 'histórico', 'description', 'memo'),
+    'valor': ('valor', 'value', 'amount', 'quantia')
+}
+
+
+def _normalizar_data(texto):
+    """Converte as datas usuais de extratos para 'AAAA-MM-DD'"""
+    texto = texto.strip()
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {texto!r}")
+
+
+def _normalizar_valor(texto):
+    """Valor do extrato em centavos, aceitando '1.234,56', '1,234.56' e '-45.00'"""
+    texto = texto.strip().replace('R$', '').replace(' ', '')
+    if ',' in texto and '.' in texto:
+        # O separador que aparece por último é o decimal
+        milhar = '.' if texto.rindex(',') > texto.rindex('.') else ','
+        texto = texto.replace(milhar, '')
+    return para_centavos(texto)
+
+
+def ler_extrato(arquivo):
+    """Lê um extrato CSV (com cabeçalho) e retorna as linhas como dicionários
+
+    O separador (vírgula ou ponto e vírgula) é detectado. As colunas são
+    reconhecidas pelo nome (data, descrição/histórico e valor). Cada linha
+    retornada tem 'linha' (número no arquivo), 'data', 'descricao' e 'valor'
+    em centavos, negativo para débitos.
+    """
+    with open(arquivo, 'r', encoding='utf-8-sig', newline='') as f:
+        amostra = f.read(4096)
+        f.seek(0)
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+        leitor = csv.reader(f, dialeto)
+
+        cabecalho = [c.strip().lower() for c in next(leitor, [])]
+        posicoes = {}
+        for campo, nomes in COLUNAS.items():
+            encontradas = [i for i, nome in enumerate(cabecalho) if nome in nomes]
+            if not encontradas:
+                raise ValueError(f"coluna '{campo}' não encontrada no extrato")
+            posicoes[campo] = encontradas[0]
+
+        linhas = []
+        for numero, registro in enumerate(leitor, 2):
+            if not any(c.strip() for c in registro):
+                continue
+            try:
+                linhas.append({
+                    'linha': numero,
+                    'data': _normalizar_data(registro[posicoes['data']]),
+                    'descricao': registro[posicoes['descricao']].strip(),
+                    'valor': _normalizar_valor(registro[posicoes['valor']])
+                })
+            except (IndexError, ValueError) as erro:
+                raise ValueError(f"linha {numero} do extrato: {erro}")
+        return linhas
+
+
+def _chave_lancamento(lancamento):
+    """(sentido, valor em centavos) de um lançamento: +1 para entradas, -1 para saídas e investimentos"""
+    if lancamento['entrada']:
+        return 1, lancamento['entrada']
+    return -1, lancamento['saida'] or lancamento['investimento']
+
+
+def indexar_nao_pagas(lancamentos):
+    """Índice {(sentido, valor): [(data, id), ...] em ordem de data} dos lançamentos informados"""
+    indice = {}
+    for l in lancamentos:
+        indice.setdefault(_chave_lancamento(l), []).append((l['data'], l['id']))
+    for faixa in indice.values():
+        faixa.sort()
+    return indice
+
+
+def propor_conciliacao(lancamentos, extrato, janela_dias=JANELA_DIAS):
+    """Casa linhas do extrato com lançamentos não pagos e retorna as propostas
+
+    lancamentos: os não pagos ({id: lançamento} ou iterável). Cada linha do
+    extrato fica com o lançamento de mesmo sentido e valor mais próximo em
+    data, até `janela_dias` de distância; um lançamento casa com no máximo
+    uma linha. As linhas são processadas em ordem de data, o que dá a cada
+    cobrança o lançamento mais antigo compatível quando há empate.
+
+    Retorna (propostas, sem_correspondencia): cada proposta é
+    {'linha': linha do extrato, 'lancamentoId': id, 'diferencaDias': n}.
+    """
+    if isinstance(lancamentos, dict):
+        lancamentos = lancamentos.values()
+    indice = indexar_nao_pagas(lancamentos)
+    janela = timedelta(days=janela_dias)
+
+    propostas = []
+    sem_correspondencia = []
+    for linha in sorted(extrato, key=lambda l: (l['data'], l['linha'])):
+        faixa = indice.get((1 if linha['valor'] > 0 else -1, abs(linha['valor'])))
+        escolhido = None
+        if faixa:
+            data = datetime.strptime(linha['data'], "%Y-%m-%d")
+            inicio = bisect.bisect_left(faixa, ((data - janela).strftime("%Y-%m-%d"),))
+            fim = bisect.bisect_right(faixa, ((data + janela).strftime("%Y-%m-%d"), float('inf')), inicio)
+
+            # Entre os candidatos da janela, o de data mais próxima
+            melhor = None
+            for posicao in range(inicio, fim):
+                diferenca = abs((datetime.strptime(faixa[posicao][0], "%Y-%m-%d") - data).days)
+                if melhor is None or diferenca < melhor[0]:
+                    melhor = (diferenca, posicao)
+            if melhor is not None:
+                diferenca, posicao = melhor
+                escolhido = faixa.pop(posicao)[1]
+
+        if escolhido is None:
+            sem_correspondencia.append(linha)
+        else:
+            propostas.append({'linha': linha, 'lancamentoId': escolhido, 'diferencaDias': diferenca})
+
+    return propostas, sem_correspondencia
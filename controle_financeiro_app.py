@@ -1,6 +1,5 @@
 import customtkinter as ctk
 from tkinter import messagebox, ttk
-import json
 import os
 from datetime import datetime
 from typing import List, Dict
@@ -8,6 +7,9 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
+from esquema_dados import CAMPOS_VALOR, formatar_decimal, gravar_lancamentos, ler_lancamentos, para_centavos
+from graficos import desenhar_pizza_categorias
+
 # Configurações do CustomTkinter
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -34,29 +36,37 @@ class ControleFinanceiro:
         """Carrega dados salvos do arquivo JSON"""
         if os.path.exists(self.arquivo_dados):
             try:
-                with open(self.arquivo_dados, 'r', encoding='utf-8') as f:
-                    self.lancamentos = json.load(f)
+                # Migra arquivos antigos (inclusive os do app completo) para o esquema atual
+                self.lancamentos = ler_lancamentos(self.arquivo_dados)
+                for l in self.lancamentos:
+                    for campo in CAMPOS_VALOR:
+                        l[campo] = float(l[campo])
             except:
                 self.lancamentos = []
     
     def salvar_dados(self):
         """Salva dados no arquivo JSON"""
-        with open(self.arquivo_dados, 'w', encoding='utf-8') as f:
-            json.dump(self.lancamentos, f, ensure_ascii=False, indent=2)
+        # Campos do app completo (statusPagamento, grupoParcelaId...) são preservados
+        gravar_lancamentos(self.arquivo_dados, [
+            {**l, **{campo: formatar_decimal(para_centavos(l[campo])) for campo in CAMPOS_VALOR}}
+            for l in self.lancamentos
+        ])
     
     def adicionar_lancamento(self, data: str, descricao: str, categoria: str, 
                             entrada: float, saida: float, investimento: float, 
                             desnecessario: bool):
         """Adiciona um novo lançamento"""
         lancamento = {
-            "id": len(self.lancamentos) + 1,
+            "id": max((l['id'] for l in self.lancamentos), default=0) + 1,
             "data": data,
             "descricao": descricao,
             "categoria": categoria,
             "entrada": entrada,
             "saida": saida,
             "investimento": investimento,
-            "desnecessario": desnecessario
+            "statusPagamento": "paga",
+            "desnecessario": desnecessario,
+            "recorrente": False
         }
         self.lancamentos.append(lancamento)
         self.salvar_dados()
@@ -377,6 +387,7 @@ class ControleFinanceiroApp(ctk.CTk):
         graficos_title.pack(padx=10, pady=10)
         
         self.graficos_container = graficos_frame
+        self.grafico_canvas = None
         
         # Categorias
         categorias_frame = ctk.CTkFrame(right_panel, corner_radius=10)
@@ -499,35 +510,23 @@ class ControleFinanceiroApp(ctk.CTk):
     
     def atualizar_graficos(self):
         """Atualiza os gráficos"""
-        # Limpar gráficos antigos
-        for widget in self.graficos_container.winfo_children():
-            if isinstance(widget, FigureCanvasTkAgg):
-                widget.get_tk_widget().destroy()
-        
-        categorias = self.controle.calcular_por_categoria()
-        
-        # Filtrar categorias com valores
-        categorias_com_valores = {k: v for k, v in categorias.items() if v['total'] > 0}
-        
-        if not categorias_com_valores:
-            return
+        # Limpar gráfico antigo (os filhos do container são widgets Tk, não
+        # canvases do matplotlib, então é preciso guardar a referência)
+        if self.grafico_canvas is not None:
+            self.grafico_canvas.get_tk_widget().destroy()
+            self.grafico_canvas = None
         
         # Criar figura
         fig = Figure(figsize=(5, 4), facecolor='#2b2b2b')
         ax = fig.add_subplot(111)
         
-        labels = [f"{v['icon']} {k}" for k, v in categorias_com_valores.items()]
-        values = [v['total'] for v in categorias_com_valores.values()]
-        colors = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#2193b0', '#C9CBCF']
-        
-        ax.pie(values, labels=labels, autopct='%1.1f%%', colors=colors, 
-               textprops={'color': 'white', 'fontsize': 9})
-        ax.set_title('Distribuição de Gastos', color='white', fontsize=12, pad=20)
+        if not desenhar_pizza_categorias(ax, self.controle.calcular_por_categoria()):
+            return
         
         # Canvas
-        canvas = FigureCanvasTkAgg(fig, master=self.graficos_container)
-        canvas.draw()
-        canvas.get_tk_widget().pack(padx=10, pady=10)
+        self.grafico_canvas = FigureCanvasTkAgg(fig, master=self.graficos_container)
+        self.grafico_canvas.draw()
+        self.grafico_canvas.get_tk_widget().pack(padx=10, pady=10)
     
     def atualizar_categorias(self):
         """Atualiza a lista de categorias"""
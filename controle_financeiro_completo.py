@@ -1,278 +1,3180 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
+import atexit
+import argparse
+import bisect
+import calendar
+import contextlib
+import functools
+import gc
+import hashlib
+import heapq
+import inspect
+import itertools
 import json
+import logging
+import multiprocessing
 import os
-from datetime import datetime, timedelta
+import pickle
+import queue
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict, deque
+from datetime import date, datetime, timedelta
 from typing import List, Dict
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.artist import Artist
 from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+
+import arquivo_frio
+from categorizador import CONFIANCA_MINIMA, Categorizador
+from conciliacao import JANELA_DIAS, ler_extrato, propor_conciliacao
+from esquema_dados import (
+    CAMPOS_VALOR, PADROES_LANCAMENTO, formatar_decimal, formatar_moeda, gravar_lancamentos, ler_lancamentos,
+    para_centavos
+)
+
+# Mudar o que o cache binário guarda invalida os caches já gravados
+VERSAO_CACHE = 1
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 
-class ControleFinanceiro:    
-    def __init__(self):
-        self.lancamentos = []
-        self.contasFixas = []
-        self.arquivo_dados = "dados_financeiros.json"
-        self.arquivo_contas_fixas = "contas_fixas.json"
-        self.carregar_dados()
-        self.categorias = {
-            'Alimentação': '🍔',
-            'Moradia': '🏠',
-            'Transporte': '🚗',
-            'Lazer': '🎮',
-            'Saúde': '💊',
-            'Contas Fixas': '📄',
-            'Investimentos': '📈',
-            'Renda': '💼',
-            'Outros': '🛍️'
-        }
-        self.verificar_contas_fixas_do_mes()
-    def carregar_dados(self):
-        """Carrega dados dos arquivos JSON"""
-        if os.path.exists(self.arquivo_dados):
-            try:
-                with open(self.arquivo_dados, 'r', encoding='utf-8') as f:
-                    self.lancamentos = json.load(f)
-            except:
-                self.lancamentos = []
+class JanelasGastos:
+    """Gastos e gastos desnecessários dos últimos 7, 30 e 90 dias, atualizados em O(1)
+    
+    Um deque com um balde por dia (o último é hoje) cobre a maior janela, e
+    cada janela mantém o próprio total. Incluir ou remover um lançamento
+    mexe em um balde e nos totais das janelas que contêm o dia. Lançamentos
+    futuros (parcelas, contas fixas) ficam de fora até o dia deles chegar.
+    """
+    
+    JANELAS = (7, 30, 90)
+    
+    def __init__(self, hoje=None):
+        self.hoje = hoje or date.today().toordinal()
+        self.baldes = deque(([0, 0] for _ in range(max(self.JANELAS))), maxlen=max(self.JANELAS))
+        self.totais = {janela: [0, 0] for janela in self.JANELAS}  # janela -> [saídas, desnecessárias]
+    
+    def avancar(self, hoje):
+        """Desliza as janelas até `hoje`, descontando os dias que saem de cada uma
+        
+        Os baldes dos dias que entram começam vazios: quem chama inclui os
+        lançamentos desses dias depois.
+        """
+        while self.hoje < hoje:
+            for janela, total in self.totais.items():
+                saindo = self.baldes[-janela]
+                total[0] -= saindo[0]
+                total[1] -= saindo[1]
+            self.baldes.append([0, 0])
+            self.hoje += 1
+    
+    def contabilizar(self, lancamento, sinal):
+        """Inclui (+1) ou remove (-1) as saídas de um lançamento das janelas que contêm seu dia"""
+        if not lancamento['saida']:
+            return
+        atraso = self.hoje - date.fromisoformat(lancamento['data']).toordinal()
+        if not 0 <= atraso < len(self.baldes):
+            return
+        saida = sinal * lancamento['saida']
+        desnecessaria = saida if lancamento['desnecessario'] else 0
+        balde = self.baldes[-1 - atraso]
+        balde[0] += saida
+        balde[1] += desnecessaria
+        for janela, total in self.totais.items():
+            if atraso < janela:
+                total[0] += saida
+                total[1] += desnecessaria
+    
+    def estatisticas(self):
+        """{janela: gasto, média diária, gasto desnecessário e sua proporção}"""
+        return {
+            janela: {
+                'gasto': gasto,
+                'mediaDiaria': gasto // janela,
+                'desnecessario': desnecessario,
+                'razaoDesnecessario': desnecessario / gasto if gasto else 0.0
+            }
+            for janela, (gasto, desnecessario) in self.totais.items()
+        }
+
+
+class ControleFinanceiro:    
+    # Campos com índice secundário (valor -> ids), usados por consultar()
+    CAMPOS_INDEXADOS = ('categoria', 'statusPagamento', 'grupoParcelaId')
+    ORDENACOES = ('data', '-data', 'valor', '-valor', None)
+    # Anos (além do atual) mantidos em memória pelo arquivamento automático (--arquivar-automaticamente)
+    ANOS_QUENTES = 2
+    MESES_ARQUIVADOS_EM_CACHE = 24
+    
+    def __init__(self, carregar=True, diretorio=".", somente_leitura=False):
+        """diretorio: pasta do perfil com os arquivos de dados (padrão: a pasta atual)
+        
+        Com somente_leitura=True nada é gravado na pasta: nem cache, rollups e
+        modelo de categorias, nem a migração de arquivos antigos. Serve para
+        ler um perfil que outra instância pode estar usando (ex.: a visão
+        consolidada); alterações feitas nele ficam só na memória.
+        """
+        self.diretorio = diretorio
+        self.somente_leitura = somente_leitura
+        self.lancamentos = []
+        self.contasFixas = []
+        self.planosParcelamento = []
+        self.arquivo_dados = os.path.join(diretorio, "dados_financeiros.json")
+        self.arquivo_contas_fixas = os.path.join(diretorio, "contas_fixas.json")
+        self.arquivo_parcelamentos = os.path.join(diretorio, "parcelamentos.json")
+        self._regra_da_ocorrencia = {}  # id da ocorrência -> (regra, chave em regra['ocorrencias'])
+        self._mes_contas_fixas = None  # até que mês as contas fixas foram expandidas
+        self.bytes_ultimo_salvamento = 0
+        self.arquivo_orcamentos = os.path.join(diretorio, "orcamentos.json")
+        self.arquivo_rollups = os.path.join(diretorio, "rollups_mensais.json")
+        self.arquivo_modelo_categorias = os.path.join(diretorio, "modelo_categorias.json")
+        self.arquivo_cache = os.path.join(diretorio, "cache_dados.pickle")
+        self._cache_desatualizado = False  # houve gravação depois do último cache binário
+        self.diretorio_arquivo = os.path.join(diretorio, "arquivo")
+        self._arquivo = {'versao': arquivo_frio.VERSAO_ARQUIVO, 'anos': {}}  # índice do arquivo frio
+        self._meses_arquivados = {}  # mês arquivado -> entrada do índice (posição, contagens e rollup)
+        self._cache_arquivo = OrderedDict()  # mês arquivado -> (chaves, lançamentos), LRU
+        self.categorizador = Categorizador()
+        self._rollups = {}  # mês fechado ('AAAA-MM') -> agregado do mês
+        self._rollups_alterados = False
+        self._contagem_mes = {}  # mês -> quantidade de lançamentos
+        self._cache_serie_diaria = None
+        self.orcamentos = {}  # categoria -> limite mensal
+        self.alertas_orcamento = []
+        self._mes_orcamento = None
+        self._gasto_mes = {}  # categoria -> saídas do mês atual
+        self._janelas = JanelasGastos()
+        self._nivel_orcamento = {}  # categoria -> último limiar atingido (0, 80 ou 100)
+        self._ultimo_id = 0
+        self._chaves_historico = []  # (data, id) em ordem crescente
+        self._por_id = {}
+        self._indices = {campo: {} for campo in self.CAMPOS_INDEXADOS}  # campo -> valor -> ids
+        self.categorias = {
+            'Alimentação': '🍔',
+            'Moradia': '🏠',
+            'Transporte': '🚗',
+            'Lazer': '🎮',
+            'Saúde': '💊',
+            'Contas Fixas': '📄',
+            'Investimentos': '📈',
+            'Renda': '💼',
+            'Outros': '🛍️'
+        }
+        
+        # Com carregar=False quem cria o objeto decide quando ler os arquivos
+        # (a interface faz isso no worker, depois de a janela aparecer)
+        if carregar:
+            self.carregar_dados()
+            self.verificar_contas_fixas_do_mes()
+    
+    def carregar_dados(self):
+        """Carrega dados do cache binário ou, se ele não vale mais, dos arquivos JSON"""
+        if os.path.exists(self.arquivo_orcamentos):
+            try:
+                with open(self.arquivo_orcamentos, 'r', encoding='utf-8') as f:
+                    self.orcamentos = {
+                        categoria: para_centavos(limite) for categoria, limite in json.load(f).items()
+                    }
+            except:
+                self.orcamentos = {}
+        
+        self._ler_indice_arquivo()
+        
+        if self._carregar_cache():
+            self._recalcular_orcamentos()
+            self._recalcular_janelas()
+            self._resolver_conflitos_arquivo()
+            self.categorizador.atualizar()
+            return
+        
+        if os.path.exists(self.arquivo_dados):
+            try:
+                # Arquivos em versões antigas do esquema são migrados aqui (só na memória se somente leitura)
+                self.lancamentos = [
+                    self._ler_valores(l)
+                    for l in ler_lancamentos(self.arquivo_dados, migrar=not self.somente_leitura)
+                ]
+            except:
+                self.lancamentos = []
+        
+        if os.path.exists(self.arquivo_contas_fixas):
+            try:
+                with open(self.arquivo_contas_fixas, 'r', encoding='utf-8') as f:
+                    self.contasFixas = [self._ler_valores(c) for c in json.load(f)]
+            except:
+                self.contasFixas = []
+        
+        if os.path.exists(self.arquivo_parcelamentos):
+            try:
+                with open(self.arquivo_parcelamentos, 'r', encoding='utf-8') as f:
+                    self.planosParcelamento = [
+                        self._ler_valores(p, ('valorTotal', 'valorParcela')) for p in json.load(f)
+                    ]
+            except:
+                self.planosParcelamento = []
+        
+        # Arquivos do formato antigo têm uma linha por parcela/mês de conta fixa
+        reais, migrou = self._compactar_legado(self.lancamentos)
+        self.lancamentos = reais + self._expandir_regras()
+        
+        self._rollups = self._ler_rollups()
+        self._rollups_alterados = False
+        
+        categorizador = None
+        if os.path.exists(self.arquivo_modelo_categorias):
+            try:
+                with open(self.arquivo_modelo_categorias, 'r', encoding='utf-8') as f:
+                    modelo = json.load(f)
+                # Como os rollups, só vale para esta versão exata dos arquivos de dados
+                if modelo.get('dados') == self._assinatura_arquivo_dados():
+                    categorizador = Categorizador.de_dict(modelo['modelo'])
+            except:
+                categorizador = None
+        self.categorizador = categorizador or self._treinar_categorizador()
+        
+        self._reconstruir_indices()
+        if migrou:
+            self.salvar_dados()
+        else:
+            self._gravar_cache()
+        self._resolver_conflitos_arquivo()
+        # As sugestões enquanto se digita só leem as matrizes prontas
+        self.categorizador.atualizar()
+    
+    @staticmethod
+    def _ler_valores(registro, campos=CAMPOS_VALOR):
+        """Converte para centavos os valores em reais de um registro lido dos arquivos"""
+        for campo in campos:
+            if campo in registro:
+                registro[campo] = para_centavos(registro[campo])
+        for ajustes in registro.get('ocorrencias', {}).values():
+            ControleFinanceiro._ler_valores(ajustes)
+        
+        # Planos gravados antes da divisão exata guardavam só o valor da parcela
+        if 'valorParcela' in registro:
+            registro['valorTotal'] = registro.pop('valorParcela') * registro['totalParcelas']
+        return registro
+    
+    @staticmethod
+    def _gravar_valores(registro, campos=CAMPOS_VALOR):
+        """Cópia de um registro com os valores em texto decimal, para gravar nos arquivos"""
+        copia = dict(registro)
+        for campo in campos:
+            if campo in copia:
+                copia[campo] = formatar_decimal(copia[campo])
+        if 'ocorrencias' in copia:
+            copia['ocorrencias'] = {
+                chave: ControleFinanceiro._gravar_valores(ajustes) for chave, ajustes in copia['ocorrencias'].items()
+            }
+        return copia
+    
+    def _reconstruir_indices(self):
+        """Reconstrói os índices em memória a partir da lista de lançamentos"""
+        self._por_id = {l['id']: l for l in self.lancamentos}
+        self._chaves_historico = sorted((l['data'], l['id']) for l in self.lancamentos)
+        self._ultimo_id = max(
+            [id_ for id_ in self._por_id if id_ not in self._regra_da_ocorrencia]
+            + [r['id'] for r in self.contasFixas + self.planosParcelamento],
+            default=0
+        )
+        self._contagem_mes = {}
+        self._cache_serie_diaria = None
+        for data, _ in self._chaves_historico:
+            self._contagem_mes[data[:7]] = self._contagem_mes.get(data[:7], 0) + 1
+        self._indices = {campo: {} for campo in self.CAMPOS_INDEXADOS}
+        for l in self.lancamentos:
+            self._indexar(l)
+        self._recalcular_orcamentos()
+        self._recalcular_janelas()
+    
+    def _indexar(self, lancamento, remover=False):
+        """Inclui (ou retira) um lançamento dos índices secundários"""
+        for campo, indice in self._indices.items():
+            valor = lancamento.get(campo)
+            if valor is None:
+                continue
+            if remover:
+                ids = indice.get(valor)
+                if ids is not None:
+                    ids.discard(lancamento['id'])
+                    if not ids:
+                        del indice[valor]
+            else:
+                indice.setdefault(valor, set()).add(lancamento['id'])
+    
+    def _lancamentos_do_mes(self, mes):
+        """Retorna os lançamentos de um mês ('AAAA-MM') pela fatia do índice ordenado"""
+        chaves = self._chaves_historico
+        inicio = bisect.bisect_left(chaves, (f"{mes}-",))
+        fim = bisect.bisect_left(chaves, (f"{mes}-~",), inicio)
+        return [self._por_id[id_] for _, id_ in chaves[inicio:fim]]
+    
+    def _inserir_lancamento(self, lancamento):
+        """Adiciona um lançamento à lista mantendo os índices atualizados"""
+        # Antes de mexer no índice ordenado, que as viradas do dia e do mês consultam
+        self._verificar_virada_dia()
+        self._verificar_virada_mes()
+        self.lancamentos.append(lancamento)
+        self._por_id[lancamento['id']] = lancamento
+        bisect.insort(self._chaves_historico, (lancamento['data'], lancamento['id']))
+        mes = lancamento['data'][:7]
+        self._contagem_mes[mes] = self._contagem_mes.get(mes, 0) + 1
+        self._indexar(lancamento)
+        self._invalidar_rollup(mes)
+        self._cache_serie_diaria = None
+        self._contabilizar_orcamento(lancamento, 1)
+        self._janelas.contabilizar(lancamento, 1)
+    
+    def _remover_lancamentos(self, predicado):
+        """Remove os lançamentos que satisfazem o predicado, mantendo os índices"""
+        mantidos = []
+        removidos = []
+        for l in self.lancamentos:
+            (removidos if predicado(l) else mantidos).append(l)
+        
+        if not removidos:
+            return removidos
+        
+        self._verificar_virada_dia()
+        self._verificar_virada_mes()
+        self.lancamentos = mantidos
+        self._cache_serie_diaria = None
+        for l in removidos:
+            self._por_id.pop(l['id'], None)
+            self._regra_da_ocorrencia.pop(l['id'], None)
+            self._indexar(l, remover=True)
+            mes = l['data'][:7]
+            self._contagem_mes[mes] -= 1
+            if not self._contagem_mes[mes]:
+                del self._contagem_mes[mes]
+            self._invalidar_rollup(mes)
+            self._contabilizar_orcamento(l, -1)
+            self._janelas.contabilizar(l, -1)
+        
+        if len(removidos) > 8:
+            ids_removidos = {l['id'] for l in removidos}
+            self._chaves_historico = [c for c in self._chaves_historico if c[1] not in ids_removidos]
+        else:
+            for l in removidos:
+                chave = (l['data'], l['id'])
+                pos = bisect.bisect_left(self._chaves_historico, chave)
+                if pos < len(self._chaves_historico) and self._chaves_historico[pos] == chave:
+                    del self._chaves_historico[pos]
+        
+        return removidos
+    
+    # ===== ORÇAMENTOS =====
+    
+    def _recalcular_orcamentos(self):
+        """Recalcula em uma passada o gasto do mês por categoria e os limiares atingidos"""
+        self._mes_orcamento = datetime.now().strftime("%Y-%m")
+        self._gasto_mes = {}
+        for l in self._lancamentos_do_mes(self._mes_orcamento):
+            if l['saida']:
+                self._gasto_mes[l['categoria']] = self._gasto_mes.get(l['categoria'], 0) + l['saida']
+        
+        self._nivel_orcamento = {
+            categoria: self._nivel_atingido(categoria) for categoria in self.orcamentos
+        }
+    
+    def _contabilizar_dias(self, primeiro, ultimo):
+        """Inclui nas janelas os lançamentos com data entre dois dias (ordinais, inclusivos)"""
+        chaves = self._chaves_historico
+        inicio = bisect.bisect_left(chaves, (date.fromordinal(primeiro).isoformat(),))
+        fim = bisect.bisect_right(chaves, (date.fromordinal(ultimo).isoformat(), float('inf')), inicio)
+        for _, id_ in chaves[inicio:fim]:
+            self._janelas.contabilizar(self._por_id[id_], 1)
+    
+    def _recalcular_janelas(self):
+        """Reconstrói as janelas móveis de gastos a partir dos lançamentos dos últimos dias"""
+        self._janelas = JanelasGastos()
+        hoje = self._janelas.hoje
+        self._contabilizar_dias(hoje - max(JanelasGastos.JANELAS) + 1, hoje)
+    
+    def _verificar_virada_dia(self):
+        """Desliza as janelas até hoje, incluindo os lançamentos dos dias que entraram
+        
+        Também descarta a série diária, que é cortada no dia de hoje.
+        """
+        hoje = date.today().toordinal()
+        anterior = self._janelas.hoje
+        if hoje == anterior:
+            return
+        self._cache_serie_diaria = None
+        if hoje - anterior >= max(JanelasGastos.JANELAS):
+            self._recalcular_janelas()
+            return
+        self._janelas.avancar(hoje)
+        self._contabilizar_dias(anterior + 1, hoje)
+    
+    def estatisticas_janelas(self):
+        """Gastos dos últimos 7, 30 e 90 dias (até hoje), média diária e proporção desnecessária"""
+        self._verificar_virada_dia()
+        return self._janelas.estatisticas()
+    
+    def _verificar_virada_mes(self):
+        """Reinicia o acompanhamento dos orçamentos quando o mês muda"""
+        if self._mes_orcamento != datetime.now().strftime("%Y-%m"):
+            self._recalcular_orcamentos()
+    
+    def _nivel_atingido(self, categoria):
+        """Retorna o maior limiar (0, 80 ou 100%) já atingido por uma categoria"""
+        limite = self.orcamentos.get(categoria)
+        if not limite:
+            return 0
+        percentual = self._gasto_mes.get(categoria, 0) / limite * 100
+        return 100 if percentual >= 100 else 80 if percentual >= 80 else 0
+    
+    def _contabilizar_orcamento(self, lancamento, sinal):
+        """Atualiza o gasto da categoria com um lançamento incluído (+1) ou removido (-1)
+        
+        Quem chama já verificou a virada do mês, antes de alterar os índices.
+        """
+        if not lancamento['saida'] or not lancamento['data'].startswith(self._mes_orcamento):
+            return
+        
+        categoria = lancamento['categoria']
+        self._gasto_mes[categoria] = self._gasto_mes.get(categoria, 0) + sinal * lancamento['saida']
+        
+        if categoria not in self.orcamentos:
+            return
+        nivel_anterior = self._nivel_orcamento.get(categoria, 0)
+        nivel = self._nivel_atingido(categoria)
+        self._nivel_orcamento[categoria] = nivel
+        if nivel > nivel_anterior:
+            self.alertas_orcamento.append({
+                'categoria': categoria,
+                'nivel': nivel,
+                'gasto': self._gasto_mes[categoria],
+                'limite': self.orcamentos[categoria]
+            })
+    
+    def definir_orcamento(self, categoria, limite):
+        """Define (ou remove, com limite vazio/zero) o orçamento mensal de uma categoria"""
+        if limite:
+            self.orcamentos[categoria] = limite  # em centavos
+            self._nivel_orcamento[categoria] = self._nivel_atingido(categoria)
+        else:
+            self.orcamentos.pop(categoria, None)
+            self._nivel_orcamento.pop(categoria, None)
+        
+        with open(self.arquivo_orcamentos, 'w', encoding='utf-8') as f:
+            json.dump(
+                {categoria: formatar_decimal(limite) for categoria, limite in self.orcamentos.items()},
+                f, ensure_ascii=False, indent=2
+            )
+    
+    def status_orcamentos(self):
+        """Retorna gasto x limite de todas as categorias com orçamento"""
+        self._verificar_virada_mes()
+        status = {}
+        for categoria, limite in self.orcamentos.items():
+            gasto = self._gasto_mes.get(categoria, 0)
+            status[categoria] = {
+                'icon': self.categorias.get(categoria, ''),
+                'limite': limite,
+                'gasto': gasto,
+                'percentual': gasto / limite * 100,
+                'nivel': self._nivel_orcamento.get(categoria, 0)
+            }
+        return status
+    
+    def consumir_alertas_orcamento(self):
+        """Retorna e limpa os alertas de orçamento disparados desde a última chamada"""
+        alertas, self.alertas_orcamento = self.alertas_orcamento, []
+        return alertas
+    
+    # ===== ROLLUPS MENSAIS =====
+    
+    def _assinatura_arquivo_dados(self):
+        """Tamanho e mtime dos arquivos de dados, para validar os rollups persistidos"""
+        assinatura = []
+        for arquivo in (self.arquivo_dados, self.arquivo_contas_fixas, self.arquivo_parcelamentos):
+            try:
+                info = os.stat(arquivo)
+            except OSError:
+                assinatura.append(None)
+                continue
+            assinatura.append([info.st_size, info.st_mtime_ns])
+        return assinatura
+    
+    def _treinar_categorizador(self):
+        """Treina um categorizador do zero com os lançamentos e as regras (uma vez cada)"""
+        categorizador = Categorizador()
+        for registro in self.contasFixas + self.planosParcelamento + [
+            l for l in self.lancamentos if l['id'] not in self._regra_da_ocorrencia
+        ]:
+            categorizador.aprender(registro['descricao'], registro['categoria'], registro.get('desnecessario', False))
+        return categorizador
+    
+    def _persistir_modelo_categorias(self):
+        """Grava o modelo do categorizador com a assinatura atual dos arquivos de dados"""
+        if self.somente_leitura:
+            return
+        with open(self.arquivo_modelo_categorias, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'dados': self._assinatura_arquivo_dados(), 'modelo': self.categorizador.para_dict()},
+                f, ensure_ascii=False
+            )
+        self.categorizador.alterado = False
+    
+    def sugerir_categoria(self, descricao):
+        """Categoria e desnecessário sugeridos para uma descrição, ou None se não há confiança"""
+        sugestao = self.categorizador.sugerir(descricao)
+        if sugestao is None or sugestao['confianca'] < CONFIANCA_MINIMA:
+            return None
+        return sugestao
+    
+    def _ler_rollups(self):
+        """Rollups persistidos, se foram gerados a partir desta versão exata do arquivo de dados"""
+        if os.path.exists(self.arquivo_rollups):
+            try:
+                with open(self.arquivo_rollups, 'r', encoding='utf-8') as f:
+                    rollups = json.load(f)
+                if rollups.get('unidade') == 'centavos' and rollups.get('dados') == self._assinatura_arquivo_dados():
+                    return rollups['meses']
+            except:
+                pass
+        return {}
+    
+    def _impressao_digital(self):
+        """Tamanho, mtime e hash de cada arquivo de dados, para validar o cache binário"""
+        impressao = []
+        for arquivo, tamanho_mtime in zip(
+            (self.arquivo_dados, self.arquivo_contas_fixas, self.arquivo_parcelamentos),
+            self._assinatura_arquivo_dados()
+        ):
+            if tamanho_mtime is None:
+                impressao.append(None)
+                continue
+            resumo = hashlib.blake2b(digest_size=16)
+            with open(arquivo, 'rb') as f:
+                for bloco in iter(functools.partial(f.read, 1 << 20), b''):
+                    resumo.update(bloco)
+            impressao.append(tamanho_mtime + [resumo.hexdigest()])
+        return impressao
+    
+    def _carregar_cache(self):
+        """Restaura lançamentos, regras, índices, rollups e categorizador do cache binário
+        
+        Só vale se cada arquivo de dados tem o mesmo tamanho, mtime e hash de
+        quando o cache foi gravado; tamanho e mtime são conferidos antes, para
+        não calcular o hash de um cache que já se sabe velho. Retorna False
+        (e quem chama lê os JSON) se o cache não existe, é de outra versão ou
+        não corresponde mais aos arquivos.
+        """
+        try:
+            with open(self.arquivo_cache, 'rb') as f:
+                cabecalho = pickle.load(f)
+                if cabecalho.get('versao') != VERSAO_CACHE:
+                    return False
+                assinatura = [i[:2] if i else None for i in cabecalho['arquivos']]
+                if assinatura != self._assinatura_arquivo_dados() or cabecalho['arquivos'] != self._impressao_digital():
+                    return False
+                estado = pickle.load(f)
+        except Exception:
+            return False
+        
+        (self.lancamentos, self.contasFixas, self.planosParcelamento, self._regra_da_ocorrencia,
+         self._mes_contas_fixas, self._por_id, self._chaves_historico, self._contagem_mes, self._indices,
+         self._ultimo_id, rollups, modelo) = estado
+        self.categorizador = Categorizador.de_dict(modelo)
+        # Rollups calculados depois da gravação do cache ficam só no arquivo de rollups
+        self._rollups = {**rollups, **self._ler_rollups()}
+        self._rollups_alterados = False
+        self._cache_serie_diaria = None
+        return True
+    
+    def _gravar_cache(self):
+        """Grava o estado carregado em um cache binário, identificado pela impressão digital dos arquivos"""
+        if self.somente_leitura:
+            return
+        estado = (
+            self.lancamentos, self.contasFixas, self.planosParcelamento, self._regra_da_ocorrencia,
+            self._mes_contas_fixas, self._por_id, self._chaves_historico, self._contagem_mes, self._indices,
+            self._ultimo_id, self._rollups, self.categorizador.para_dict()
+        )
+        temporario = self.arquivo_cache + '.tmp'
+        with open(temporario, 'wb') as f:
+            # O cabeçalho vem em separado: validar não exige desserializar o estado
+            pickle.dump({'versao': VERSAO_CACHE, 'arquivos': self._impressao_digital()}, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(estado, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, self.arquivo_cache)
+        self._cache_desatualizado = False
+    
+    def gravar_cache(self):
+        """Regrava o cache binário se alguma gravação o deixou velho; retorna se gravou"""
+        if not self._cache_desatualizado:
+            return False
+        self._gravar_cache()
+        return True
+    
+    def _invalidar_rollup(self, mes):
+        """Descarta o rollup de um mês cujos lançamentos mudaram"""
+        if self._rollups.pop(mes, None) is not None:
+            self._rollups_alterados = True
+    
+    def _persistir_rollups(self):
+        """Grava os rollups ao lado do arquivo de dados, se algo mudou"""
+        if not self._rollups_alterados or self.somente_leitura:
+            return
+        with open(self.arquivo_rollups, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'dados': self._assinatura_arquivo_dados(), 'unidade': 'centavos', 'meses': self._rollups},
+                f, ensure_ascii=False
+            )
+        self._rollups_alterados = False
+    
+    @staticmethod
+    def _agregar_linhas(linhas):
+        """Agrega lançamentos por categoria: totais, contagem, desnecessários e não pagas"""
+        categorias = {}
+        maior_gasto = 0
+        for l in linhas:
+            cat = categorias.get(l['categoria'])
+            if cat is None:
+                cat = categorias[l['categoria']] = {
+                    'entradas': 0, 'saidas': 0, 'investimentos': 0,
+                    'desnecessarios': 0, 'count': 0, 'naoPagas': 0
+                }
+            saida = l['saida']
+            cat['entradas'] += l['entrada']
+            cat['saidas'] += saida
+            cat['investimentos'] += l['investimento']
+            cat['count'] += 1
+            if l['desnecessario']:
+                cat['desnecessarios'] += saida
+            if l['statusPagamento'] == 'nao-paga':
+                cat['naoPagas'] += 1
+            if saida > maior_gasto:
+                maior_gasto = saida
+        return {'categorias': categorias, 'maiorGasto': maior_gasto}
+    
+    def _agregado_mes(self, mes, mes_atual):
+        """Agregado de um mês: do rollup se o mês está fechado, senão das linhas"""
+        arquivado = self._meses_arquivados.get(mes)
+        if arquivado is not None:
+            return arquivado['rollup']
+        if mes >= mes_atual:
+            return self._agregar_linhas(self._lancamentos_do_mes(mes))
+        
+        rollup = self._rollups.get(mes)
+        if rollup is None:
+            rollup = self._rollups[mes] = self._agregar_linhas(self._lancamentos_do_mes(mes))
+            self._rollups_alterados = True
+        return rollup
+    
+    def _agregar_periodo(self, periodo=None):
+        """Soma os agregados mensais de um período por categoria
+        
+        periodo: None (todo o histórico), 'AAAA' (um ano) ou 'AAAA-MM' (um mês).
+        Meses fechados vêm dos rollups (os arquivados, do índice do arquivo
+        frio), então o custo é proporcional ao número de meses mais as linhas
+        dos meses em aberto.
+        """
+        mes_atual = datetime.now().strftime("%Y-%m")
+        agregado = self._somar_agregados(
+            self._agregado_mes(mes, mes_atual)
+            for mes in itertools.chain(self._meses_arquivados, self._contagem_mes)
+            if not periodo or mes.startswith(periodo)
+        )
+        self._persistir_rollups()
+        return agregado
+    
+    @staticmethod
+    def _somar_agregados(agregados):
+        """Soma agregados parciais (de meses ou de perfis) por categoria"""
+        categorias = {}
+        maior_gasto = 0
+        for agregado in agregados:
+            maior_gasto = max(maior_gasto, agregado['maiorGasto'])
+            for nome, valores in agregado['categorias'].items():
+                total = categorias.setdefault(nome, dict.fromkeys(valores, 0))
+                for campo, valor in valores.items():
+                    total[campo] += valor
+        return {'categorias': categorias, 'maiorGasto': maior_gasto}
+    
+    # ===== REGRAS DE RECORRÊNCIA =====
+    #
+    # Parcelamentos e contas fixas são gravados como regras compactas. As
+    # ocorrências (parcelas e meses) são geradas a partir delas e só o que foi
+    # alterado em cada ocorrência (status, exclusão...) fica em
+    # regra['ocorrencias'], indexado pelo número da parcela ou pelo mês.
+    
+    CAMPOS_OCORRENCIA = (
+        'data', 'descricao', 'categoria', 'entrada', 'saida', 'investimento',
+        'statusPagamento', 'desnecessario'
+    )
+    
+    @staticmethod
+    def _meses_entre(inicio, fim):
+        """Gera os meses 'AAAA-MM' de inicio até fim, inclusive"""
+        ano, mes = int(inicio[:4]), int(inicio[5:7])
+        while f"{ano}-{mes:02d}" <= fim:
+            yield f"{ano}-{mes:02d}"
+            ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    
+    @staticmethod
+    def _valor_parcela(plano, n):
+        """Valor em centavos da parcela n: os centavos que sobram da divisão vão para as primeiras"""
+        base, resto = divmod(plano['valorTotal'], plano['totalParcelas'])
+        return base + (1 if n <= resto else 0)
+    
+    def _ocorrencia_parcela(self, plano, n):
+        """Monta a parcela n (1..totalParcelas) de um plano, ou None se foi excluída"""
+        ajustes = plano.get('ocorrencias', {}).get(str(n), {})
+        if ajustes.get('excluida'):
+            return None
+        
+        data = datetime.strptime(plano['dataInicial'], '%Y-%m-%d') + timedelta(days=plano['intervaloDias'] * (n - 1))
+        valor = self._valor_parcela(plano, n)
+        ocorrencia = {
+            'id': plano['id'] * 1000 + n,
+            'data': data.strftime('%Y-%m-%d'),
+            'descricao': plano['descricao'],
+            'descricaoOriginal': plano['descricao'],
+            'categoria': plano['categoria'],
+            'entrada': valor if plano['tipo'] == 'entrada' else 0,
+            'saida': valor if plano['tipo'] == 'saida' else 0,
+            'investimento': valor if plano['tipo'] == 'investimento' else 0,
+            'statusPagamento': 'nao-paga',
+            'desnecessario': plano['desnecessario'],
+            'recorrente': False,
+            'parcelaAtual': n,
+            'totalParcelas': plano['totalParcelas'],
+            'grupoParcelaId': plano['id']
+        }
+        ocorrencia.update(ajustes)
+        return ocorrencia
+    
+    def _ocorrencia_conta_fixa(self, conta, mes):
+        """Monta a ocorrência de uma conta fixa em um mês, ou None se foi excluída"""
+        ajustes = conta.get('ocorrencias', {}).get(mes, {})
+        if ajustes.get('excluida'):
+            return None
+        
+        ano, numero_mes = int(mes[:4]), int(mes[5:7])
+        dia = min(conta['dia'], calendar.monthrange(ano, numero_mes)[1])
+        indice = ano * 12 + numero_mes - (int(conta['inicio'][:4]) * 12 + int(conta['inicio'][5:7]))
+        ocorrencia = {
+            'id': conta['id'] * 1000 + indice,
+            'data': f"{mes}-{dia:02d}",
+            'descricao': conta['descricao'],
+            'categoria': conta['categoria'],
+            'entrada': conta.get('entrada', 0),
+            'saida': conta.get('saida', 0),
+            'investimento': conta.get('investimento', 0),
+            'statusPagamento': 'nao-paga',
+            'desnecessario': conta.get('desnecessario', False),
+            'recorrente': False,
+            'contaFixaId': conta['id']
+        }
+        ocorrencia.update(ajustes)
+        return ocorrencia
+    
+    def _ocorrencias_plano(self, plano, primeira=1, ultima=None):
+        """Gera as parcelas de um plano, registrando de que regra cada uma veio"""
+        for n in range(primeira, (ultima or plano['totalParcelas']) + 1):
+            ocorrencia = self._ocorrencia_parcela(plano, n)
+            if ocorrencia is not None:
+                self._regra_da_ocorrencia[ocorrencia['id']] = (plano, str(n))
+                yield ocorrencia
+    
+    def _ocorrencias_conta(self, conta, mes_inicial, mes_final):
+        """Gera os meses de uma conta fixa, registrando de que regra cada um veio"""
+        for mes in self._meses_entre(max(conta['inicio'], mes_inicial), mes_final):
+            ocorrencia = self._ocorrencia_conta_fixa(conta, mes)
+            if ocorrencia is not None:
+                self._regra_da_ocorrencia[ocorrencia['id']] = (conta, mes)
+                yield ocorrencia
+    
+    def ocorrencias_no_periodo(self, inicio, fim):
+        """Gera sob demanda as parcelas e contas fixas com data entre inicio e fim ('AAAA-MM-DD')
+        
+        Serve para qualquer período, inclusive meses futuros de contas fixas
+        que ainda não estão na memória.
+        """
+        data_inicio = datetime.strptime(inicio, '%Y-%m-%d')
+        data_fim = datetime.strptime(fim, '%Y-%m-%d')
+        
+        for plano in self.planosParcelamento:
+            data_inicial = datetime.strptime(plano['dataInicial'], '%Y-%m-%d')
+            intervalo = plano['intervaloDias']
+            primeira = max(1, -((data_inicial - data_inicio).days // intervalo) + 1)
+            ultima = min(plano['totalParcelas'], (data_fim - data_inicial).days // intervalo + 1)
+            for n in range(primeira, ultima + 1):
+                ocorrencia = self._ocorrencia_parcela(plano, n)
+                if ocorrencia is not None and inicio <= ocorrencia['data'] <= fim:
+                    yield ocorrencia
+        
+        for conta in self.contasFixas:
+            for mes in self._meses_entre(max(conta['inicio'], inicio[:7]), fim[:7]):
+                ocorrencia = self._ocorrencia_conta_fixa(conta, mes)
+                if ocorrencia is not None and inicio <= ocorrencia['data'] <= fim:
+                    yield ocorrencia
+    
+    def _expandir_regras(self):
+        """Gera em memória as ocorrências de todos os planos e das contas fixas até o mês atual"""
+        self._regra_da_ocorrencia = {}
+        self._mes_contas_fixas = datetime.now().strftime("%Y-%m")
+        
+        # Ocorrências em anos arquivados são geradas só quando o mês é lido do arquivo
+        primeiro_mes = self._primeiro_mes_quente()
+        ocorrencias = []
+        for plano in self.planosParcelamento:
+            for ocorrencia in self._ocorrencias_plano(plano):
+                if ocorrencia['data'][:7] >= primeiro_mes:
+                    ocorrencias.append(ocorrencia)
+                else:
+                    del self._regra_da_ocorrencia[ocorrencia['id']]
+        for conta in self.contasFixas:
+            mes_final = max(self._mes_contas_fixas, conta['inicio'])
+            ocorrencias.extend(self._ocorrencias_conta(conta, max(conta['inicio'], primeiro_mes), mes_final))
+        return ocorrencias
+    
+    def _ajustes_ocorrencia(self, gerada, linha):
+        """Campos em que uma linha gravada difere da ocorrência gerada pela regra"""
+        return {
+            campo: linha[campo]
+            for campo in self.CAMPOS_OCORRENCIA
+            if campo in linha and linha[campo] != gerada[campo]
+        }
+    
+    def _compactar_legado(self, linhas):
+        """Converte parcelas e contas fixas gravadas linha a linha em regras
+        
+        Retorna as linhas que continuam sendo lançamentos comuns e se algo foi
+        convertido. Diferenças entre cada linha e o que a regra geraria viram
+        ajustes da ocorrência, então nada do que estava gravado se perde.
+        """
+        planos_existentes = {p['id'] for p in self.planosParcelamento}
+        contas_legadas = {c['id']: c for c in self.contasFixas if 'inicio' not in c}
+        grupos = {}
+        por_conta = {}
+        reais = []
+        
+        for l in linhas:
+            if l.get('grupoParcelaId') and l['grupoParcelaId'] not in planos_existentes:
+                grupos.setdefault(l['grupoParcelaId'], []).append(l)
+            elif l.get('contaFixaId') in contas_legadas:
+                por_conta.setdefault(l['contaFixaId'], []).append(l)
+            else:
+                reais.append(l)
+        
+        for grupo_id, parcelas in grupos.items():
+            reais.extend(self._compactar_parcelas_legadas(grupo_id, parcelas))
+        for conta in contas_legadas.values():
+            reais.extend(self._compactar_conta_fixa_legada(conta, por_conta.get(conta['id'], [])))
+        
+        return reais, bool(grupos or contas_legadas)
+    
+    def _compactar_parcelas_legadas(self, grupo_id, parcelas):
+        """Cria o plano de um grupo de parcelas antigo e devolve as linhas que sobrarem"""
+        parcelas.sort(key=lambda p: p.get('parcelaAtual', 0))
+        base = parcelas[0]
+        tipo = 'entrada' if base['entrada'] > 0 else 'saida' if base['saida'] > 0 else 'investimento'
+        deslocamento = timedelta(days=30 * (base.get('parcelaAtual', 1) - 1))
+        data_inicial = datetime.strptime(base['data'], '%Y-%m-%d') - deslocamento
+        
+        plano = {
+            'id': grupo_id,
+            'descricao': base.get('descricaoOriginal', base['descricao'].split(' (')[0]),
+            'categoria': base['categoria'],
+            'tipo': tipo,
+            'valorTotal': base[tipo] * base.get('totalParcelas', len(parcelas)),
+            'totalParcelas': base.get('totalParcelas', len(parcelas)),
+            'dataInicial': data_inicial.strftime('%Y-%m-%d'),
+            'intervaloDias': 30,
+            'desnecessario': base['desnecessario'],
+            'ocorrencias': {}
+        }
+        
+        por_numero = {}
+        sobras = []
+        for p in parcelas:
+            n = p.get('parcelaAtual')
+            if n in por_numero or not 1 <= (n or 0) <= plano['totalParcelas']:
+                sobras.append(p)
+            else:
+                por_numero[n] = p
+        
+        for n in range(1, plano['totalParcelas'] + 1):
+            linha = por_numero.get(n)
+            if linha is None:
+                plano['ocorrencias'][str(n)] = {'excluida': True}
+                continue
+            ajustes = self._ajustes_ocorrencia(self._ocorrencia_parcela(plano, n), linha)
+            if ajustes:
+                plano['ocorrencias'][str(n)] = ajustes
+        
+        self.planosParcelamento.append(plano)
+        return sobras
+    
+    def _compactar_conta_fixa_legada(self, conta, linhas):
+        """Define início e dia de uma conta fixa antiga e devolve as linhas que sobrarem"""
+        mes_atual = datetime.now().strftime("%Y-%m")
+        linhas.sort(key=lambda l: l['data'])
+        if linhas:
+            conta['inicio'] = linhas[0]['data'][:7]
+            conta['dia'] = int(linhas[0]['data'][8:10])
+        else:
+            conta['inicio'] = mes_atual
+            conta['dia'] = datetime.now().day
+        conta['ocorrencias'] = {}
+        mes_final = max(mes_atual, conta['inicio'])
+        
+        por_mes = {}
+        sobras = []
+        for l in linhas:
+            if l['data'][:7] in por_mes or l['data'][:7] > mes_final:
+                sobras.append(l)
+            else:
+                por_mes[l['data'][:7]] = l
+        
+        # O formato antigo só gerava o mês atual se ainda não tivesse rodado nele
+        arquivo_controle = os.path.join(self.diretorio, "ultimo_mes_contas_fixas.txt")
+        ultimo_mes = ""
+        if os.path.exists(arquivo_controle):
+            with open(arquivo_controle, 'r') as f:
+                ultimo_mes = f.read().strip()
+        
+        for mes in self._meses_entre(conta['inicio'], mes_final):
+            linha = por_mes.get(mes)
+            if linha is None:
+                if mes < mes_atual or ultimo_mes == mes_atual:
+                    conta['ocorrencias'][mes] = {'excluida': True}
+                continue
+            ajustes = self._ajustes_ocorrencia(self._ocorrencia_conta_fixa(conta, mes), linha)
+            if ajustes:
+                conta['ocorrencias'][mes] = ajustes
+        
+        return sobras
+    
+    def salvar_dados(self):
+        """Salva dados nos arquivos JSON"""
+        deque(self._salvar_em_passos(), maxlen=0)
+    
+    def _salvar_em_passos(self):
+        """salvar_dados como gerador: devolve o controle entre um arquivo e o próximo
+        
+        As tarefas de manutenção gravam por aqui, para que a gravação não
+        ocupe o worker de uma vez só (ver AgendadorManutencao).
+        """
+        if self.somente_leitura:
+            return
+        # Ocorrências de parcelamentos e contas fixas são geradas pelas regras
+        # Valores ficam em centavos na memória e em texto decimal nos arquivos
+        lancamentos = [
+            self._gravar_valores(l) for l in self.lancamentos if l['id'] not in self._regra_da_ocorrencia
+        ]
+        bytes_gravados = gravar_lancamentos(self.arquivo_dados, lancamentos)
+        yield
+        
+        with open(self.arquivo_contas_fixas, 'w', encoding='utf-8') as f:
+            json.dump([self._gravar_valores(c) for c in self.contasFixas], f, ensure_ascii=False, indent=2)
+            bytes_gravados += f.tell()
+        
+        with open(self.arquivo_parcelamentos, 'w', encoding='utf-8') as f:
+            json.dump(
+                [self._gravar_valores(p, ('valorTotal',)) for p in self.planosParcelamento],
+                f, ensure_ascii=False, indent=2
+            )
+            bytes_gravados += f.tell()
+        self.bytes_ultimo_salvamento = bytes_gravados
+        yield
+        
+        # Toda alteração passa por aqui, no worker: refaz as matrizes das sugestões
+        self.categorizador.atualizar()
+        yield
+        
+        # A assinatura do arquivo de dados mudou: regrava os rollups e o modelo com ela
+        self._rollups_alterados = True
+        self._persistir_rollups()
+        yield
+        self._persistir_modelo_categorias()
+        # O cache só importa no próximo início: é regravado na folga ou ao fechar (gravar_cache)
+        self._cache_desatualizado = True
+        # Ocorrências de meses arquivados são geradas pelas regras, que podem ter mudado
+        self._cache_arquivo.clear()
+    
+    def verificar_contas_fixas_do_mes(self):
+        """Gera as ocorrências das contas fixas nos meses que começaram desde a última verificação
+        
+        Retorna True se algum mês novo foi gerado.
+        """
+        mes_atual = datetime.now().strftime("%Y-%m")
+        if self._mes_contas_fixas is None or self._mes_contas_fixas >= mes_atual:
+            return False
+        
+        meses = list(self._meses_entre(self._mes_contas_fixas, mes_atual))[1:]
+        for conta in self.contasFixas:
+            for ocorrencia in self._ocorrencias_conta(conta, meses[0], mes_atual):
+                self._inserir_lancamento(ocorrencia)
+        self._mes_contas_fixas = mes_atual
+        return True
+    
+    # ===== ARQUIVO FRIO =====
+    #
+    # Anos fechados podem ir para o arquivo frio (ver arquivo_frio.py). Eles
+    # são sempre os mais antigos: tudo antes do primeiro mês em memória está
+    # arquivado, então cada mês está inteiro em um dos dois lados. Totais e
+    # categorias dos meses arquivados vêm dos rollups do índice; os
+    # lançamentos são lidos mês a mês quando o histórico ou uma busca chegam
+    # neles, e só para consulta: alterar um deles exige desarquivar o ano.
+    
+    def _ler_indice_arquivo(self):
+        try:
+            self._arquivo = arquivo_frio.ler_indice(self.diretorio_arquivo)
+        except (OSError, ValueError):
+            self._arquivo = {'versao': arquivo_frio.VERSAO_ARQUIVO, 'anos': {}}
+        self._mapear_arquivo()
+    
+    def _mapear_arquivo(self):
+        """Refaz o mapa mês -> entrada do índice depois de o índice mudar"""
+        self._meses_arquivados = {
+            mes: info for ano in self._arquivo['anos'].values() for mes, info in ano['meses'].items()
+        }
+        self._cache_arquivo.clear()
+    
+    def _primeiro_mes_quente(self):
+        """Primeiro mês que não está no arquivo frio ('' se nada foi arquivado)"""
+        anos = self._arquivo['anos']
+        return f"{int(max(anos)) + 1}-01" if anos else ""
+    
+    def anos_arquivados(self):
+        return sorted(self._arquivo['anos'])
+    
+    @staticmethod
+    def _ultimo_ano_arquivavel():
+        """Último ano que pode ser arquivado: fechado e fora da maior janela de gastos"""
+        return (date.today() - timedelta(days=max(JanelasGastos.JANELAS))).year - 1
+    
+    def arquivar_ano(self, ano):
+        """Move os lançamentos de um ano fechado para o arquivo frio
+        
+        Só os lançamentos comuns são gravados; parcelas e contas fixas ficam
+        nas regras. O arquivo e o índice são gravados antes de os lançamentos
+        saírem do arquivo de dados: se algo falhar no meio, o ano fica nos dois
+        lugares e o carregamento seguinte desfaz o arquivamento (ver
+        _resolver_conflitos_arquivo). Retorna False se o ano não tem lançamentos.
+        """
+        if not self._arquivar_ano(str(ano)):
+            return False
+        self.salvar_dados()
+        return True
+    
+    def _arquivar_ano(self, ano):
+        """Grava o ano no arquivo frio e o tira da memória, sem gravar o arquivo de dados"""
+        if self.somente_leitura:
+            raise ValueError("perfil aberto somente para leitura")
+        if int(ano) > self._ultimo_ano_arquivavel():
+            raise ValueError(f"{ano} ainda não pode ser arquivado")
+        if any(mes < ano for mes in self._contagem_mes):
+            raise ValueError(f"os anos anteriores a {ano} precisam ser arquivados antes")
+        meses = sorted(mes for mes in self._contagem_mes if mes.startswith(ano))
+        if not meses:
+            return False
+        
+        linhas_por_mes = {}
+        indice_meses = {}
+        for mes in meses:
+            linhas = self._lancamentos_do_mes(mes)
+            linhas_por_mes[mes] = [
+                self._gravar_valores(l) for l in linhas if l['id'] not in self._regra_da_ocorrencia
+            ]
+            indice_meses[mes] = {'total': len(linhas), 'rollup': self._agregar_linhas(linhas)}
+        nome, posicoes = arquivo_frio.gravar_ano(self.diretorio_arquivo, ano, linhas_por_mes)
+        for mes, posicao in posicoes.items():
+            indice_meses[mes].update(posicao)
+        
+        self._arquivo['anos'][ano] = {'arquivo': nome, 'meses': indice_meses}
+        arquivo_frio.gravar_indice(self.diretorio_arquivo, self._arquivo)
+        self._mapear_arquivo()
+        self._remover_lancamentos(lambda l: l['data'].startswith(ano))
+        return True
+    
+    def arquivar_ate(self, ano):
+        """Arquiva todos os anos até `ano`, inclusive, e retorna os que foram arquivados"""
+        if int(ano) > self._ultimo_ano_arquivavel():
+            raise ValueError(f"{ano} ainda não pode ser arquivado")
+        anos = sorted({mes[:4] for mes in self._contagem_mes if mes[:4] <= str(ano)})
+        arquivados = [a for a in anos if self._arquivar_ano(a)]
+        if arquivados:
+            self.salvar_dados()
+        return arquivados
+    
+    def desarquivar_anos(self, desde_ano):
+        """Traz de volta para a memória os anos arquivados a partir de `desde_ano`
+        
+        Os anos posteriores vêm junto, para que o arquivo continue sendo só os
+        anos mais antigos. Lançamentos que já estão em memória (mesmo id) não
+        são duplicados. Retorna os anos desarquivados.
+        """
+        anos = [ano for ano in self.anos_arquivados() if ano >= str(desde_ano)]
+        if not anos:
+            return []
+        
+        restaurados = []
+        entradas = [self._arquivo['anos'].pop(ano) for ano in anos]
+        for entrada in entradas:
+            for info in entrada['meses'].values():
+                for l in arquivo_frio.ler_mes(self.diretorio_arquivo, entrada['arquivo'], info):
+                    if l['id'] not in self._por_id:
+                        restaurados.append(self._ler_valores(l))
+        self._mapear_arquivo()
+        
+        reais = [l for l in self.lancamentos if l['id'] not in self._regra_da_ocorrencia]
+        self.lancamentos = reais + restaurados + self._expandir_regras()
+        self._reconstruir_indices()
+        self.salvar_dados()
+        
+        # Os arquivos só somem depois de os lançamentos estarem no arquivo de dados
+        if self.somente_leitura:
+            return anos
+        arquivo_frio.gravar_indice(self.diretorio_arquivo, self._arquivo)
+        for entrada in entradas:
+            arquivo_frio.remover_ano(self.diretorio_arquivo, entrada['arquivo'])
+        return anos
+    
+    def _resolver_conflitos_arquivo(self):
+        """Desarquiva os anos que também têm lançamentos no arquivo de dados
+        
+        Acontece se um arquivamento foi interrompido ou se outro programa
+        gravou lançamentos em um ano arquivado; nada se perde nos dois casos.
+        """
+        primeiro_mes = self._primeiro_mes_quente()
+        conflitos = [mes for mes in self._contagem_mes if mes < primeiro_mes]
+        if conflitos:
+            self.desarquivar_anos(min(conflitos)[:4])
+    
+    def _desarquivar_se_necessario(self, data):
+        """Desarquiva o ano de `data` antes de um lançamento ser incluído nele"""
+        if data[:7] < self._primeiro_mes_quente():
+            self.desarquivar_anos(data[:4])
+    
+    def _linhas_mes_arquivado(self, mes):
+        """(chaves, lançamentos) de um mês arquivado em ordem (data, id), com cache LRU
+        
+        Lê só o membro do mês no arquivo do ano e acrescenta as ocorrências que
+        as regras geram no mês. Os lançamentos voltam marcados como 'arquivado'.
+        """
+        entrada = self._cache_arquivo.get(mes)
+        if entrada is not None:
+            self._cache_arquivo.move_to_end(mes)
+            return entrada
+        
+        info = self._meses_arquivados[mes]
+        arquivo = self._arquivo['anos'][mes[:4]]['arquivo']
+        linhas = [self._ler_valores(l) for l in arquivo_frio.ler_mes(self.diretorio_arquivo, arquivo, info)]
+        ultimo_dia = calendar.monthrange(int(mes[:4]), int(mes[5:7]))[1]
+        linhas.extend(self.ocorrencias_no_periodo(f"{mes}-01", f"{mes}-{ultimo_dia:02d}"))
+        linhas.sort(key=lambda l: (l['data'], l['id']))
+        for l in linhas:
+            l['arquivado'] = True
+        
+        entrada = self._cache_arquivo[mes] = ([(l['data'], l['id']) for l in linhas], linhas)
+        if len(self._cache_arquivo) > self.MESES_ARQUIVADOS_EM_CACHE:
+            self._cache_arquivo.popitem(last=False)
+        return entrada
+    
+    def _meses_arquivados_com_linhas(self, reverso=False):
+        return sorted((mes for mes, info in self._meses_arquivados.items() if info['total']), reverse=reverso)
+    
+    def meses_com_lancamentos(self):
+        """Meses ('AAAA-MM') com algum lançamento, em memória ou arquivados, em ordem"""
+        return self._meses_arquivados_com_linhas() + sorted(self._contagem_mes)
+    
+    def lancamentos_do_mes(self, mes):
+        """Lançamentos de um mês em ordem (data, id), lendo do arquivo frio se o mês foi arquivado"""
+        if mes in self._meses_arquivados:
+            return self._linhas_mes_arquivado(mes)[1]
+        return self._lancamentos_do_mes(mes)
+    
+    def _ocorrencias_arquivadas(self, regra):
+        """Ocorrências de um plano ou conta fixa que caem em meses arquivados"""
+        if not self._meses_arquivados:
+            return []
+        primeiro_mes = self._primeiro_mes_quente()
+        if 'totalParcelas' in regra:
+            geradas = (self._ocorrencia_parcela(regra, n) for n in range(1, regra['totalParcelas'] + 1))
+        else:
+            meses = self._meses_entre(regra['inicio'], max(self._meses_arquivados))
+            geradas = (self._ocorrencia_conta_fixa(regra, mes) for mes in meses)
+        return [o for o in geradas if o is not None and o['data'][:7] < primeiro_mes]
+    
+    def _descontar_do_arquivo(self, ocorrencias):
+        """Retira dos rollups arquivados as ocorrências de uma regra excluída
+        
+        O maior gasto do mês não tem como ser recalculado sem ler o mês e
+        continua como estava.
+        """
+        por_mes = {}
+        for o in ocorrencias:
+            por_mes.setdefault(o['data'][:7], []).append(o)
+        for mes, linhas in por_mes.items():
+            info = self._meses_arquivados.get(mes)
+            if info is None:
+                continue
+            categorias = info['rollup']['categorias']
+            for nome, valores in self._agregar_linhas(linhas)['categorias'].items():
+                total = categorias[nome]
+                for campo, valor in valores.items():
+                    total[campo] -= valor
+                if not total['count']:
+                    del categorias[nome]
+            info['total'] -= len(linhas)
+        if por_mes:
+            if not self.somente_leitura:
+                arquivo_frio.gravar_indice(self.diretorio_arquivo, self._arquivo)
+            self._cache_arquivo.clear()
+    
+    # ===== MANUTENÇÃO =====
+    # Geradores para o AgendadorManutencao: cada yield é um ponto em que a
+    # tarefa pode ser interrompida e retomada sem deixar os dados inconsistentes
+    
+    def atualizar_rollups(self):
+        """Calcula os rollups que faltam dos meses fechados, um mês por passo, e os grava"""
+        mes_atual = datetime.now().strftime("%Y-%m")
+        calculados = 0
+        for mes in sorted(self._contagem_mes):
+            if mes >= mes_atual:
+                break
+            if mes not in self._rollups:
+                self._agregado_mes(mes, mes_atual)
+                calculados += 1
+                yield
+        self._persistir_rollups()
+        return calculados
+    
+    def compactar_ocorrencias(self):
+        """Remove ajustes de ocorrências que repetem o que a regra já gera (uma regra por passo)
+        
+        Sobram, por exemplo, quando um status é alterado e depois volta ao
+        original. Grava os arquivos só se algo mudou.
+        """
+        removidos = 0
+        regras = [(c, self._ocorrencia_conta_fixa) for c in self.contasFixas] + [
+            (p, lambda plano, chave: self._ocorrencia_parcela(plano, int(chave))) for p in self.planosParcelamento
+        ]
+        for regra, gerar in regras:
+            ocorrencias = regra.get('ocorrencias', {})
+            for chave, ajustes in list(ocorrencias.items()):
+                if ajustes.get('excluida'):
+                    continue
+                del ocorrencias[chave]
+                original = gerar(regra, chave)
+                redundantes = [campo for campo, valor in ajustes.items() if original.get(campo) == valor]
+                for campo in redundantes:
+                    del ajustes[campo]
+                removidos += len(redundantes)
+                if ajustes:
+                    ocorrencias[chave] = ajustes
+            yield
+        if removidos:
+            yield from self._salvar_em_passos()
+        return removidos
+    
+    def arquivar_anos_antigos(self):
+        """Arquiva os anos anteriores aos ANOS_QUENTES mais recentes
+        
+        Cada ano vai para o arquivo frio em um passo e o arquivo de dados é
+        gravado nos passos seguintes, como em arquivar_ano.
+        """
+        limite = min(self._ultimo_ano_arquivavel(), date.today().year - 1 - self.ANOS_QUENTES)
+        arquivados = 0
+        for ano in sorted({mes[:4] for mes in self._contagem_mes if int(mes[:4]) <= limite}):
+            if self._arquivar_ano(ano):
+                arquivados += 1
+                yield
+                yield from self._salvar_em_passos()
+            yield
+        return arquivados
+    
+    def aquecer_caches(self):
+        """Recalcula os caches em memória que a interface usa, um por passo"""
+        self._serie_diaria()
+        yield
+        self.categorizador.atualizar()
+        yield
+        self.estatisticas_janelas()
+    
+    def _gerar_id(self):
+        """Gera um ID único e crescente, baseado no timestamp em milissegundos"""
+        self._ultimo_id = max(int(time.time() * 1000), self._ultimo_id + 1)
+        return self._ultimo_id
+    
+    def adicionar(self, lancamento):
+        """Adiciona um novo lançamento"""
+        self._desarquivar_se_necessario(lancamento['data'])
+        lancamento['id'] = self._gerar_id()
+        # Lançamentos em memória sempre têm os campos obrigatórios do esquema
+        for campo, padrao in PADROES_LANCAMENTO.items():
+            lancamento.setdefault(campo, 0 if campo in CAMPOS_VALOR else padrao)
+        self.categorizador.aprender(lancamento['descricao'], lancamento['categoria'], lancamento['desnecessario'])
+        
+        # Se for parcelado, criar as parcelas
+        if lancamento.get('parcelas') and lancamento['parcelas'] >= 2:
+            self.criar_parcelas(lancamento)
+        elif lancamento.get('recorrente'):
+            # Conta fixa: o próprio lançamento é a ocorrência do primeiro mês
+            inicio = lancamento['data'][:7]
+            conta_fixa = {
+                'id': self._gerar_id(),
+                'descricao': lancamento['descricao'],
+                'categoria': lancamento['categoria'],
+                'entrada': lancamento.get('entrada', 0),
+                'saida': lancamento.get('saida', 0),
+                'investimento': lancamento.get('investimento', 0),
+                'desnecessario': lancamento.get('desnecessario', False),
+                'inicio': inicio,
+                'dia': int(lancamento['data'][8:10]),
+                'ocorrencias': {}
+            }
+            if lancamento.get('statusPagamento', 'nao-paga') != 'nao-paga':
+                conta_fixa['ocorrencias'][inicio] = {'statusPagamento': lancamento['statusPagamento']}
+            # Uma conta com data passada não cria dívidas nos meses já passados:
+            # como no formato antigo, só o mês do lançamento existe, e a regra
+            # passa a gerar os meses seguintes na próxima virada de mês
+            mes_final = max(self._mes_contas_fixas or inicio, inicio)
+            for mes in itertools.islice(self._meses_entre(inicio, mes_final), 1, None):
+                conta_fixa['ocorrencias'][mes] = {'excluida': True}
+            self.contasFixas.append(conta_fixa)
+            
+            for ocorrencia in self._ocorrencias_conta(conta_fixa, inicio, inicio):
+                self._inserir_lancamento(ocorrencia)
+        else:
+            self._inserir_lancamento(lancamento)
+        
+        self.salvar_dados()
+    
+    def criar_parcelas(self, lancamento_original):
+        """Cria um plano de parcelamento e gera suas parcelas
+        
+        O total é dividido em centavos inteiros; o resto da divisão fica com as
+        primeiras parcelas, então a soma das parcelas é sempre igual ao total.
+        """
+        valor_total = (lancamento_original.get('entrada', 0) or 
+                      lancamento_original.get('saida', 0) or 
+                      lancamento_original.get('investimento', 0))
+        tipo = ('entrada' if lancamento_original.get('entrada', 0) > 0 else
+                'saida' if lancamento_original.get('saida', 0) > 0 else 'investimento')
+        
+        plano = {
+            'id': self._gerar_id(),
+            'descricao': lancamento_original['descricao'],
+            'categoria': lancamento_original['categoria'],
+            'tipo': tipo,
+            'valorTotal': valor_total,
+            'totalParcelas': lancamento_original['parcelas'],
+            'dataInicial': lancamento_original['data'],
+            'intervaloDias': 30,
+            'desnecessario': lancamento_original.get('desnecessario', False),
+            'ocorrencias': {}
+        }
+        if lancamento_original.get('statusPagamento') == 'paga':
+            plano['ocorrencias']['1'] = {'statusPagamento': 'paga'}
+        self.planosParcelamento.append(plano)
+        
+        for parcela in self._ocorrencias_plano(plano):
+            self._inserir_lancamento(parcela)
+    
+    def excluir(self, lancamento_id):
+        """Exclui um lançamento"""
+        origem = self._regra_da_ocorrencia.get(lancamento_id)
+        if origem is not None:
+            regra, chave = origem
+            regra.setdefault('ocorrencias', {})[chave] = {'excluida': True}
+        elif lancamento_id in self._por_id:
+            l = self._por_id[lancamento_id]
+            self.categorizador.esquecer(l['descricao'], l['categoria'], l['desnecessario'])
+        
+        self._remover_lancamentos(lambda l: l['id'] == lancamento_id)
+        self.salvar_dados()
+    
+    def excluir_grupo_parcelamento(self, grupo_id):
+        """Exclui todas as parcelas de um grupo"""
+        arquivadas = []
+        for plano in self.planosParcelamento:
+            if plano['id'] == grupo_id:
+                self.categorizador.esquecer(plano['descricao'], plano['categoria'], plano.get('desnecessario', False))
+                arquivadas = self._ocorrencias_arquivadas(plano)
+        self.planosParcelamento = [p for p in self.planosParcelamento if p['id'] != grupo_id]
+        self._remover_lancamentos(lambda l: l.get('grupoParcelaId') == grupo_id)
+        self.salvar_dados()
+        self._descontar_do_arquivo(arquivadas)
+    
+    def excluir_conta_fixa(self, conta_id):
+        """Exclui uma conta fixa e todos seus lançamentos"""
+        arquivadas = []
+        for conta in self.contasFixas:
+            if conta['id'] == conta_id:
+                self.categorizador.esquecer(conta['descricao'], conta['categoria'], conta.get('desnecessario', False))
+                arquivadas = self._ocorrencias_arquivadas(conta)
+        self.contasFixas = [c for c in self.contasFixas if c['id'] != conta_id]
+        self._remover_lancamentos(lambda l: l.get('contaFixaId') == conta_id)
+        self.salvar_dados()
+        self._descontar_do_arquivo(arquivadas)
+    
+    def alterar_status_pagamento(self, lancamento_id, novo_status):
+        """Altera o status de pagamento de um lançamento"""
+        self._definir_status(lancamento_id, novo_status)
+        self.salvar_dados()
+    
+    def _definir_status(self, lancamento_id, novo_status):
+        """Troca o status em memória (índices, rollup e regra de origem), sem gravar"""
+        lancamento = self._por_id.get(lancamento_id)
+        if lancamento is None:
+            return False
+        self._indexar(lancamento, remover=True)
+        lancamento['statusPagamento'] = novo_status
+        self._indexar(lancamento)
+        self._invalidar_rollup(lancamento['data'][:7])
+        
+        origem = self._regra_da_ocorrencia.get(lancamento_id)
+        if origem is not None:
+            regra, chave = origem
+            regra.setdefault('ocorrencias', {}).setdefault(chave, {})['statusPagamento'] = novo_status
+        return True
+    
+    def propor_conciliacao(self, extrato, janela_dias=JANELA_DIAS):
+        """Casa as linhas de um extrato com os lançamentos não pagos (ver conciliacao.py)
+        
+        Retorna (propostas, linhas sem correspondência); cada proposta leva
+        também o lançamento encontrado em 'lancamento'. Nada é alterado até
+        aplicar_conciliacao().
+        """
+        nao_pagas = self.consultar(status='nao-paga', ordenar=None)
+        propostas, sem_correspondencia = propor_conciliacao(nao_pagas, extrato, janela_dias)
+        for proposta in propostas:
+            proposta['lancamento'] = self._por_id[proposta['lancamentoId']]
+        
+        # Linhas sem lançamento provavelmente viram lançamentos novos: já sugere a categoria
+        sugestoes = self.categorizador.classificar_lote([l['descricao'] for l in sem_correspondencia])
+        for linha, sugestao in zip(sem_correspondencia, sugestoes):
+            linha['categoriaSugerida'] = sugestao['categoria'] if sugestao else None
+        return propostas, sem_correspondencia
+    
+    def aplicar_conciliacao(self, lancamento_ids):
+        """Marca como pagos os lançamentos confirmados, com uma única gravação"""
+        alterados = sum(1 for id_ in lancamento_ids if self._definir_status(id_, 'paga'))
+        if alterados:
+            self.salvar_dados()
+        return alterados
+    
+    def obter_lancamentos_mes_atual(self):
+        """Retorna apenas lançamentos do mês atual"""
+        return self._lancamentos_do_mes(datetime.now().strftime("%Y-%m"))
+    
+    def obter_pagina_historico(self, cursor=None, limite=50, direcao='proxima'):
+        """Retorna uma página do histórico completo, do mais recente ao mais antigo
+        
+        Paginação por chave (keyset) sobre a ordenação (data, id): o cursor é a
+        chave de uma das pontas da página exibida. 'proxima' traz os lançamentos
+        mais antigos que o cursor e 'anterior' os mais recentes. Sem cursor,
+        retorna a página mais recente. Cada página custa uma busca binária;
+        depois do lançamento mais antigo em memória a paginação continua pelos
+        meses arquivados, lidos um a um do arquivo frio.
+        """
+        chave = lambda l: (l['data'], l['id'])
+        
+        if cursor is None or direcao == 'proxima':
+            linhas = list(itertools.islice(self._historico_decrescente(cursor), limite + 1))
+            tem_proxima = len(linhas) > limite
+            linhas = linhas[:limite]
+            mais_recente = chave(linhas[0]) if linhas else cursor
+            tem_anterior = (
+                mais_recente is not None and next(self._historico_crescente(mais_recente), None) is not None
+            )
+        else:
+            linhas = list(itertools.islice(self._historico_crescente(cursor), limite + 1))
+            tem_anterior = len(linhas) > limite
+            linhas = linhas[limite - 1::-1] if tem_anterior else linhas[::-1]
+            mais_antigo = chave(linhas[-1]) if linhas else cursor
+            tem_proxima = next(self._historico_decrescente(mais_antigo), None) is not None
+        
+        return {
+            'lancamentos': linhas,
+            'cursorInicio': chave(linhas[0]) if linhas else None,
+            'cursorFim': chave(linhas[-1]) if linhas else None,
+            'temAnterior': tem_anterior,
+            'temProxima': tem_proxima,
+            'total': len(self._chaves_historico) + sum(info['total'] for info in self._meses_arquivados.values())
+        }
+    
+    def _historico_decrescente(self, antes=None):
+        """Lançamentos com chave (data, id) menor que `antes`, do mais recente ao mais antigo"""
+        chaves = self._chaves_historico
+        fim = len(chaves) if antes is None else bisect.bisect_left(chaves, tuple(antes))
+        for i in range(fim - 1, -1, -1):
+            yield self._por_id[chaves[i][1]]
+        
+        for mes in self._meses_arquivados_com_linhas(reverso=True):
+            if antes is not None and mes > antes[0][:7]:
+                continue
+            chaves_mes, linhas = self._linhas_mes_arquivado(mes)
+            fim = len(chaves_mes) if antes is None else bisect.bisect_left(chaves_mes, tuple(antes))
+            yield from reversed(linhas[:fim])
+    
+    def _historico_crescente(self, depois=None):
+        """Lançamentos com chave (data, id) maior que `depois`, do mais antigo ao mais recente"""
+        for mes in self._meses_arquivados_com_linhas():
+            if depois is not None and mes < depois[0][:7]:
+                continue
+            chaves_mes, linhas = self._linhas_mes_arquivado(mes)
+            inicio = 0 if depois is None else bisect.bisect_right(chaves_mes, tuple(depois))
+            yield from linhas[inicio:]
+        
+        chaves = self._chaves_historico
+        inicio = 0 if depois is None else bisect.bisect_right(chaves, tuple(depois))
+        for i in range(inicio, len(chaves)):
+            yield self._por_id[chaves[i][1]]
+    
+    def consultar(self, periodo=None, categorias=None, status=None, grupo=None, desnecessario=None,
+                  texto=None, valor_min=None, valor_max=None, ordenar='-data', limite=None, incluir_arquivo=False):
+        """Retorna um gerador dos lançamentos que atendem a todos os filtros
+        
+        periodo: 'AAAA', 'AAAA-MM', 'AAAA-MM-DD' ou uma tupla (inicio, fim) de
+        datas inclusivas, com None para deixar uma ponta aberta. categorias e
+        status aceitam um valor ou uma lista; grupo é o id de um parcelamento;
+        texto procura na descrição, sem diferenciar maiúsculas; valor_min e
+        valor_max são em centavos. ordenar: 'data', '-data', 'valor', '-valor'
+        ou None (a ordem mais barata).
+        
+        A consulta parte do índice mais seletivo entre os filtros informados
+        (faixa de datas, categoria, status ou grupo) e aplica os demais só aos
+        candidatos desse índice. Os resultados saem sob demanda: ordenando
+        por data, parar de consumir o gerador interrompe a busca.
+        
+        Com incluir_arquivo=True os meses arquivados do período também são
+        lidos (sem índice, mês a mês) e seus lançamentos vêm depois dos em
+        memória em '-data', antes em 'data'.
+        """
+        if ordenar not in self.ORDENACOES:
+            raise ValueError(f"ordenação inválida: {ordenar!r}")
+        
+        filtros = {
+            'categoria': self._valores_filtro(categorias),
+            'statusPagamento': self._valores_filtro(status),
+            'grupoParcelaId': self._valores_filtro(grupo)
+        }
+        faixa = self._faixa_periodo(periodo) if periodo is not None else None
+        indice, candidatos = self._planejar_consulta(faixa, filtros)
+        
+        # O filtro do índice escolhido já está garantido pelos candidatos
+        verificacoes = []
+        verificacao_indice = None
+        if faixa is not None:
+            inicio, fim = faixa
+            verificacao = lambda l: inicio <= (l['data'], l['id']) < fim
+            if indice == 'data':
+                verificacao_indice = verificacao
+            else:
+                verificacoes.append(verificacao)
+        for campo, valores in filtros.items():
+            if valores is not None:
+                verificacao = lambda l, campo=campo, valores=valores: l.get(campo) in valores
+                if campo == indice:
+                    verificacao_indice = verificacao
+                else:
+                    verificacoes.append(verificacao)
+        if desnecessario is not None:
+            verificacoes.append(lambda l: bool(l['desnecessario']) == desnecessario)
+        if texto:
+            procurado = texto.casefold()
+            verificacoes.append(lambda l: procurado in l['descricao'].casefold())
+        if valor_min is not None:
+            verificacoes.append(lambda l: self._valor_lancamento(l) >= valor_min)
+        if valor_max is not None:
+            verificacoes.append(lambda l: self._valor_lancamento(l) <= valor_max)
+        
+        arquivadas = ()
+        if incluir_arquivo and self._meses_arquivados:
+            todas = verificacoes + ([verificacao_indice] if verificacao_indice else [])
+            arquivadas = (
+                l for l in self._linhas_arquivadas(faixa, reverso=ordenar == '-data') if all(v(l) for v in todas)
+            )
+        return self._executar_consulta(indice, candidatos, verificacoes, ordenar, limite, arquivadas)
+    
+    def _linhas_arquivadas(self, faixa, reverso=False):
+        """Lançamentos dos meses arquivados que cruzam a faixa, mês a mês, em ordem de data"""
+        for mes in self._meses_arquivados_com_linhas(reverso):
+            if faixa is not None and not (faixa[0] <= (f"{mes}-~",) and (mes,) < faixa[1]):
+                continue
+            linhas = self._linhas_mes_arquivado(mes)[1]
+            yield from (reversed(linhas) if reverso else linhas)
+    
+    @staticmethod
+    def _valores_filtro(valores):
+        """Normaliza o valor de um filtro de igualdade para um conjunto (None = sem filtro)"""
+        if valores is None:
+            return None
+        if isinstance(valores, (str, int)):
+            return {valores}
+        return set(valores)
+    
+    @staticmethod
+    def _valor_lancamento(lancamento):
+        return lancamento['entrada'] or lancamento['saida'] or lancamento['investimento']
+    
+    @staticmethod
+    def _faixa_periodo(periodo):
+        """Converte o período em limites (data, id) para busca binária no índice ordenado"""
+        inicio, fim = periodo if isinstance(periodo, tuple) else (periodo, periodo)
+        # '~' ordena depois de qualquer sufixo da data: '2024~' cobre todo o ano
+        return ((inicio,) if inicio else ('',)), ((f"{fim}~",) if fim else ('~',))
+    
+    def _planejar_consulta(self, faixa, filtros):
+        """Escolhe o índice com menos candidatos para os filtros informados
+        
+        Retorna (nome do índice, candidatos). Para o índice de datas os
+        candidatos são a fatia (início, fim) de _chaves_historico; para os
+        demais, a lista de ids. Sem filtro indexado, a fatia é o histórico todo.
+        """
+        chaves = self._chaves_historico
+        if faixa is not None:
+            inicio = bisect.bisect_left(chaves, faixa[0])
+            melhor = ('data', (inicio, bisect.bisect_left(chaves, faixa[1], inicio)))
+            custo = melhor[1][1] - melhor[1][0]
+        else:
+            melhor = ('data', (0, len(chaves)))
+            custo = None
+        
+        for campo, valores in filtros.items():
+            if valores is None:
+                continue
+            conjuntos = [self._indices[campo].get(valor, ()) for valor in valores]
+            tamanho = sum(len(ids) for ids in conjuntos)
+            if custo is None or tamanho < custo:
+                melhor = (campo, [id_ for ids in conjuntos for id_ in ids])
+                custo = tamanho
+        return melhor
+    
+    def _executar_consulta(self, indice, candidatos, verificacoes, ordenar, limite, arquivadas=()):
+        por_id = self._por_id
+        chaves = self._chaves_historico
+        
+        if indice == 'data':
+            inicio, fim = candidatos
+            posicoes = range(fim - 1, inicio - 1, -1) if ordenar == '-data' else range(inicio, fim)
+            linhas = (por_id[chaves[i][1]] for i in posicoes)
+        else:
+            linhas = [por_id[id_] for id_ in candidatos]
+            if ordenar in ('data', '-data'):
+                linhas.sort(key=lambda l: (l['data'], l['id']), reverse=ordenar == '-data')
+        
+        resultados = (l for l in linhas if all(v(l) for v in verificacoes))
+        # Os meses arquivados são todos anteriores aos em memória
+        if ordenar == 'data':
+            resultados = itertools.chain(arquivadas, resultados)
+        else:
+            resultados = itertools.chain(resultados, arquivadas)
+        
+        if ordenar in ('valor', '-valor'):
+            chave = lambda l: (self._valor_lancamento(l), l['data'], l['id'])
+            if limite is not None:
+                selecao = heapq.nlargest if ordenar == '-valor' else heapq.nsmallest
+                yield from selecao(limite, resultados, key=chave)
+            else:
+                yield from sorted(resultados, key=chave, reverse=ordenar == '-valor')
+        else:
+            yield from itertools.islice(resultados, limite)
+    
+    def obter_parcelamentos(self):
+        """Retorna resumo de todos os parcelamentos"""
+        grupos = {}
+        
+        parcelas_por_grupo = {
+            grupo_id: [self._por_id[id_] for id_ in ids] for grupo_id, ids in self._indices['grupoParcelaId'].items()
+        }
+        # Parcelas em anos arquivados continuam contando para o plano
+        for plano in self.planosParcelamento:
+            arquivadas = self._ocorrencias_arquivadas(plano)
+            if arquivadas:
+                parcelas_por_grupo.setdefault(plano['id'], []).extend(arquivadas)
+        
+        for grupo_id, parcelas in parcelas_por_grupo.items():
+            parcelas.sort(key=lambda x: x['data'])
+            l = parcelas[0]
+            grupos[grupo_id] = {
+                'id': grupo_id,
+                'descricao': l.get('descricaoOriginal', l['descricao'].split(' (')[0]),
+                'categoria': l['categoria'],
+                'totalParcelas': l['totalParcelas'],
+                'valorParcela': l['entrada'] or l['saida'] or l['investimento'],
+                'tipo': 'entrada' if l['entrada'] > 0 else 'saida' if l['saida'] > 0 else 'investimento',
+                'parcelas': parcelas
+            }
+        
+        # Calcular estatísticas
+        for grupo in grupos.values():
+            grupo['parcelasPagas'] = sum(1 for p in grupo['parcelas'] if p['statusPagamento'] == 'paga')
+            valores = [p['entrada'] or p['saida'] or p['investimento'] for p in grupo['parcelas']]
+            grupo['valorTotal'] = sum(valores)
+            grupo['valorPago'] = sum(v for v, p in zip(valores, grupo['parcelas']) if p['statusPagamento'] == 'paga')
+            grupo['valorRestante'] = grupo['valorTotal'] - grupo['valorPago']
+        
+        return list(grupos.values())
+    
+    def calcular_resumo(self, periodo=None):
+        """Calcula o resumo financeiro (de todo o histórico, de um ano ou de um mês)"""
+        return self._resumir_agregado(self._agregar_periodo(periodo))
+    
+    @staticmethod
+    def _resumir_agregado(agregado):
+        """Monta o resumo financeiro a partir de um agregado por categoria"""
+        categorias = agregado['categorias'].values()
+        total_entradas = sum(c['entradas'] for c in categorias)
+        total_saidas = sum(c['saidas'] for c in categorias)
+        total_investimentos = sum(c['investimentos'] for c in categorias)
+        total_desnecessarios = sum(c['desnecessarios'] for c in categorias)
+        total_nao_pagas = sum(c['naoPagas'] for c in categorias)
+        
+        return {
+            'totalEntradas': total_entradas,
+            'totalSaidas': total_saidas,
+            'totalInvestimentos': total_investimentos,
+            'totalDesnecessarios': total_desnecessarios,
+            'saldoDisponivel': total_entradas - total_saidas - total_investimentos,
+            'patrimonioTotal': total_entradas - total_saidas,
+            'percentualEconomizado': (total_entradas - total_saidas) / total_entradas * 100 if total_entradas > 0 else 0,
+            'maiorGasto': agregado['maiorGasto'],
+            'totalLancamentos': sum(c['count'] for c in categorias),
+            'totalNaoPagas': total_nao_pagas
+        }
+    
+    def calcular_por_categoria(self, periodo=None):
+        """Calcula totais por categoria"""
+        resultado = {}
+        agregado = self._agregar_periodo(periodo)['categorias']
+        total_saidas = sum(c['saidas'] for c in agregado.values())
+        
+        for nome_cat, icon in self.categorias.items():
+            total = agregado.get(nome_cat, {}).get('saidas', 0)
+            count = agregado.get(nome_cat, {}).get('count', 0)
+            percent = (total / total_saidas * 100) if total_saidas > 0 else 0
+            
+            resultado[nome_cat] = {
+                'icon': icon,
+                'total': total,
+                'percent': percent,
+                'count': count
+            }
+        
+        return resultado
+    
+    def projetar_fluxo_caixa(self, meses=12):
+        """Projeta entradas, saídas, investimentos e saldo dos próximos meses
+        
+        Combina os lançamentos não pagos já em memória nos meses futuros
+        (parcelas e contas fixas que já começaram a ser geradas) com as
+        ocorrências das contas fixas nos meses que ainda não foram gerados.
+        Os lançamentos em memória são percorridos só depois do mês atual,
+        localizados por busca binária no índice (data, id), e somados com numpy.
+        """
+        hoje = datetime.now()
+        mes_base = hoje.year * 12 + hoje.month - 1
+        meses_rotulos = [
+            f"{(mes_base + i) // 12}-{(mes_base + i) % 12 + 1:02d}" for i in range(1, meses + 1)
+        ]
+        
+        # Lançamentos de meses futuros: os não pagos entram na projeção, os já
+        # pagos (parcelas antecipadas) já saíram do saldo atual. Como o índice
+        # está ordenado por data, cada mês é uma fatia contígua dele
+        chaves = self._chaves_historico
+        limites = [bisect.bisect_left(chaves, (f"{rotulo}-01",)) for rotulo in meses_rotulos]
+        mes_seguinte = mes_base + meses + 1
+        limites.append(bisect.bisect_left(chaves, (f"{mes_seguinte // 12}-{mes_seguinte % 12 + 1:02d}-01",)))
+        
+        futuros = [self._por_id[id_] for _, id_ in chaves[limites[0]:]]
+        no_horizonte = limites[-1] - limites[0]
+        abertos = np.fromiter(
+            (l['statusPagamento'] == 'nao-paga' for l in futuros), dtype=bool, count=len(futuros)
+        )
+        valores = np.fromiter(
+            (v for l in futuros for v in (l['entrada'], l['saida'], l['investimento'])),
+            dtype=np.int64, count=len(futuros) * 3
+        ).reshape(-1, 3) * abertos[:, None]
+        
+        # Soma exata em centavos: cada mês é um segmento contíguo de `valores`
+        fluxos = np.zeros((3, meses), dtype=np.int64)
+        cheios = np.flatnonzero(np.diff(limites))
+        if len(cheios):
+            inicios = np.array(limites[:-1])[cheios] - limites[0]
+            fluxos[:, cheios] = np.add.reduceat(valores[:no_horizonte], inicios, axis=0).T
+        
+        # Contas fixas nos meses ainda não gerados: matriz (valor, conta, mês)
+        # com cada conta a partir do seu início. As poucas ocorrências que já
+        # estão em memória (somadas acima) ou têm ajustes (excluída, já paga,
+        # outro valor) são corrigidas uma a uma antes da soma por mês
+        if self.contasFixas:
+            numeros = np.arange(mes_base + 1, mes_base + meses + 1)
+            inicios = np.array([int(c['inicio'][:4]) * 12 + int(c['inicio'][5:7]) - 1 for c in self.contasFixas])
+            valores_contas = np.array(
+                [(c.get('entrada', 0), c.get('saida', 0), c.get('investimento', 0)) for c in self.contasFixas],
+                dtype=np.int64
+            )
+            ativas = numeros[None, :] >= inicios[:, None]
+            por_conta = valores_contas.T[:, :, None] * ativas
+            
+            linha = {c['id']: i for i, c in enumerate(self.contasFixas)}
+            coluna = {rotulo: j for j, rotulo in enumerate(meses_rotulos)}
+            em_memoria = {
+                (linha[l['contaFixaId']], coluna[l['data'][:7]])
+                for l in futuros[:no_horizonte] if l.get('contaFixaId') in linha
+            }
+            for i, j in em_memoria:
+                por_conta[:, i, j] = 0
+            for i, conta in enumerate(self.contasFixas):
+                for rotulo in conta.get('ocorrencias', ()):
+                    j = coluna.get(rotulo)
+                    if j is None or not ativas[i, j] or (i, j) in em_memoria:
+                        continue
+                    ocorrencia = self._ocorrencia_conta_fixa(conta, rotulo)
+                    por_conta[:, i, j] = (
+                        (ocorrencia['entrada'], ocorrencia['saida'], ocorrencia['investimento'])
+                        if ocorrencia is not None and ocorrencia['statusPagamento'] == 'nao-paga' else 0
+                    )
+            fluxos += por_conta.sum(axis=1)
+        entradas, saidas, investimentos = fluxos
+        
+        # Saldo de partida: tudo até o mês atual mais o que já foi pago adiantado
+        resumo = self.calcular_resumo()
+        total_abertos = valores.sum(axis=0)
+        saldo_inicial = resumo['saldoDisponivel'] - (total_abertos[0] - total_abertos[1] - total_abertos[2])
+        
+        return {
+            'meses': meses_rotulos,
+            'entradas': entradas,
+            'saidas': saidas,
+            'investimentos': investimentos,
+            'saldoInicial': saldo_inicial,
+            'saldo': saldo_inicial + np.cumsum(entradas - saidas - investimentos)
+        }
+    
+    def _serie_diaria(self):
+        """Retorna (dias, líquido, saídas, saídas desnecessárias) por dia do histórico até hoje, com cache"""
+        self._verificar_virada_dia()
+        if self._cache_serie_diaria is None:
+            hoje = datetime.now().strftime("%Y-%m-%d")
+            fim = bisect.bisect_right(self._chaves_historico, (hoje, float('inf')))
+            chaves = self._chaves_historico[:fim]
+            linhas = [self._por_id[id_] for _, id_ in chaves]
+            
+            dias = np.array([data for data, _ in chaves], dtype='datetime64[D]')
+            liquido = np.fromiter(
+                (l['entrada'] - l['saida'] - l['investimento'] for l in linhas),
+                dtype=np.int64, count=len(linhas)
+            )
+            saidas = np.fromiter((l['saida'] for l in linhas), dtype=np.int64, count=len(linhas))
+            desnecessarias = np.fromiter(
+                (l['saida'] if l['desnecessario'] else 0 for l in linhas), dtype=np.int64, count=len(linhas)
+            )
+            
+            # O índice já está ordenado por data: basta somar cada sequência de dias iguais
+            dias_unicos, inicios = np.unique(dias, return_index=True)
+            if len(dias_unicos):
+                liquido = np.add.reduceat(liquido, inicios)
+                saidas = np.add.reduceat(saidas, inicios)
+                desnecessarias = np.add.reduceat(desnecessarias, inicios)
+            self._cache_serie_diaria = (dias_unicos, liquido, saidas, desnecessarias)
+        
+        return self._cache_serie_diaria
+    
+    def serie_tendencia(self, granularidade='diaria', pontos=800):
+        """Séries de saldo acumulado e de gastos do histórico, prontas para plotar
+        
+        granularidade: 'diaria', 'semanal' ou 'mensal'. Cada série é reduzida
+        com LTTB para no máximo `pontos` pontos (a largura do gráfico em
+        pixels), então o matplotlib nunca recebe mais do que consegue exibir.
+        """
+        dias, liquido, saidas, _ = self._serie_diaria()
+        
+        if granularidade == 'semanal':
+            # 1970-01-01 foi uma quinta: +3 faz as semanas começarem na segunda
+            semanas = (dias.astype(np.int64) + 3) // 7
+            chaves, inicios = np.unique(semanas, return_index=True)
+            datas = (chaves * 7 - 3).astype('datetime64[D]')
+        elif granularidade == 'mensal':
+            chaves, inicios = np.unique(dias.astype('datetime64[M]'), return_index=True)
+            datas = chaves.astype('datetime64[D]')
+        else:
+            datas, inicios = dias, None
+        
+        if inicios is not None and len(inicios):
+            liquido = np.add.reduceat(liquido, inicios)
+            saidas = np.add.reduceat(saidas, inicios)
+        
+        # O saldo dos anos arquivados é o ponto de partida da série
+        saldo_arquivado = sum(
+            c['entradas'] - c['saidas'] - c['investimentos']
+            for info in self._meses_arquivados.values() for c in info['rollup']['categorias'].values()
+        )
+        saldo = saldo_arquivado + np.cumsum(liquido)
+        x = datas.astype(np.int64).astype(np.float64)
+        indices_saldo = reduzir_lttb(x, saldo, pontos)
+        indices_gastos = reduzir_lttb(x, saidas, pontos)
+        
+        return {
+            'granularidade': granularidade,
+            'datasSaldo': datas[indices_saldo],
+            'saldo': saldo[indices_saldo],
+            'datasGastos': datas[indices_gastos],
+            'gastos': saidas[indices_gastos],
+            'pontosOriginais': len(datas),
+            'janelas': self.serie_janelas(pontos)
+        }
+    
+    def serie_janelas(self, pontos=800):
+        """Médias diárias móveis de gastos (7, 30 e 90 dias) e proporção desnecessária em 30 dias
+        
+        Calculadas de uma vez para todo o histórico: a série diária vira um
+        vetor denso do primeiro dia até hoje, e cada janela é a diferença de
+        duas posições da soma acumulada. Os pontos são escolhidos com LTTB
+        sobre a média de 30 dias e valem para todas as séries.
+        """
+        dias, _, saidas, desnecessarias = self._serie_diaria()
+        if not len(dias):
+            vazio = np.array([], dtype='datetime64[D]')
+            return {'datas': vazio, 'medias': {j: np.array([]) for j in JanelasGastos.JANELAS},
+                    'razaoDesnecessario': np.array([])}
+        
+        inicio = dias[0]
+        posicoes = (dias - inicio).astype(np.int64)
+        total_dias = int((np.datetime64(date.today(), 'D') - inicio).astype(np.int64)) + 1
+        acumulado = np.zeros(total_dias + 1, dtype=np.int64)
+        acumulado_desnecessario = np.zeros(total_dias + 1, dtype=np.int64)
+        acumulado[posicoes + 1] = saidas
+        acumulado_desnecessario[posicoes + 1] = desnecessarias
+        np.cumsum(acumulado, out=acumulado)
+        np.cumsum(acumulado_desnecessario, out=acumulado_desnecessario)
+        
+        fim = np.arange(1, total_dias + 1)
+        medias = {}
+        for janela in JanelasGastos.JANELAS:
+            comeco = np.maximum(fim - janela, 0)
+            medias[janela] = (acumulado[fim] - acumulado[comeco]) / janela
+        comeco = np.maximum(fim - 30, 0)
+        gasto_30 = acumulado[fim] - acumulado[comeco]
+        desnecessario_30 = acumulado_desnecessario[fim] - acumulado_desnecessario[comeco]
+        razao = np.divide(desnecessario_30, gasto_30, out=np.zeros(total_dias), where=gasto_30 > 0)
+        
+        datas = inicio + np.arange(total_dias)
+        indices = reduzir_lttb(datas.astype(np.int64).astype(np.float64), medias[30], pontos)
+        return {
+            'datas': datas[indices],
+            'medias': {janela: serie[indices] for janela, serie in medias.items()},
+            'razaoDesnecessario': razao[indices]
+        }
+    
+    def calcular_painel(self, partes=None):
+        """Calcula de uma vez as partes do dashboard pedidas (roda no worker)"""
+        calculos = {
+            'resumo': self.calcular_resumo,
+            'lancamentos': lambda: sorted(self.obter_lancamentos_mes_atual(), key=lambda x: x['data'], reverse=True),
+            'parcelamentos': self.obter_parcelamentos,
+            'contas_fixas': lambda: list(self.contasFixas),
+            'categorias': self.calcular_por_categoria,
+            'orcamentos': lambda: {
+                'status': self.status_orcamentos(),
+                'alertas': self.consumir_alertas_orcamento()
+            },
+            'janelas': self.estatisticas_janelas
+        }
+        
+        return {
+            parte: calcular()
+            for parte, calcular in calculos.items()
+            if partes is None or parte in partes
+        }
+
+
+# ===== PERFIS =====
+
+DIRETORIO_PERFIS = "perfis"
+
+
+def listar_perfis(raiz=DIRETORIO_PERFIS):
+    """Perfis existentes: {nome: pasta}"""
+    if not os.path.isdir(raiz):
+        return {}
+    return {
+        nome: os.path.join(raiz, nome)
+        for nome in sorted(os.listdir(raiz))
+        if os.path.isdir(os.path.join(raiz, nome))
+    }
+
+
+def diretorio_perfil(nome, raiz=DIRETORIO_PERFIS):
+    """Pasta de um perfil, criada se ainda não existir"""
+    diretorio = os.path.join(raiz, nome)
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def _agregar_perfil(diretorio, periodo):
+    """Carrega um perfil e devolve seus agregados parciais (roda em um processo do pool)"""
+    # Somente leitura: o perfil pode estar aberto em outra janela
+    controle = ControleFinanceiro(diretorio=diretorio, somente_leitura=True)
+    parcelamentos = controle.obter_parcelamentos()
+    return {
+        'agregado': controle._agregar_periodo(periodo),
+        'parcelamentos': {
+            'quantidade': len(parcelamentos),
+            'valorTotal': sum(p['valorTotal'] for p in parcelamentos),
+            'valorPago': sum(p['valorPago'] for p in parcelamentos),
+            'valorRestante': sum(p['valorRestante'] for p in parcelamentos)
+        }
+    }
+
+
+def consolidar_perfis(perfis, periodo=None, processos=None):
+    """Resumo, categorias e parcelamentos somados de vários perfis
+    
+    perfis: {nome: pasta}. Cada perfil é carregado e agregado em um processo
+    separado (um por núcleo, por padrão); aqui só se juntam os agregados
+    parciais, que são pequenos. Usa 'spawn' porque a interface tem threads
+    e o Tk, que não sobrevivem bem a um fork.
+    """
+    nomes = list(perfis)
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+        parciais = dict(zip(nomes, pool.map(_agregar_perfil, perfis.values(), [periodo] * len(nomes))))
+    
+    categorias = {}
+    for nome, parcial in parciais.items():
+        for categoria, valores in parcial['agregado']['categorias'].items():
+            pivo = categorias.setdefault(categoria, {'total': 0, 'porPerfil': {}})
+            pivo['total'] += valores['saidas']
+            pivo['porPerfil'][nome] = valores['saidas']
+    
+    return {
+        'perfis': {
+            nome: {
+                'resumo': ControleFinanceiro._resumir_agregado(parcial['agregado']),
+                'parcelamentos': parcial['parcelamentos']
+            }
+            for nome, parcial in parciais.items()
+        },
+        'resumo': ControleFinanceiro._resumir_agregado(
+            ControleFinanceiro._somar_agregados(p['agregado'] for p in parciais.values())
+        ),
+        'categorias': categorias,
+        'parcelamentos': {
+            campo: sum(p['parcelamentos'][campo] for p in parciais.values())
+            for campo in ('quantidade', 'valorTotal', 'valorPago', 'valorRestante')
+        }
+    }
+
+
+class Instrumentacao:
+    """Métricas opcionais dos métodos públicos do ControleFinanceiro
+    
+    Desativada, não custa nada: os métodos da classe ficam intactos. Ao
+    ativar, cada método público é trocado por um wrapper que registra
+    chamadas, um histograma de latência, o tamanho do ledger e quantas linhas
+    foram retornadas; em salvar_dados, também os bytes gravados. As métricas
+    podem ser lidas com instantaneo() ou gravadas em JSON com gravar().
+    
+    Métodos que retornam geradores (consultar, as tarefas de manutenção...)
+    são medidos até o fim da iteração: conta só o tempo gasto dentro do
+    gerador, não o de quem consome, e as linhas são os itens produzidos (os
+    passos vazios das tarefas de manutenção não contam). A chamada é
+    registrada quando o gerador termina, é fechado ou descartado.
+    
+    Pela linha de comando: python controle_financeiro_completo.py --metricas metricas.json
+    """
+    
+    # Limites superiores (ms) das faixas do histograma; a última faixa é "acima"
+    LIMITES_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+    
+    def __init__(self, classe=None):
+        self.classe = classe
+        self.metricas = {}
+        self._originais = {}
+        self._trava = threading.Lock()
+    
+    @property
+    def ativa(self):
+        return bool(self._originais)
+    
+    def ativar(self):
+        """Envolve os métodos públicos da classe com a coleta de métricas"""
+        if self.ativa:
+            return
+        for nome, metodo in vars(self.classe).items():
+            if not nome.startswith('_') and callable(metodo):
+                self._originais[nome] = metodo
+                setattr(self.classe, nome, self._envolver(nome, metodo))
+    
+    def desativar(self):
+        """Restaura os métodos originais (as métricas coletadas continuam disponíveis)"""
+        for nome, metodo in self._originais.items():
+            setattr(self.classe, nome, metodo)
+        self._originais = {}
+    
+    def _envolver(self, nome, metodo):
+        @functools.wraps(metodo)
+        def medido(controle, *args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = None
+            try:
+                resultado = metodo(controle, *args, **kwargs)
+                if inspect.isgenerator(resultado):
+                    return self._medir_gerador(nome, controle, resultado, time.perf_counter() - inicio)
+                return resultado
+            finally:
+                if not inspect.isgenerator(resultado):
+                    duracao = (time.perf_counter() - inicio) * 1000
+                    if isinstance(resultado, dict):
+                        resultado = resultado.get('lancamentos')  # páginas do histórico
+                    retornadas = len(resultado) if isinstance(resultado, list) else 0
+                    gravados = controle.bytes_ultimo_salvamento if nome == 'salvar_dados' else 0
+                    self.registrar(nome, duracao, len(controle.lancamentos), retornadas, gravados)
+        return medido
+    
+    def _medir_gerador(self, nome, controle, gerador, duracao):
+        """Repassa os itens de um gerador medindo só o tempo gasto dentro dele"""
+        retornadas = 0
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    item = next(gerador)
+                except StopIteration as fim:
+                    duracao += time.perf_counter() - inicio
+                    return fim.value
+                duracao += time.perf_counter() - inicio
+                if item is not None:
+                    retornadas += 1
+                yield item
+        finally:
+            gerador.close()
+            self.registrar(nome, duracao * 1000, len(controle.lancamentos), retornadas)
+    
+    def registrar(self, nome, duracao_ms, linhas_ledger, linhas_retornadas=0, bytes_gravados=0):
+        """Acumula uma chamada nas métricas do método"""
+        with self._trava:
+            metrica = self.metricas.get(nome)
+            if metrica is None:
+                metrica = self.metricas[nome] = {
+                    'chamadas': 0, 'totalMs': 0.0, 'minMs': float('inf'), 'maxMs': 0.0,
+                    'histograma': [0] * (len(self.LIMITES_MS) + 1),
+                    'linhasLedger': 0, 'linhasRetornadas': 0, 'bytesGravados': 0
+                }
+            metrica['chamadas'] += 1
+            metrica['totalMs'] += duracao_ms
+            metrica['minMs'] = min(metrica['minMs'], duracao_ms)
+            metrica['maxMs'] = max(metrica['maxMs'], duracao_ms)
+            metrica['histograma'][bisect.bisect_left(self.LIMITES_MS, duracao_ms)] += 1
+            metrica['linhasLedger'] = linhas_ledger
+            metrica['linhasRetornadas'] += linhas_retornadas
+            metrica['bytesGravados'] += bytes_gravados
+    
+    def instantaneo(self):
+        """Cópia das métricas, com média por chamada e as faixas do histograma nomeadas"""
+        faixas = [f"<={limite}ms" for limite in self.LIMITES_MS] + [f">{self.LIMITES_MS[-1]}ms"]
+        with self._trava:
+            return {
+                nome: {
+                    **metrica,
+                    'mediaMs': metrica['totalMs'] / metrica['chamadas'],
+                    'histograma': dict(zip(faixas, metrica['histograma']))
+                }
+                for nome, metrica in self.metricas.items()
+            }
+    
+    def gravar(self, arquivo):
+        """Grava as métricas em um arquivo JSON"""
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'data': datetime.now().isoformat(timespec='seconds'), 'metodos': self.instantaneo()},
+                f, ensure_ascii=False, indent=2
+            )
+
+
+instrumentacao = Instrumentacao(ControleFinanceiro)
+
+
+def reduzir_lttb(x, y, limite):
+    """Escolhe até `limite` índices de uma série preservando sua forma visual
+    
+    Implementa o Largest-Triangle-Three-Buckets: divide a série em baldes e,
+    em cada um, fica com o ponto que forma o maior triângulo com o ponto
+    escolhido no balde anterior e a média do balde seguinte.
+    """
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+    
+    indices = np.empty(limite, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    bordas = np.linspace(1, n - 1, limite - 1).astype(np.int64)
+    
+    a = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        proximo_fim = bordas[i + 2] if i + 2 < len(bordas) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        
+        areas = np.abs(
+            (x[a] - media_x) * (y[inicio:fim] - y[a]) - (x[a] - x[inicio:fim]) * (media_y - y[a])
+        )
+        a = inicio + int(areas.argmax())
+        indices[i + 1] = a
+    
+    return indices
+
+
+class TrabalhadorSegundoPlano:
+    """Executa operações pesadas do ControleFinanceiro fora do loop do Tk
+    
+    Todas as chamadas rodam em uma única thread, o que serializa o acesso aos
+    dados sem precisar de travas. Os resultados voltam para a thread do Tk por
+    uma fila consumida com after(), e um pedido com a mesma chave descarta o
+    resultado de pedidos anteriores ainda não entregues.
+    
+    Tarefas longas que não tocam no ControleFinanceiro da janela (ex.: a
+    visão consolidada dos perfis) vão com isolada=True para uma segunda
+    thread, e não atrasam as gravações e os redesenhos.
+    """
+    
+    INTERVALO_ENTREGA_MS = 16  # ~60 fps
+    
+    def __init__(self, janela):
+        self.janela = janela
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="controle-financeiro")
+        self._executor_isolado = None  # criado no primeiro pedido isolado
+        self._resultados = queue.SimpleQueue()
+        self._geracoes = {}
+        self._pendentes = {}
+        self._em_andamento = 0
+        self._encerrado = False
+        self._after_id = self.janela.after(self.INTERVALO_ENTREGA_MS, self._entregar_resultados)
+    
+    @property
+    def ocioso(self):
+        """Nenhum pedido na fila ou em execução (e nenhum resultado por entregar)"""
+        return self._em_andamento == 0
+    
+    def executar(self, funcao, *args, chave=None, ao_concluir=None, ao_falhar=None, isolada=False, **kwargs):
+        """Agenda uma chamada no worker
+        
+        Com `chave`, o pedido substitui o anterior de mesma chave: se o antigo
+        ainda não começou ele é cancelado, senão seu resultado é descartado.
+        Mutações devem ser enviadas sem chave para nunca serem canceladas.
+        Com isolada=True a chamada roda na thread das tarefas independentes.
+        """
+        geracao = None
+        if chave is not None:
+            geracao = self._geracoes.get(chave, 0) + 1
+            self._geracoes[chave] = geracao
+            anterior = self._pendentes.pop(chave, None)
+            if anterior is not None:
+                anterior.cancel()
+        
+        executor = self._executor
+        if isolada:
+            if self._executor_isolado is None:
+                self._executor_isolado = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="controle-financeiro-isolada"
+                )
+            executor = self._executor_isolado
+        futuro = executor.submit(funcao, *args, **kwargs)
+        self._em_andamento += 1
+        if chave is not None:
+            self._pendentes[chave] = futuro
+        
+        futuro.add_done_callback(
+            lambda f: self._resultados.put((chave, geracao, f, ao_concluir, ao_falhar))
+        )
+        return futuro
+    
+    def _entregar_resultados(self):
+        """Repassa os resultados prontos aos callbacks, na thread do Tk"""
+        while True:
+            try:
+                chave, geracao, futuro, ao_concluir, ao_falhar = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            
+            self._em_andamento -= 1
+            if futuro.cancelled():
+                continue
+            if chave is not None:
+                if self._geracoes.get(chave) != geracao:
+                    continue  # Pedido substituído por um mais recente
+                if self._pendentes.get(chave) is futuro:
+                    del self._pendentes[chave]
+            
+            erro = futuro.exception()
+            try:
+                if erro is not None:
+                    if ao_falhar:
+                        ao_falhar(erro)
+                    else:
+                        messagebox.showerror("Erro", f"Falha ao processar dados:\n{erro}")
+                elif ao_concluir:
+                    ao_concluir(futuro.result())
+            except Exception as e:
+                self.janela.report_callback_exception(type(e), e, e.__traceback__)
+        
+        if not self._encerrado:
+            self._after_id = self.janela.after(self.INTERVALO_ENTREGA_MS, self._entregar_resultados)
+    
+    def encerrar(self):
+        """Aguarda as gravações pendentes e para o worker"""
+        self._encerrado = True
+        self.janela.after_cancel(self._after_id)
+        for futuro in self._pendentes.values():
+            futuro.cancel()
+        if self._executor_isolado is not None:
+            # Tarefas isoladas não gravam nada: não há o que esperar
+            self._executor_isolado.shutdown(wait=False, cancel_futures=True)
+        self._executor.shutdown(wait=True)
+
+
+_FONTES = {}
+
+
+def obter_fonte(size=13, weight="normal"):
+    """Retorna uma instância compartilhada de CTkFont para o tamanho e peso pedidos"""
+    chave = (size, weight)
+    fonte = _FONTES.get(chave)
+    if fonte is None:
+        fonte = _FONTES[chave] = ctk.CTkFont(size=size, weight=weight)
+    return fonte
+
+
+class PoolCards:
+    """Mantém os cards de um container e os reaproveita entre atualizações
+    
+    Em vez de destruir e recriar os widgets a cada refresh, os cards já
+    existentes são reconfigurados com os novos dados; sobras são escondidas
+    com pack_forget e só se criam cards quando a lista cresce.
+    """
+    
+    def __init__(self, container, fabrica, texto_vazio):
+        self.container = container
+        self.fabrica = fabrica
+        self.texto_vazio = texto_vazio
+        self.cards = []
+        self.visiveis = 0
+        self.vazio_label = ctk.CTkLabel(container, text=texto_vazio, font=obter_fonte(size=14))
+        self.vazio_visivel = False
+    
+    def exibir(self, itens):
+        """Exibe um card por item, reaproveitando os cards existentes"""
+        if itens and self.vazio_visivel:
+            self.vazio_label.pack_forget()
+            self.vazio_visivel = False
+        
+        for i, item in enumerate(itens):
+            if i == len(self.cards):
+                self.cards.append(self.fabrica(self.container))
+            card = self.cards[i]
+            card.vincular(item)
+            if i >= self.visiveis:
+                card.pack(**card.OPCOES_PACK)
+        
+        for card in self.cards[len(itens):self.visiveis]:
+            card.pack_forget()
+        self.visiveis = len(itens)
+        
+        if not itens:
+            self.exibir_mensagem(self.texto_vazio)
+    
+    def exibir_mensagem(self, texto):
+        """Esconde os cards e mostra apenas uma mensagem no container"""
+        for card in self.cards[:self.visiveis]:
+            card.pack_forget()
+        self.visiveis = 0
+        
+        self.vazio_label.configure(text=texto)
+        if not self.vazio_visivel:
+            self.vazio_label.pack(pady=50)
+            self.vazio_visivel = True
+
+
+class CardLancamento(ctk.CTkFrame):
+    """Card reutilizável de um lançamento"""
+    
+    OPCOES_PACK = {'padx': 5, 'pady': 5, 'fill': "x"}
+    STATUS_CORES = {'paga': '#28a745', 'nao-paga': '#dc3545', 'parcelada': '#ffc107'}
+    STATUS_TEXTOS = {'paga': '✅ Paga', 'nao-paga': '❌ Não Paga', 'parcelada': '💳 Parcelada'}
+    
+    def __init__(self, master, categorias, ao_pagar, ao_excluir):
+        super().__init__(master, corner_radius=10)
+        self.categorias = categorias
+        self.lancamento_id = None
+        
+        # Linha principal
+        main_frame = ctk.CTkFrame(self, fg_color="transparent")
+        main_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.info_label = ctk.CTkLabel(main_frame, text="", font=obter_fonte(size=12, weight="bold"))
+        self.info_label.pack(side="left", padx=5)
+        
+        self.valor_label = ctk.CTkLabel(main_frame, text="", font=obter_fonte(size=12, weight="bold"))
+        self.valor_label.pack(side="right", padx=5)
+        
+        # Botões de ação
+        btn_frame = ctk.CTkFrame(self, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.pagar_btn = ctk.CTkButton(
+            btn_frame,
+            text="✅ Pagar",
+            command=lambda: ao_pagar(self.lancamento_id),
+            width=80,
+            height=30,
+            fg_color="#28a745"
+        )
+        self.pagar_visivel = False
+        
+        self.excluir_btn = ctk.CTkButton(
+            btn_frame,
+            text="🗑️ Excluir",
+            command=lambda: ao_excluir(self.lancamento_id),
+            width=80,
+            height=30,
+            fg_color="#dc3545"
+        )
+        self.excluir_btn.pack(side="left", padx=2)
+        
+        self.status_label = ctk.CTkLabel(btn_frame, text="", font=obter_fonte(size=10, weight="bold"))
+        self.status_label.pack(side="right", padx=5)
+    
+    def vincular(self, lancamento):
+        """Reconfigura o card com os dados de outro lançamento"""
+        self.lancamento_id = lancamento['id']
+        
+        data_formatada = datetime.strptime(lancamento['data'], '%Y-%m-%d').strftime('%d/%m/%Y')
+        icon = self.categorias.get(lancamento['categoria'], '')
+        
+        info_text = f"{data_formatada} | {icon} {lancamento['descricao']}"
+        if lancamento.get('parcelaAtual'):
+            info_text += f" ({lancamento['parcelaAtual']}/{lancamento['totalParcelas']})"
+        self.info_label.configure(text=info_text)
+        
+        valor = lancamento['entrada'] or lancamento['saida'] or lancamento['investimento']
+        cor = "#28a745" if lancamento['entrada'] > 0 else "#dc3545" if lancamento['saida'] > 0 else "#007bff"
+        self.valor_label.configure(text=formatar_moeda(valor), text_color=cor)
+        
+        # Lançamentos do arquivo frio são só para consulta
+        arquivado = lancamento.get('arquivado', False)
+        self.excluir_btn.configure(state="disabled" if arquivado else "normal")
+        precisa_pagar = lancamento['statusPagamento'] != 'paga' and not arquivado
+        if precisa_pagar and not self.pagar_visivel:
+            self.pagar_btn.pack(side="left", padx=2, before=self.excluir_btn)
+        elif not precisa_pagar and self.pagar_visivel:
+            self.pagar_btn.pack_forget()
+        self.pagar_visivel = precisa_pagar
+        
+        self.status_label.configure(
+            text=self.STATUS_TEXTOS.get(lancamento['statusPagamento'], ''),
+            text_color=self.STATUS_CORES.get(lancamento['statusPagamento'], 'white')
+        )
+
+
+class CardParcelamento(ctk.CTkFrame):
+    """Card reutilizável de um parcelamento"""
+    
+    OPCOES_PACK = {'padx': 5, 'pady': 10, 'fill': "x"}
+    ROTULOS = ("Valor Total", "Parcela", "Parcelas Pagas", "Valor Pago", "Restante")
+    
+    def __init__(self, master, categorias, ao_excluir):
+        super().__init__(master, corner_radius=10, border_width=2, border_color="#17a2b8")
+        self.categorias = categorias
+        self.grupo_id = None
         
-        if os.path.exists(self.arquivo_contas_fixas):
-            try:
-                with open(self.arquivo_contas_fixas, 'r', encoding='utf-8') as f:
-                    self.contasFixas = json.load(f)
-            except:
-                self.contasFixas = []
+        # Cabeçalho
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=10, pady=10)
+        
+        self.titulo_label = ctk.CTkLabel(header, text="", font=obter_fonte(size=16, weight="bold"))
+        self.titulo_label.pack(side="left")
+        
+        ctk.CTkButton(
+            header,
+            text="🗑️ Excluir Tudo",
+            command=lambda: ao_excluir(self.grupo_id),
+            width=100,
+            height=30,
+            fg_color="#dc3545"
+        ).pack(side="right")
+        
+        # Informações
+        info_frame = ctk.CTkFrame(self)
+        info_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.valor_labels = []
+        for i, rotulo in enumerate(self.ROTULOS):
+            frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+            frame.grid(row=i//3, column=i%3, padx=5, pady=5, sticky="ew")
+            
+            ctk.CTkLabel(frame, text=rotulo, font=obter_fonte(size=10)).pack()
+            valor_label = ctk.CTkLabel(frame, text="", font=obter_fonte(size=11, weight="bold"))
+            valor_label.pack()
+            self.valor_labels.append(valor_label)
+        
+        # Progresso
+        self.progresso = ctk.CTkProgressBar(self, progress_color="#28a745")
+        self.progresso.pack(fill="x", padx=10, pady=5)
+        self.percentual_label = ctk.CTkLabel(self, text="", font=obter_fonte(size=10))
+        self.percentual_label.pack(pady=(0, 10))
     
-    def salvar_dados(self):
-        """Salva dados nos arquivos JSON"""
-        with open(self.arquivo_dados, 'w', encoding='utf-8') as f:
-            json.dump(self.lancamentos, f, ensure_ascii=False, indent=2)
+    def vincular(self, parcelamento):
+        """Reconfigura o card com os dados de outro parcelamento"""
+        self.grupo_id = parcelamento['id']
         
-        with open(self.arquivo_contas_fixas, 'w', encoding='utf-8') as f:
-            json.dump(self.contasFixas, f, ensure_ascii=False, indent=2)
+        icon = self.categorias.get(parcelamento['categoria'], '')
+        self.titulo_label.configure(text=f"{icon} {parcelamento['descricao']}")
+        
+        valores = (
+            formatar_moeda(parcelamento['valorTotal']),
+            formatar_moeda(parcelamento['valorParcela']),
+            f"{parcelamento['parcelasPagas']}/{parcelamento['totalParcelas']}",
+            formatar_moeda(parcelamento['valorPago']),
+            formatar_moeda(parcelamento['valorRestante'])
+        )
+        for label, valor in zip(self.valor_labels, valores):
+            label.configure(text=valor)
+        
+        fracao = parcelamento['parcelasPagas'] / parcelamento['totalParcelas']
+        self.progresso.set(fracao)
+        self.percentual_label.configure(text=f"{fracao * 100:.1f}% pago")
+
+
+class CardContaFixa(ctk.CTkFrame):
+    """Card reutilizável de uma conta fixa"""
     
-    def verificar_contas_fixas_do_mes(self):
-        """Gera lançamentos automáticos das contas fixas para o mês atual"""
-        mes_atual = datetime.now().strftime("%Y-%m")
-        arquivo_controle = "ultimo_mes_contas_fixas.txt"
+    OPCOES_PACK = {'padx': 5, 'pady': 5, 'fill': "x"}
+    
+    def __init__(self, master, categorias, ao_excluir):
+        super().__init__(master, corner_radius=10, border_width=2, border_color="#6f42c1")
+        self.categorias = categorias
+        self.conta_id = None
         
-        ultimo_mes = ""
-        if os.path.exists(arquivo_controle):
-            with open(arquivo_controle, 'r') as f:
-                ultimo_mes = f.read().strip()
+        main_frame = ctk.CTkFrame(self, fg_color="transparent")
+        main_frame.pack(fill="x", padx=10, pady=10)
         
-        if ultimo_mes != mes_atual and self.contasFixas:
-            dia_atual = datetime.now().day
-            
-            for conta in self.contasFixas:
-                # Verifica se já existe lançamento desta conta fixa no mês
-                ja_existe = any(
-                    l.get('contaFixaId') == conta['id'] and 
-                    l['data'].startswith(mes_atual)
-                    for l in self.lancamentos
-                )
-                
-                if not ja_existe:
-                    novo_lancamento = {
-                        'id': self._gerar_id(),
-                        'data': f"{mes_atual}-{dia_atual:02d}",
-                        'descricao': conta['descricao'],
-                        'categoria': conta['categoria'],
-                        'entrada': conta.get('entrada', 0),
-                        'saida': conta.get('saida', 0),
-                        'investimento': conta.get('investimento', 0),
-                        'statusPagamento': 'nao-paga',
-                        'desnecessario': False,
-                        'recorrente': False,
-                        'contaFixaId': conta['id']
-                    }
-                    self.lancamentos.append(novo_lancamento)
-            
-            with open(arquivo_controle, 'w') as f:
-                f.write(mes_atual)
-            
-            self.salvar_dados()
+        self.titulo_label = ctk.CTkLabel(main_frame, text="", font=obter_fonte(size=14, weight="bold"))
+        self.titulo_label.pack(side="left")
+        
+        self.valor_label = ctk.CTkLabel(main_frame, text="", font=obter_fonte(size=14, weight="bold"))
+        self.valor_label.pack(side="right", padx=10)
+        
+        ctk.CTkButton(
+            main_frame,
+            text="🗑️ Excluir",
+            command=lambda: ao_excluir(self.conta_id),
+            width=80,
+            height=30,
+            fg_color="#dc3545"
+        ).pack(side="right")
     
-    def _gerar_id(self):
-        """Gera um ID único"""
-        import time
-        return int(time.time() * 1000)
+    def vincular(self, conta):
+        """Reconfigura o card com os dados de outra conta fixa"""
+        self.conta_id = conta['id']
+        
+        icon = self.categorias.get(conta['categoria'], '')
+        self.titulo_label.configure(text=f"{icon} {conta['descricao']} 🔄")
+        
+        valor = conta.get('entrada', 0) or conta.get('saida', 0) or conta.get('investimento', 0)
+        cor = "#28a745" if conta.get('entrada', 0) > 0 else "#dc3545"
+        self.valor_label.configure(text=formatar_moeda(valor), text_color=cor)
+
+
+class CardCategoria(ctk.CTkFrame):
+    """Card reutilizável do total de uma categoria"""
     
-    def adicionar(self, lancamento):
-        """Adiciona um novo lançamento"""
-        lancamento['id'] = self._gerar_id()
+    OPCOES_PACK = {'padx': 5, 'pady': 5, 'fill': "x"}
+    
+    def __init__(self, master):
+        super().__init__(master, corner_radius=8)
         
-        # Se for parcelado, criar as parcelas
-        if lancamento.get('parcelas') and lancamento['parcelas'] >= 2:
-            self.criar_parcelas(lancamento)
-        else:
-            # Se for recorrente (conta fixa)
-            if lancamento.get('recorrente'):
-                conta_fixa = {
-                    'id': self._gerar_id(),
-                    'descricao': lancamento['descricao'],
-                    'categoria': lancamento['categoria'],
-                    'entrada': lancamento.get('entrada', 0),
-                    'saida': lancamento.get('saida', 0),
-                    'investimento': lancamento.get('investimento', 0),
-                    'desnecessario': lancamento.get('desnecessario', False)
-                }
-                self.contasFixas.append(conta_fixa)
-                lancamento['contaFixaId'] = conta_fixa['id']
-            
-            self.lancamentos.append(lancamento)
+        frame = ctk.CTkFrame(self, fg_color="transparent")
+        frame.pack(fill="x", padx=10, pady=10)
         
-        self.salvar_dados()
+        self.nome_label = ctk.CTkLabel(frame, text="", font=obter_fonte(size=12, weight="bold"))
+        self.nome_label.pack(side="left")
+        
+        self.total_label = ctk.CTkLabel(
+            frame,
+            text="",
+            font=obter_fonte(size=12, weight="bold"),
+            text_color="#4a9eff"
+        )
+        self.total_label.pack(side="right")
     
-    def criar_parcelas(self, lancamento_original):
-        """Cria lançamentos parcelados"""
-        data_inicial = datetime.strptime(lancamento_original['data'], '%Y-%m-%d')
-        valor_total = (lancamento_original.get('entrada', 0) or 
-                      lancamento_original.get('saida', 0) or 
-                      lancamento_original.get('investimento', 0))
-        valor_parcela = valor_total / lancamento_original['parcelas']
-        grupo_parcela_id = self._gerar_id()
+    def vincular(self, item):
+        """Reconfigura o card com os dados de outra categoria"""
+        nome, dados = item
+        self.nome_label.configure(text=f"{dados['icon']} {nome}")
+        self.total_label.configure(text=formatar_moeda(dados['total']))
+
+
+class AgendadorAtualizacao:
+    """Agrupa pedidos de atualização do dashboard em um único redesenho
+    
+    Os handlers só marcam quais partes ficaram sujas; o redesenho roda uma vez
+    no próximo idle do Tk, com no máximo uma execução por quadro, não importa
+    quantas alterações cheguem em sequência.
+    """
+    
+    PARTES = (
+        'resumo', 'lancamentos', 'parcelamentos', 'contas_fixas', 'categorias',
+        'orcamentos', 'historico', 'projecao', 'tendencias', 'janelas'
+    )
+    INTERVALO_MINIMO_MS = 16  # Um quadro a 60 fps
+    
+    def __init__(self, janela, atualizar):
+        self.janela = janela
+        self.atualizar = atualizar
+        self.sujas = set()
+        self._agendado = None
+        self._ultima_execucao = 0.0
+    
+    def marcar(self, *partes):
+        """Marca partes como sujas (todas, se nenhuma for informada)"""
+        self.sujas.update(partes or self.PARTES)
+        if self._agendado is not None:
+            return
         
-        for i in range(lancamento_original['parcelas']):
-            data_parcela = data_inicial + timedelta(days=30 * i)
-            
-            parcela = {
-                'id': self._gerar_id() + i,
-                'data': data_parcela.strftime('%Y-%m-%d'),
-                'descricao': lancamento_original['descricao'],
-                'descricaoOriginal': lancamento_original['descricao'],
-                'categoria': lancamento_original['categoria'],
-                'entrada': valor_parcela if lancamento_original.get('entrada', 0) > 0 else 0,
-                'saida': valor_parcela if lancamento_original.get('saida', 0) > 0 else 0,
-                'investimento': valor_parcela if lancamento_original.get('investimento', 0) > 0 else 0,
-                'statusPagamento': 'paga' if i == 0 and lancamento_original.get('statusPagamento') == 'paga' else 'nao-paga',
-                'desnecessario': lancamento_original.get('desnecessario', False),
-                'recorrente': False,
-                'parcelaAtual': i + 1,
-                'totalParcelas': lancamento_original['parcelas'],
-                'grupoParcelaId': grupo_parcela_id
-            }
-            
-            self.lancamentos.append(parcela)
+        espera_ms = self.INTERVALO_MINIMO_MS - (time.perf_counter() - self._ultima_execucao) * 1000
+        if espera_ms > 0:
+            self._agendado = self.janela.after(int(espera_ms) + 1, self._agendar_idle)
+        else:
+            self._agendar_idle()
     
-    def excluir(self, lancamento_id):
-        """Exclui um lançamento"""
-        self.lancamentos = [l for l in self.lancamentos if l['id'] != lancamento_id]
-        self.salvar_dados()
+    def _agendar_idle(self):
+        self._agendado = self.janela.after_idle(self._executar)
     
-    def excluir_grupo_parcelamento(self, grupo_id):
-        """Exclui todas as parcelas de um grupo"""
-        self.lancamentos = [l for l in self.lancamentos if l.get('grupoParcelaId') != grupo_id]
-        self.salvar_dados()
+    def _executar(self):
+        """Dispara um único redesenho com todas as partes acumuladas"""
+        self._agendado = None
+        self._ultima_execucao = time.perf_counter()
+        partes, self.sujas = self.sujas, set()
+        if partes:
+            self.atualizar(partes)
+
+
+class AgendadorManutencao:
+    """Roda tarefas de manutenção no worker quando a interface está ociosa
     
-    def excluir_conta_fixa(self, conta_id):
-        """Exclui uma conta fixa e todos seus lançamentos"""
-        self.contasFixas = [c for c in self.contasFixas if c['id'] != conta_id]
-        self.lancamentos = [l for l in self.lancamentos if l.get('contaFixaId') != conta_id]
-        self.salvar_dados()
+    Cada tarefa é registrada com um intervalo e um orçamento de tempo. A
+    cada verificação, se o usuário não mexe na janela há OCIOSO_MS e o worker
+    não tem nada na fila, a tarefa vencida mais antiga roda uma fatia no
+    worker. Tarefas que são geradores devolvem o controle a cada yield; a
+    fatia termina no primeiro yield depois de esgotado o orçamento e a tarefa
+    continua de onde parou na próxima folga. Assim um pedido da interface
+    espera no máximo um orçamento (mais o passo em andamento). Funções
+    comuns rodam inteiras em uma fatia; as tarefas que gravam arquivos usam
+    _salvar_em_passos, que devolve o controle entre um arquivo e outro.
     
-    def alterar_status_pagamento(self, lancamento_id, novo_status):
-        """Altera o status de pagamento de um lançamento"""
-        for lancamento in self.lancamentos:
-            if lancamento['id'] == lancamento_id:
-                lancamento['statusPagamento'] = novo_status
-                break
-        self.salvar_dados()
+    Uma falha vai para o log a cada vez e é avisada ao usuário na primeira
+    vez de cada tarefa; a tarefa tenta de novo no próximo intervalo.
+    """
     
-    def obter_lancamentos_mes_atual(self):
-        """Retorna apenas lançamentos do mês atual"""
-        mes_atual = datetime.now().strftime("%Y-%m")
-        return [l for l in self.lancamentos if l['data'].startswith(mes_atual)]
+    INTERVALO_VERIFICACAO_MS = 250
+    OCIOSO_MS = 1500
     
-    def obter_parcelamentos(self):
-        """Retorna resumo de todos os parcelamentos"""
-        grupos = {}
+    def __init__(self, janela, trabalhador):
+        self.janela = janela
+        self.trabalhador = trabalhador
+        self.tarefas = []
+        self._executando = None
+        self._ultima_atividade = time.monotonic()
+        self._after_id = None
         
-        for l in self.lancamentos:
-            if l.get('grupoParcelaId'):
-                grupo_id = l['grupoParcelaId']
-                if grupo_id not in grupos:
-                    grupos[grupo_id] = {
-                        'id': grupo_id,
-                        'descricao': l.get('descricaoOriginal', l['descricao'].split(' (')[0]),
-                        'categoria': l['categoria'],
-                        'totalParcelas': l['totalParcelas'],
-                        'valorParcela': l.get('entrada', 0) or l.get('saida', 0) or l.get('investimento', 0),
-                        'tipo': 'entrada' if l.get('entrada', 0) > 0 else 'saida' if l.get('saida', 0) > 0 else 'investimento',
-                        'parcelas': []
-                    }
-                grupos[grupo_id]['parcelas'].append(l)
+        for evento in ('<Any-KeyPress>', '<Any-ButtonPress>', '<Motion>', '<MouseWheel>'):
+            janela.bind_all(evento, self._registrar_atividade, add='+')
+    
+    def registrar(self, nome, funcao, intervalo_s, atraso_s=0, orcamento_ms=30, ao_concluir=None):
+        """Registra uma tarefa que roda a cada `intervalo_s`, a primeira vez após `atraso_s`
         
-        # Calcular estatísticas
-        for grupo in grupos.values():
-            grupo['parcelas'].sort(key=lambda x: x['data'])
-            grupo['parcelasPagas'] = sum(1 for p in grupo['parcelas'] if p['statusPagamento'] == 'paga')
-            grupo['valorTotal'] = grupo['valorParcela'] * grupo['totalParcelas']
-            grupo['valorPago'] = grupo['valorParcela'] * grupo['parcelasPagas']
-            grupo['valorRestante'] = grupo['valorTotal'] - grupo['valorPago']
+        ao_concluir(resultado) roda na thread do Tk quando a tarefa termina.
+        """
+        self.tarefas.append({
+            'nome': nome,
+            'funcao': funcao,
+            'intervalo': intervalo_s,
+            'orcamento': orcamento_ms / 1000,
+            'ao_concluir': ao_concluir,
+            'proxima': time.monotonic() + atraso_s,
+            'gerador': None,
+            'execucoes': 0,
+            'falhas': 0
+        })
+    
+    def iniciar(self):
+        if self._after_id is None:
+            self._after_id = self.janela.after(self.INTERVALO_VERIFICACAO_MS, self._verificar)
+    
+    def encerrar(self):
+        """Para de agendar; uma tarefa pela metade é abandonada entre dois passos"""
+        if self._after_id is not None:
+            self.janela.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def _registrar_atividade(self, _evento=None):
+        self._ultima_atividade = time.monotonic()
+    
+    def _verificar(self):
+        """Despacha uma fatia da tarefa mais atrasada se a interface e o worker estão livres"""
+        self._after_id = self.janela.after(self.INTERVALO_VERIFICACAO_MS, self._verificar)
+        agora = time.monotonic()
+        if self._executando is not None or not self.trabalhador.ocioso:
+            return
+        if (agora - self._ultima_atividade) * 1000 < self.OCIOSO_MS:
+            return
         
-        return list(grupos.values())
+        vencidas = [t for t in self.tarefas if t['proxima'] <= agora]
+        if not vencidas:
+            return
+        tarefa = min(vencidas, key=lambda t: t['proxima'])
+        self._executando = tarefa
+        self.trabalhador.executar(
+            self._executar_fatia, tarefa,
+            ao_concluir=lambda resultado: self._fatia_concluida(tarefa, *resultado),
+            ao_falhar=lambda erro: self._fatia_falhou(tarefa, erro)
+        )
     
-    def calcular_resumo(self):
-        """Calcula o resumo financeiro"""
-        total_entradas = sum(l.get('entrada', 0) for l in self.lancamentos)
-        total_saidas = sum(l.get('saida', 0) for l in self.lancamentos)
-        total_investimentos = sum(l.get('investimento', 0) for l in self.lancamentos)
-        total_desnecessarios = sum(l.get('saida', 0) for l in self.lancamentos if l.get('desnecessario'))
-        total_nao_pagas = sum(1 for l in self.lancamentos if l.get('statusPagamento') == 'nao-paga')
+    @staticmethod
+    def _executar_fatia(tarefa):
+        """Roda no worker até a tarefa acabar ou o orçamento se esgotar: (terminou, resultado)"""
+        prazo = time.perf_counter() + tarefa['orcamento']
+        if tarefa['gerador'] is None:
+            resultado = tarefa['funcao']()
+            if not inspect.isgenerator(resultado):
+                return True, resultado
+            tarefa['gerador'] = resultado
         
-        return {
-            'totalEntradas': total_entradas,
-            'totalSaidas': total_saidas,
-            'totalInvestimentos': total_investimentos,
-            'totalDesnecessarios': total_desnecessarios,
-            'saldoDisponivel': total_entradas - total_saidas - total_investimentos,
-            'patrimonioTotal': total_entradas - total_saidas,
-            'percentualEconomizado': (total_entradas - total_saidas) / total_entradas * 100 if total_entradas > 0 else 0,
-            'maiorGasto': max([l.get('saida', 0) for l in self.lancamentos], default=0),
-            'totalLancamentos': len(self.lancamentos),
-            'totalNaoPagas': total_nao_pagas
+        try:
+            while True:
+                next(tarefa['gerador'])
+                if time.perf_counter() >= prazo:
+                    return False, None
+        except StopIteration as fim:
+            tarefa['gerador'] = None
+            return True, fim.value
+    
+    def _fatia_concluida(self, tarefa, terminou, resultado):
+        self._executando = None
+        if not terminou:
+            return  # continua na próxima folga
+        tarefa['execucoes'] += 1
+        tarefa['proxima'] = time.monotonic() + tarefa['intervalo']
+        if tarefa['ao_concluir']:
+            tarefa['ao_concluir'](resultado)
+    
+    def _fatia_falhou(self, tarefa, erro):
+        self._executando = None
+        tarefa['gerador'] = None
+        tarefa['proxima'] = time.monotonic() + tarefa['intervalo']
+        tarefa['falhas'] += 1
+        logging.getLogger(__name__).error(
+            "Tarefa de manutenção '%s' falhou", tarefa['nome'], exc_info=(type(erro), erro, erro.__traceback__)
+        )
+        if tarefa['falhas'] == 1:
+            messagebox.showwarning(
+                "Manutenção", f"A tarefa de manutenção '{tarefa['nome']}' falhou e será tentada de novo:\n{erro}"
+            )
+
+
+def listar_widgets(janela):
+    """Todos os widgets Tk descendentes de uma janela"""
+    widgets = []
+    pendentes = [janela]
+    while pendentes:
+        filhos = pendentes.pop().winfo_children()
+        widgets.extend(filhos)
+        pendentes.extend(filhos)
+    return widgets
+
+
+class PerfiladorInterface:
+    """Mede o custo de cada redesenho do dashboard (modo de depuração)
+    
+    Cronometra as seções da atualização, conta os widgets Tk vivos e quantos
+    foram criados/destruídos desde o último relatório, e usa um "batimento"
+    periódico no loop do Tk para detectar travamentos. As seções de um mesmo
+    ciclo (o painel e os gráficos chegam do worker em momentos diferentes)
+    são agrupadas em uma linha de relatório, impressa no terminal ou gravada
+    como JSON por linha em um arquivo.
+    
+    Inativo, secao() devolve um contexto vazio e nada mais roda.
+    """
+    
+    INTERVALO_BATIMENTO_MS = 50
+    LIMITE_TRAVAMENTO_MS = 50  # Atraso do batimento a partir do qual conta como travamento
+    AGRUPAMENTO_MS = 250  # Janela em que as seções entram no mesmo relatório
+    
+    def __init__(self, janela, arquivo=None, ativo=False):
+        self.janela = janela
+        self.arquivo = arquivo
+        self.ativo = ativo
+        self.secoes = {}
+        self.travamentos = []
+        self._relatorio_agendado = False
+        self._widgets = set()
+        self._esperado = 0.0
+        
+        if ativo:
+            self._widgets = self._listar_widgets()
+            self._agendar_batimento()
+    
+    def secao(self, nome):
+        """Contexto que cronometra uma seção do redesenho"""
+        if not self.ativo:
+            return contextlib.nullcontext()
+        return self._cronometrar(nome)
+    
+    @contextlib.contextmanager
+    def _cronometrar(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.secoes[nome] = self.secoes.get(nome, 0.0) + (time.perf_counter() - inicio) * 1000
+            if not self._relatorio_agendado:
+                self._relatorio_agendado = True
+                self.janela.after(self.AGRUPAMENTO_MS, self._relatar)
+    
+    def _listar_widgets(self):
+        """Nomes de todos os widgets Tk vivos da janela"""
+        return {str(widget) for widget in listar_widgets(self.janela)}
+    
+    def _agendar_batimento(self):
+        self._esperado = time.perf_counter() + self.INTERVALO_BATIMENTO_MS / 1000
+        self.janela.after(self.INTERVALO_BATIMENTO_MS, self._batimento)
+    
+    def _batimento(self):
+        """Registra quanto o loop do Tk atrasou para atender o batimento"""
+        atraso = (time.perf_counter() - self._esperado) * 1000
+        if atraso >= self.LIMITE_TRAVAMENTO_MS:
+            self.travamentos.append(atraso)
+        self._agendar_batimento()
+    
+    def _relatar(self):
+        """Emite o relatório do ciclo de redesenho e zera os contadores"""
+        self._relatorio_agendado = False
+        widgets = self._listar_widgets()
+        relatorio = {
+            'data': datetime.now().isoformat(timespec='milliseconds'),
+            'secoesMs': {nome: round(ms, 2) for nome, ms in self.secoes.items()},
+            'totalMs': round(sum(self.secoes.values()), 2),
+            'widgetsVivos': len(widgets),
+            'widgetsCriados': len(widgets - self._widgets),
+            'widgetsDestruidos': len(self._widgets - widgets),
+            'travamentos': len(self.travamentos),
+            'maiorTravamentoMs': round(max(self.travamentos, default=0.0), 1)
         }
+        self._widgets = widgets
+        self.secoes = {}
+        self.travamentos = []
+        
+        if self.arquivo:
+            with open(self.arquivo, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(relatorio, ensure_ascii=False) + "\n")
+        else:
+            secoes = " | ".join(f"{nome} {ms:.1f}ms" for nome, ms in relatorio['secoesMs'].items())
+            churn = f"+{relatorio['widgetsCriados']}/-{relatorio['widgetsDestruidos']}"
+            print(
+                f"[perfil] {secoes} | total {relatorio['totalMs']:.1f}ms"
+                f" | widgets {relatorio['widgetsVivos']} ({churn})"
+                f" | travamentos {relatorio['travamentos']} (maior {relatorio['maiorTravamentoMs']:.0f}ms)",
+                flush=True
+            )
+
+
+def tamanho_profundo(objeto, vistos=None):
+    """Soma o sys.getsizeof de um objeto e de tudo o que ele contém
     
-    def calcular_por_categoria(self):
-        """Calcula totais por categoria"""
-        resultado = {}
-        total_saidas = sum(l.get('saida', 0) for l in self.lancamentos)
+    Desce por dicts, listas, tuplas, sets e deques; outros objetos (widgets, fontes,
+    artistas do matplotlib) entram só com o próprio tamanho, para que medir
+    uma estrutura não acabe medindo o aplicativo inteiro. Arrays numpy que
+    são donos dos seus dados já incluem o buffer no getsizeof. Passe o mesmo
+    `vistos` entre chamadas para não contar duas vezes o que é compartilhado.
+    """
+    vistos = set() if vistos is None else vistos
+    total = 0
+    pendentes = [objeto]
+    while pendentes:
+        atual = pendentes.pop()
+        if id(atual) in vistos:
+            continue
+        vistos.add(id(atual))
+        total += sys.getsizeof(atual)
+        if isinstance(atual, dict):
+            pendentes.extend(atual.keys())
+            pendentes.extend(atual.values())
+        elif isinstance(atual, (list, tuple, set, frozenset, deque)):
+            pendentes.extend(atual)
+    return total
+
+
+class PerfiladorMemoria:
+    """Contabiliza a memória por estrutura em momentos-chave (modo --profile-memory)
+    
+    Tira fotografias no início, depois do carregamento e depois de N
+    redesenhos forçados do dashboard. Cada uma traz o total do tracemalloc,
+    as linhas de código que mais cresceram desde a anterior e o tamanho de
+    cada estrutura do motor (lancamentos, contasFixas, índices, caches), dos
+    widgets Tk e das figuras do matplotlib. Figuras, canvases ou artistas
+    que só aumentam entre fotografias indicam vazamento.
+    """
+    
+    INTERVALO_ATUALIZACAO_MS = 300
+    ESPERA_FINAL_MS = 1000  # Deixa os gráficos e o histórico chegarem do worker
+    ARQUIVO = "perfil_memoria.json"
+    
+    def __init__(self, janela, atualizacoes=0):
+        self.janela = janela
+        self.atualizacoes = atualizacoes
+        self.ativo = atualizacoes > 0
+        self.fotografias = []
+        self._anterior = None
+        if self.ativo:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.fotografar('inicio')
+    
+    def carregado(self):
+        """Chamado quando os dados terminam de carregar: fotografa e começa os redesenhos"""
+        if not self.ativo:
+            return
+        self.fotografar('carregado')
+        self._atualizar(self.atualizacoes)
+    
+    def _atualizar(self, restantes):
+        if restantes == 0:
+            self.janela.after(self.ESPERA_FINAL_MS, self._concluir)
+            return
+        self.janela.agendador.marcar()
+        self.janela.after(self.INTERVALO_ATUALIZACAO_MS, self._atualizar, restantes - 1)
+    
+    def _concluir(self):
+        self.fotografar(f'apos_{self.atualizacoes}_atualizacoes')
+        with open(self.ARQUIVO, 'w', encoding='utf-8') as f:
+            json.dump(self.fotografias, f, ensure_ascii=False, indent=2)
+        print(f"[memória] relatório salvo em {os.path.abspath(self.ARQUIVO)}", flush=True)
+    
+    def _estruturas(self):
+        """Tamanho (bytes) das estruturas do motor e da interface"""
+        controle = self.janela.controle
+        estruturas = {
+            'lancamentos': controle.lancamentos,
+            'contasFixas': controle.contasFixas,
+            'planosParcelamento': controle.planosParcelamento,
+            'indices': (controle._por_id, controle._chaves_historico, controle._regra_da_ocorrencia, controle._indices),
+            'categorizador': controle.categorizador.para_dict(),
+            'arquivo': (controle._arquivo, controle._cache_arquivo),
+            'caches': (
+                controle._rollups, controle._contagem_mes, controle._cache_serie_diaria, controle._gasto_mes,
+                controle._janelas.baldes, controle._janelas.totais
+            )
+        }
+        tamanhos = {nome: tamanho_profundo(valor) for nome, valor in estruturas.items()}
         
-        for nome_cat, icon in self.categorias.items():
-            total = sum(l.get('saida', 0) for l in self.lancamentos if l.get('categoria') == nome_cat)
-            count = sum(1 for l in self.lancamentos if l.get('categoria') == nome_cat)
-            percent = (total / total_saidas * 100) if total_saidas > 0 else 0
-            
-            resultado[nome_cat] = {
-                'icon': icon,
-                'total': total,
-                'percent': percent,
-                'count': count
-            }
+        widgets = listar_widgets(self.janela)
+        vistos = set()
+        tamanhos['widgetsTk'] = sum(
+            sys.getsizeof(w) + tamanho_profundo(vars(w), vistos) for w in widgets
+        )
         
-        return resultado
+        contagens = {'lancamentos': len(controle.lancamentos), 'widgetsTk': len(widgets)}
+        contagens.update(figuras=0, canvases=0, artistas=0)
+        for objeto in gc.get_objects():
+            if isinstance(objeto, Figure):
+                contagens['figuras'] += 1
+            elif isinstance(objeto, FigureCanvasTkAgg):
+                contagens['canvases'] += 1
+            if isinstance(objeto, Artist):
+                contagens['artistas'] += 1
+        return tamanhos, contagens
+    
+    def fotografar(self, rotulo):
+        """Registra uma fotografia da memória com o rótulo informado"""
+        atual, pico = tracemalloc.get_traced_memory()
+        fotografia = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if self._anterior is None:
+            maiores = fotografia.statistics('lineno')[:10]
+        else:
+            maiores = fotografia.compare_to(self._anterior, 'lineno')[:10]
+        self._anterior = fotografia
+        
+        tamanhos, contagens = self._estruturas() if hasattr(self.janela, 'controle') else ({}, {})
+        self.fotografias.append({
+            'rotulo': rotulo,
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'tracemallocAtualBytes': atual,
+            'tracemallocPicoBytes': pico,
+            'estruturasBytes': tamanhos,
+            'contagens': contagens,
+            'maioresAlocacoes': [
+                {
+                    'local': str(estatistica.traceback[0]),
+                    'bytes': estatistica.size,
+                    'diferencaBytes': getattr(estatistica, 'size_diff', estatistica.size)
+                }
+                for estatistica in maiores
+            ]
+        })
+        
+        print(
+            f"[memória] {rotulo}: {atual / 1e6:.1f} MB rastreados"
+            + "".join(f" | {nome} {valor / 1e6:.2f} MB" for nome, valor in tamanhos.items()),
+            flush=True
+        )
+
+
+class CardOrcamento(ctk.CTkFrame):
+    """Card reutilizável com o consumo do orçamento de uma categoria"""
+    
+    OPCOES_PACK = {'padx': 10, 'pady': 3, 'fill': "x"}
+    CORES_NIVEL = {0: '#28a745', 80: '#ffc107', 100: '#dc3545'}
+    
+    def __init__(self, master):
+        super().__init__(master, fg_color="transparent")
+        
+        linha = ctk.CTkFrame(self, fg_color="transparent")
+        linha.pack(fill="x")
+        
+        self.nome_label = ctk.CTkLabel(linha, text="", font=obter_fonte(size=11))
+        self.nome_label.pack(side="left")
+        
+        self.valor_label = ctk.CTkLabel(linha, text="", font=obter_fonte(size=11, weight="bold"))
+        self.valor_label.pack(side="right")
+        
+        self.progresso = ctk.CTkProgressBar(self, height=8)
+        self.progresso.pack(fill="x", pady=(0, 3))
+    
+    def vincular(self, item):
+        """Reconfigura o card com o orçamento de outra categoria"""
+        nome, dados = item
+        self.nome_label.configure(text=f"{dados['icon']} {nome}")
+        self.valor_label.configure(
+            text=f"{formatar_moeda(dados['gasto'])} / {formatar_moeda(dados['limite'])}",
+            text_color=self.CORES_NIVEL[dados['nivel']]
+        )
+        self.progresso.configure(progress_color=self.CORES_NIVEL[dados['nivel']])
+        self.progresso.set(min(dados['percentual'] / 100, 1))
 
 
 class ControleFinanceiroApp(ctk.CTk):
     """Interface gráfica do aplicativo"""
     
-    def __init__(self):
+    TAMANHO_PAGINA_HISTORICO = 50
+    
+    def __init__(self, perfil=None, perfil_interface=None, perfil_memoria=0, arquivamento_automatico=False):
+        """perfil: nome do perfil em perfis/ (None usa os arquivos da pasta atual)
+        perfil_interface: None (desligado), '-' (relatório no terminal) ou um arquivo JSONL
+        perfil_memoria: quantos redesenhos forçar antes da última fotografia de memória (0 desliga)
+        arquivamento_automatico: arquiva os anos antigos nas folgas (lançamentos arquivados ficam
+        só para leitura); desligado, o arquivo frio só muda com --arquivar-ate
+        """
         super().__init__()
         
-        self.controle = ControleFinanceiro()
+        self.perfil_nome = perfil
+        self.arquivamento_automatico = arquivamento_automatico
+        self.controle = ControleFinanceiro(carregar=False, diretorio=diretorio_perfil(perfil) if perfil else ".")
+        self.trabalhador = TrabalhadorSegundoPlano(self)
+        self.agendador = AgendadorAtualizacao(self, self.atualizar_partes)
+        self.manutencao = AgendadorManutencao(self, self.trabalhador)
+        self._partes_pendentes = set()
         
         # Configurações da janela
-        self.title("💰 Controle Financeiro Profissional")
+        self.title("💰 Controle Financeiro Profissional" + (f" — {perfil}" if perfil else ""))
         self.geometry("1600x950")
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
         
-        # Criar interface
+        # Criar interface e carregar os dados em segundo plano
         self.criar_interface()
-        self.atualizar_dashboard()
+        self.perfil = PerfiladorInterface(
+            self,
+            arquivo=None if perfil_interface in (None, '-') else os.path.abspath(perfil_interface),
+            ativo=perfil_interface is not None
+        )
+        self.perfil_memoria = PerfiladorMemoria(self, atualizacoes=perfil_memoria)
+        self.exibir_carregando()
+        self.iniciar_carregamento()
+    
+    def exibir_carregando(self):
+        """Mostra placeholders enquanto os dados ainda não foram carregados"""
+        for label in self.resumo_labels.values():
+            label.configure(text="⏳ ...")
+        for label in self.stats_labels.values():
+            label.configure(text="...")
+        self.status_label.configure(text="⏳ Carregando dados...", text_color="gray")
+        
+        for pool in (self.pool_lancamentos, self.pool_parcelamentos, self.pool_contas_fixas,
+                     self.pool_historico, self.pool_categorias, self.pool_orcamentos):
+            pool.exibir_mensagem("⏳ Carregando...")
+    
+    def iniciar_carregamento(self):
+        """Carrega os dados no worker em etapas, preenchendo a tela aos poucos
+        
+        Primeiro lê os arquivos e entrega o resumo e o mês atual; depois gera
+        as contas fixas do mês e libera os demais painéis.
+        """
+        def carregar():
+            self.controle.carregar_dados()
+            return self.controle.calcular_painel({'resumo', 'lancamentos'})
+        
+        def completar():
+            self.controle.verificar_contas_fixas_do_mes()
+        
+        self.trabalhador.executar(carregar, ao_concluir=self.aplicar_painel)
+        def concluir(_):
+            self.atualizar_dashboard()
+            self.perfil_memoria.carregado()
+            self.iniciar_manutencao()
+        
+        self.trabalhador.executar(completar, ao_concluir=concluir)
+    
+    def iniciar_manutencao(self):
+        """Registra as tarefas que rodam nas folgas da interface, depois do carregamento"""
+        controle = self.controle
+        self.manutencao.registrar(
+            'contas_fixas', controle.verificar_contas_fixas_do_mes, intervalo_s=60, atraso_s=60,
+            ao_concluir=lambda gerou: gerou and self.agendador.marcar()
+        )
+        self.manutencao.registrar('rollups', controle.atualizar_rollups, intervalo_s=600, atraso_s=5)
+        self.manutencao.registrar(
+            'caches', controle.aquecer_caches, intervalo_s=300, atraso_s=10,
+            ao_concluir=lambda _: self.agendador.marcar('janelas')
+        )
+        self.manutencao.registrar('compactacao', controle.compactar_ocorrencias, intervalo_s=3600, atraso_s=300)
+        self.manutencao.registrar('cache', controle.gravar_cache, intervalo_s=120, atraso_s=60)
+        if self.arquivamento_automatico:
+            self.manutencao.registrar(
+                'arquivo_frio', controle.arquivar_anos_antigos, intervalo_s=86400, atraso_s=120,
+                ao_concluir=lambda arquivados: arquivados and self.agendador.marcar('historico', 'tendencias')
+            )
+        self.manutencao.iniciar()
+    
+    def fechar(self):
+        """Espera as gravações em andamento antes de fechar a janela"""
+        self.manutencao.encerrar()
+        # Na fila do worker, depois das gravações pendentes; encerrar() espera por ela
+        self.trabalhador.executar(self.controle.gravar_cache)
+        self.trabalhador.encerrar()
+        self.destroy()
     
     def criar_interface(self):
         """Cria a interface completa do aplicativo"""
@@ -290,7 +3192,7 @@ class ControleFinanceiroApp(ctk.CTk):
         title_label = ctk.CTkLabel(
             header_frame,
             text="💰 CONTROLE FINANCEIRO PROFISSIONAL",
-            font=ctk.CTkFont(size=28, weight="bold"),
+            font=obter_fonte(size=28, weight="bold"),
             text_color="white"
         )
         title_label.pack(pady=15)
@@ -298,11 +3200,25 @@ class ControleFinanceiroApp(ctk.CTk):
         subtitle_label = ctk.CTkLabel(
             header_frame,
             text="Gerencie suas finanças de forma inteligente e visual",
-            font=ctk.CTkFont(size=14),
+            font=obter_fonte(size=14),
             text_color="#B0C4DE"
         )
         subtitle_label.pack(pady=(0, 15))
         
+        ctk.CTkButton(
+            header_frame,
+            text="🏘️ Consolidar perfis",
+            command=self.abrir_consolidado,
+            width=160
+        ).place(relx=1.0, rely=0.5, x=-20, anchor="e")
+        
+        ctk.CTkButton(
+            header_frame,
+            text="🏦 Conciliar extrato",
+            command=self.abrir_conciliacao,
+            width=160
+        ).place(relx=0.0, rely=0.5, x=20, anchor="w")
+        
         # ===== PAINEL ESQUERDO =====
         left_panel = ctk.CTkScrollableFrame(self, corner_radius=10)
         left_panel.grid(row=1, column=0, padx=(10, 5), pady=10, sticky="nsew")
@@ -315,6 +3231,8 @@ class ControleFinanceiroApp(ctk.CTk):
         right_panel.grid(row=1, column=1, padx=(5, 10), pady=10, sticky="nsew")
         
         self.criar_resumo(right_panel)
+        self.criar_projecao(right_panel)
+        self.criar_tendencias(right_panel)
         self.criar_categorias(right_panel)
     
     def criar_formulario(self, parent):
@@ -325,7 +3243,7 @@ class ControleFinanceiroApp(ctk.CTk):
         form_title = ctk.CTkLabel(
             form_frame,
             text="📝 Novo Lançamento",
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=obter_fonte(size=18, weight="bold")
         )
         form_title.grid(row=0, column=0, columnspan=4, padx=10, pady=10, sticky="w")
         
@@ -338,12 +3256,19 @@ class ControleFinanceiroApp(ctk.CTk):
         ctk.CTkLabel(form_frame, text="Descrição:").grid(row=1, column=1, padx=10, pady=5, sticky="w")
         self.descricao_entry = ctk.CTkEntry(form_frame, width=200)
         self.descricao_entry.grid(row=2, column=1, padx=10, pady=5)
+        self.descricao_entry.bind("<KeyRelease>", lambda _: self.sugerir_categoria())
         
         ctk.CTkLabel(form_frame, text="Categoria:").grid(row=1, column=2, padx=10, pady=5, sticky="w")
         categorias_nomes = [f"{v} {k}" for k, v in self.controle.categorias.items()]
-        self.categoria_combo = ctk.CTkComboBox(form_frame, values=categorias_nomes, width=180)
+        self.categoria_combo = ctk.CTkComboBox(
+            form_frame, values=categorias_nomes, width=180,
+            command=lambda _: self._escolhas_manuais.add('categoria')
+        )
         self.categoria_combo.grid(row=2, column=2, padx=10, pady=5)
         
+        # Campos que o usuário escolheu à mão não são sobrescritos pela sugestão
+        self._escolhas_manuais = set()
+        
         ctk.CTkLabel(form_frame, text="Status Pagamento:").grid(row=1, column=3, padx=10, pady=5, sticky="w")
         self.status_combo = ctk.CTkComboBox(
             form_frame,
@@ -374,7 +3299,8 @@ class ControleFinanceiroApp(ctk.CTk):
         desnecessario_check = ctk.CTkCheckBox(
             form_frame,
             text="⚠️ Gasto Desnecessário",
-            variable=self.desnecessario_var
+            variable=self.desnecessario_var,
+            command=lambda: self._escolhas_manuais.add('desnecessario')
         )
         desnecessario_check.grid(row=5, column=0, columnspan=2, padx=10, pady=10, sticky="w")
         
@@ -391,12 +3317,23 @@ class ControleFinanceiroApp(ctk.CTk):
             form_frame,
             text="➕ Adicionar Lançamento",
             command=self.adicionar_lancamento,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=obter_fonte(size=14, weight="bold"),
             height=40,
             fg_color=("#2C5F8D", "#1a3a52")
         )
         add_button.grid(row=6, column=0, columnspan=4, padx=10, pady=10, sticky="ew")
     
+    def sugerir_categoria(self):
+        """Preenche categoria e desnecessário com a sugestão para a descrição digitada"""
+        sugestao = self.controle.sugerir_categoria(self.descricao_entry.get())
+        if sugestao is None:
+            return
+        icone = self.controle.categorias.get(sugestao['categoria'])
+        if icone and 'categoria' not in self._escolhas_manuais:
+            self.categoria_combo.set(f"{icone} {sugestao['categoria']}")
+        if 'desnecessario' not in self._escolhas_manuais:
+            self.desnecessario_var.set(sugestao['desnecessario'])
+    
     def criar_abas_tabelas(self, parent):
         """Cria as abas com tabelas"""
         tabs_frame = ctk.CTkFrame(parent, corner_radius=10)
@@ -410,11 +3347,13 @@ class ControleFinanceiroApp(ctk.CTk):
         self.tabview.add("📊 Lançamentos do Mês")
         self.tabview.add("💳 Parcelamentos")
         self.tabview.add("🔄 Contas Fixas")
+        self.tabview.add("📜 Histórico")
         
         # Conteúdo das abas será criado dinamicamente
         self.criar_tab_lancamentos()
         self.criar_tab_parcelamentos()
         self.criar_tab_contas_fixas()
+        self.criar_tab_historico()
     
     def criar_tab_lancamentos(self):
         """Cria conteúdo da aba de lançamentos"""
@@ -423,6 +3362,10 @@ class ControleFinanceiroApp(ctk.CTk):
         # Frame para a lista
         self.lancamentos_frame = ctk.CTkScrollableFrame(tab, height=400)
         self.lancamentos_frame.pack(padx=10, pady=10, fill="both", expand=True)
+        
+        self.pool_lancamentos = PoolCards(
+            self.lancamentos_frame, self.criar_card_lancamento, "📭 Nenhum lançamento neste mês"
+        )
     
     def criar_tab_parcelamentos(self):
         """Cria conteúdo da aba de parcelamentos"""
@@ -430,6 +3373,12 @@ class ControleFinanceiroApp(ctk.CTk):
         
         self.parcelamentos_frame = ctk.CTkScrollableFrame(tab, height=400)
         self.parcelamentos_frame.pack(padx=10, pady=10, fill="both", expand=True)
+        
+        self.pool_parcelamentos = PoolCards(
+            self.parcelamentos_frame,
+            lambda master: CardParcelamento(master, self.controle.categorias, self.excluir_parcelamento),
+            "💳 Nenhum parcelamento ativo"
+        )
     
     def criar_tab_contas_fixas(self):
         """Cria conteúdo da aba de contas fixas"""
@@ -437,6 +3386,129 @@ class ControleFinanceiroApp(ctk.CTk):
         
         self.contas_fixas_frame = ctk.CTkScrollableFrame(tab, height=400)
         self.contas_fixas_frame.pack(padx=10, pady=10, fill="both", expand=True)
+        
+        self.pool_contas_fixas = PoolCards(
+            self.contas_fixas_frame,
+            lambda master: CardContaFixa(master, self.controle.categorias, self.excluir_conta_fixa),
+            "🔄 Nenhuma conta fixa cadastrada"
+        )
+    
+    def criar_tab_historico(self):
+        """Cria conteúdo da aba de histórico completo, paginado"""
+        tab = self.tabview.tab("📜 Histórico")
+        
+        nav_frame = ctk.CTkFrame(tab, fg_color="transparent")
+        nav_frame.pack(fill="x", padx=10, pady=(10, 0))
+        
+        self.historico_anterior_btn = ctk.CTkButton(
+            nav_frame,
+            text="◀ Mais recentes",
+            command=lambda: self.carregar_pagina_historico('anterior'),
+            width=130,
+            height=30
+        )
+        self.historico_anterior_btn.pack(side="left")
+        
+        self.historico_proxima_btn = ctk.CTkButton(
+            nav_frame,
+            text="Mais antigos ▶",
+            command=lambda: self.carregar_pagina_historico('proxima'),
+            width=130,
+            height=30
+        )
+        self.historico_proxima_btn.pack(side="right")
+        
+        self.historico_busca_entry = ctk.CTkEntry(
+            nav_frame, width=200, placeholder_text="🔍 Buscar na descrição"
+        )
+        self.historico_busca_entry.pack(side="right", padx=10)
+        self.historico_busca_entry.bind("<Return>", lambda _: self.buscar_historico())
+        
+        self.historico_info_label = ctk.CTkLabel(nav_frame, text="", font=obter_fonte(size=11))
+        self.historico_info_label.pack(side="left", expand=True)
+        
+        self.historico_frame = ctk.CTkScrollableFrame(tab, height=400)
+        self.historico_frame.pack(padx=10, pady=10, fill="both", expand=True)
+        
+        self.pool_historico = PoolCards(
+            self.historico_frame, self.criar_card_lancamento, "📭 Nenhum lançamento registrado"
+        )
+        
+        # Página exibida: cursor e direção que a produziram, e suas pontas
+        self.historico_requisicao = (None, 'proxima')
+        self.historico_pagina = None
+        self.historico_busca = ""
+    
+    def buscar_historico(self):
+        """Filtra o histórico pelo texto digitado (vazio volta à paginação)"""
+        self.historico_busca = self.historico_busca_entry.get().strip()
+        self.historico_requisicao = (None, 'proxima')
+        self.historico_pagina = None
+        self.carregar_pagina_historico()
+    
+    def carregar_pagina_historico(self, direcao=None):
+        """Busca no worker a página seguinte/anterior do histórico, ou recarrega a atual"""
+        if self.historico_busca:
+            texto = self.historico_busca
+            self.trabalhador.executar(
+                lambda: list(self.controle.consultar(
+                    texto=texto, limite=self.TAMANHO_PAGINA_HISTORICO, incluir_arquivo=True
+                )),
+                chave='historico',
+                ao_concluir=lambda encontrados: self.exibir_busca_historico(encontrados, texto)
+            )
+            return
+        
+        if direcao is None:
+            cursor, direcao = self.historico_requisicao
+        elif self.historico_pagina is None:
+            cursor = None
+        elif direcao == 'proxima':
+            cursor = self.historico_pagina['cursorFim']
+        else:
+            cursor = self.historico_pagina['cursorInicio']
+        
+        self.trabalhador.executar(
+            self.controle.obter_pagina_historico, cursor, self.TAMANHO_PAGINA_HISTORICO, direcao,
+            chave='historico',
+            ao_concluir=lambda pagina: self.exibir_pagina_historico(pagina, (cursor, direcao))
+        )
+    
+    def exibir_pagina_historico(self, pagina, requisicao):
+        """Desenha uma página do histórico"""
+        if not pagina['lancamentos'] and requisicao[0] is not None:
+            # A página ficou vazia (ex.: exclusões): volta para a mais recente
+            self.historico_requisicao = (None, 'proxima')
+            self.carregar_pagina_historico()
+            return
+        
+        self.historico_requisicao = requisicao
+        self.historico_pagina = pagina
+        
+        with self.perfil.secao('historico'):
+            self.pool_historico.exibir(pagina['lancamentos'])
+        
+        self.historico_anterior_btn.configure(state="normal" if pagina['temAnterior'] else "disabled")
+        self.historico_proxima_btn.configure(state="normal" if pagina['temProxima'] else "disabled")
+        self.historico_info_label.configure(text=f"{pagina['total']} lançamentos no histórico")
+    
+    def exibir_busca_historico(self, encontrados, texto):
+        """Desenha os resultados da busca no histórico (os mais recentes primeiro)"""
+        if texto != self.historico_busca:
+            return  # a busca mudou enquanto esta rodava
+        
+        with self.perfil.secao('historico'):
+            if encontrados:
+                self.pool_historico.exibir(encontrados)
+            else:
+                self.pool_historico.exibir_mensagem(f"🔍 Nada encontrado para \"{texto}\"")
+        
+        self.historico_anterior_btn.configure(state="disabled")
+        self.historico_proxima_btn.configure(state="disabled")
+        limite = self.TAMANHO_PAGINA_HISTORICO
+        self.historico_info_label.configure(
+            text=f"{len(encontrados)} resultados" if len(encontrados) < limite else f"{limite} resultados mais recentes"
+        )
     
     def criar_resumo(self, parent):
         """Cria o resumo financeiro"""
@@ -446,7 +3518,7 @@ class ControleFinanceiroApp(ctk.CTk):
         resumo_title = ctk.CTkLabel(
             resumo_frame,
             text="💼 Resumo Financeiro",
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=obter_fonte(size=18, weight="bold")
         )
         resumo_title.pack(padx=10, pady=10)
         
@@ -468,14 +3540,14 @@ class ControleFinanceiroApp(ctk.CTk):
             ctk.CTkLabel(
                 card,
                 text=label,
-                font=ctk.CTkFont(size=12, weight="bold"),
+                font=obter_fonte(size=12, weight="bold"),
                 text_color="white"
             ).pack(padx=10, pady=(8, 2))
             
             value_label = ctk.CTkLabel(
                 card,
                 text="R$ 0,00",
-                font=ctk.CTkFont(size=16, weight="bold"),
+                font=obter_fonte(size=16, weight="bold"),
                 text_color="white"
             )
             value_label.pack(padx=10, pady=(2, 8))
@@ -486,7 +3558,7 @@ class ControleFinanceiroApp(ctk.CTk):
         self.status_label = ctk.CTkLabel(
             resumo_frame,
             text="✅ POSITIVO",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=obter_fonte(size=16, weight="bold"),
             text_color="#28a745"
         )
         self.status_label.pack(pady=10)
@@ -510,17 +3582,211 @@ class ControleFinanceiroApp(ctk.CTk):
             ctk.CTkLabel(
                 frame,
                 text=label,
-                font=ctk.CTkFont(size=11)
+                font=obter_fonte(size=11)
             ).pack(side="left")
             
             value = ctk.CTkLabel(
                 frame,
                 text="-",
-                font=ctk.CTkFont(size=11, weight="bold")
+                font=obter_fonte(size=11, weight="bold")
             )
             value.pack(side="right")
             
             self.stats_labels[key] = value
+        
+        # Ritmo de gastos
+        janelas_frame = ctk.CTkFrame(resumo_frame)
+        janelas_frame.pack(padx=10, pady=10, fill="x")
+        
+        ctk.CTkLabel(
+            janelas_frame,
+            text="⏱️ Ritmo de Gastos",
+            font=obter_fonte(size=14, weight="bold")
+        ).pack(padx=10, pady=(10, 5))
+        
+        self.janelas_labels = {}
+        for janela in JanelasGastos.JANELAS:
+            frame = ctk.CTkFrame(janelas_frame, fg_color="transparent")
+            frame.pack(padx=10, pady=2, fill="x")
+            
+            ctk.CTkLabel(frame, text=f"Últimos {janela} dias", font=obter_fonte(size=11)).pack(side="left")
+            value = ctk.CTkLabel(frame, text="-", font=obter_fonte(size=11, weight="bold"))
+            value.pack(side="right")
+            self.janelas_labels[janela] = value
+        
+        # Orçamentos
+        orcamentos_frame = ctk.CTkFrame(resumo_frame)
+        orcamentos_frame.pack(padx=10, pady=10, fill="x")
+        
+        ctk.CTkLabel(
+            orcamentos_frame,
+            text="🎯 Orçamentos do Mês",
+            font=obter_fonte(size=14, weight="bold")
+        ).pack(padx=10, pady=(10, 5))
+        
+        form = ctk.CTkFrame(orcamentos_frame, fg_color="transparent")
+        form.pack(padx=10, pady=5, fill="x")
+        
+        self.orcamento_categoria_combo = ctk.CTkComboBox(
+            form,
+            values=[f"{v} {k}" for k, v in self.controle.categorias.items()],
+            width=150
+        )
+        self.orcamento_categoria_combo.pack(side="left")
+        
+        self.orcamento_limite_entry = ctk.CTkEntry(form, width=80, placeholder_text="Limite")
+        self.orcamento_limite_entry.pack(side="left", padx=5)
+        
+        ctk.CTkButton(
+            form,
+            text="Definir",
+            command=self.definir_orcamento,
+            width=60
+        ).pack(side="left")
+        
+        self.pool_orcamentos = PoolCards(orcamentos_frame, CardOrcamento, "Nenhum orçamento definido")
+    
+    def criar_projecao(self, parent):
+        """Cria o gráfico de projeção do saldo"""
+        projecao_frame = ctk.CTkFrame(parent, corner_radius=10)
+        projecao_frame.pack(padx=10, pady=10, fill="x")
+        
+        projecao_title = ctk.CTkLabel(
+            projecao_frame,
+            text="🔮 Projeção de Saldo",
+            font=obter_fonte(size=18, weight="bold")
+        )
+        projecao_title.pack(padx=10, pady=10)
+        
+        self.meses_projecao = 12
+        self.horizonte_projecao = ctk.CTkSegmentedButton(
+            projecao_frame,
+            values=["12 meses", "24 meses", "36 meses", "60 meses"],
+            command=self.alterar_horizonte_projecao
+        )
+        self.horizonte_projecao.set("12 meses")
+        self.horizonte_projecao.pack(padx=10, pady=(0, 5))
+        
+        # Figura e canvas criados uma única vez e redesenhados a cada atualização
+        self.projecao_figura = Figure(figsize=(4, 3), facecolor='#2b2b2b')
+        self.projecao_eixo = self.projecao_figura.add_subplot(111)
+        self.projecao_canvas = FigureCanvasTkAgg(self.projecao_figura, master=projecao_frame)
+        self.projecao_canvas.get_tk_widget().pack(padx=10, pady=10, fill="x")
+    
+    def alterar_horizonte_projecao(self, valor):
+        """Troca quantos meses a projeção cobre"""
+        self.meses_projecao = int(valor.split()[0])
+        self.agendador.marcar('projecao')
+    
+    def carregar_projecao(self):
+        """Pede ao worker a projeção do saldo"""
+        self.trabalhador.executar(
+            self.controle.projetar_fluxo_caixa, self.meses_projecao,
+            chave='projecao',
+            ao_concluir=self.desenhar_projecao
+        )
+    
+    def desenhar_projecao(self, projecao):
+        """Redesenha o gráfico de projeção no canvas existente"""
+        with self.perfil.secao('projecao'):
+            ax = self.projecao_eixo
+            ax.clear()
+            ax.set_facecolor('#2b2b2b')
+            
+            # Valores chegam em centavos; o gráfico mostra reais
+            x = np.arange(len(projecao['meses']))
+            fluxo = (projecao['entradas'] - projecao['saidas'] - projecao['investimentos']) / 100
+            ax.bar(x, fluxo, color=np.where(fluxo >= 0, '#28a745', '#dc3545'), alpha=0.6, label='Fluxo do mês')
+            ax.plot(x, projecao['saldo'] / 100, color='#4a9eff', linewidth=2, label='Saldo projetado')
+            ax.axhline(0, color='gray', linewidth=0.8)
+            
+            passo = max(1, len(x) // 6)
+            ax.set_xticks(x[::passo])
+            ax.set_xticklabels([m[2:].replace('-', '/') for m in projecao['meses'][::passo]])
+            ax.tick_params(colors='white', labelsize=8)
+            ax.set_title('Saldo projetado', color='white', fontsize=11)
+            ax.legend(fontsize=8, facecolor='#2b2b2b', labelcolor='white')
+            
+            self.projecao_figura.tight_layout()
+            self.projecao_canvas.draw_idle()
+    
+    def criar_tendencias(self, parent):
+        """Cria os gráficos de tendência de saldo e gastos do histórico"""
+        tendencias_frame = ctk.CTkFrame(parent, corner_radius=10)
+        tendencias_frame.pack(padx=10, pady=10, fill="x")
+        
+        ctk.CTkLabel(
+            tendencias_frame,
+            text="📉 Tendências",
+            font=obter_fonte(size=18, weight="bold")
+        ).pack(padx=10, pady=10)
+        
+        self.granularidade_tendencias = 'mensal'
+        granularidade = ctk.CTkSegmentedButton(
+            tendencias_frame,
+            values=["Diária", "Semanal", "Mensal"],
+            command=self.alterar_granularidade_tendencias
+        )
+        granularidade.set("Mensal")
+        granularidade.pack(padx=10, pady=(0, 5))
+        
+        # Linhas criadas uma vez; cada atualização só troca os dados delas
+        self.tendencias_figura = Figure(figsize=(4, 6), facecolor='#2b2b2b')
+        self.tendencias_eixos = self.tendencias_figura.subplots(3, 1, sharex=True)
+        titulos = ('Saldo acumulado', 'Gastos', 'Média diária móvel')
+        for ax, titulo in zip(self.tendencias_eixos, titulos):
+            ax.set_facecolor('#2b2b2b')
+            ax.set_title(titulo, color='white', fontsize=10)
+            ax.tick_params(colors='white', labelsize=8)
+            ax.xaxis_date()
+        self.tendencias_linhas = [
+            self.tendencias_eixos[0].plot([], [], color='#4a9eff', linewidth=1.2)[0],
+            self.tendencias_eixos[1].plot([], [], color='#dc3545', linewidth=1.2)[0]
+        ]
+        self.tendencias_linhas_janelas = {
+            janela: self.tendencias_eixos[2].plot([], [], color=cor, linewidth=1.2, label=f"{janela} dias")[0]
+            for janela, cor in zip(JanelasGastos.JANELAS, ('#ffc107', '#fd7e14', '#dc3545'))
+        }
+        self.tendencias_eixos[2].legend(
+            fontsize=7, loc='upper left', facecolor='#2b2b2b', edgecolor='#555555', labelcolor='white'
+        )
+        self.tendencias_eixos[2].xaxis.set_major_formatter(mdates.DateFormatter('%m/%y'))
+        
+        self.tendencias_canvas = FigureCanvasTkAgg(self.tendencias_figura, master=tendencias_frame)
+        self.tendencias_canvas.get_tk_widget().pack(padx=10, pady=10, fill="x")
+    
+    def alterar_granularidade_tendencias(self, valor):
+        """Troca a granularidade das séries de tendência"""
+        self.granularidade_tendencias = {"Diária": 'diaria', "Semanal": 'semanal', "Mensal": 'mensal'}[valor]
+        self.agendador.marcar('tendencias')
+    
+    def carregar_tendencias(self):
+        """Pede ao worker as séries já reduzidas para a largura do gráfico"""
+        largura = max(self.tendencias_canvas.get_tk_widget().winfo_width(), 200)
+        self.trabalhador.executar(
+            self.controle.serie_tendencia, self.granularidade_tendencias, largura,
+            chave='tendencias',
+            ao_concluir=self.desenhar_tendencias
+        )
+    
+    def desenhar_tendencias(self, serie):
+        """Atualiza os dados das linhas de tendência e redesenha"""
+        with self.perfil.secao('tendencias'):
+            dados = ((serie['datasSaldo'], serie['saldo']), (serie['datasGastos'], serie['gastos']))
+            for ax, linha, (datas, valores) in zip(self.tendencias_eixos, self.tendencias_linhas, dados):
+                linha.set_data(mdates.date2num(datas), valores / 100)
+                ax.relim()
+                ax.autoscale_view()
+            
+            janelas = serie['janelas']
+            datas = mdates.date2num(janelas['datas'])
+            for janela, linha in self.tendencias_linhas_janelas.items():
+                linha.set_data(datas, janelas['medias'][janela] / 100)
+            self.tendencias_eixos[2].relim()
+            self.tendencias_eixos[2].autoscale_view()
+            
+            self.tendencias_figura.tight_layout()
+            self.tendencias_canvas.draw_idle()
     
     def criar_categorias(self, parent):
         """Cria a seção de categorias"""
@@ -530,12 +3796,14 @@ class ControleFinanceiroApp(ctk.CTk):
         cat_title = ctk.CTkLabel(
             categorias_frame,
             text="📂 Análise por Categoria",
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=obter_fonte(size=18, weight="bold")
         )
         cat_title.pack(padx=10, pady=10)
         
         self.categorias_container = ctk.CTkScrollableFrame(categorias_frame, height=400)
         self.categorias_container.pack(padx=10, pady=10, fill="both", expand=True)
+        
+        self.pool_categorias = PoolCards(self.categorias_container, CardCategoria, "📂 Nenhum gasto registrado")
     
     def adicionar_lancamento(self):
         """Adiciona um novo lançamento"""
@@ -544,9 +3812,9 @@ class ControleFinanceiroApp(ctk.CTk):
             descricao = self.descricao_entry.get()
             categoria_selecionada = self.categoria_combo.get().split(' ', 1)[1]
             
-            entrada = float(self.entrada_entry.get() or 0)
-            saida = float(self.saida_entry.get() or 0)
-            investimento = float(self.investimento_entry.get() or 0)
+            entrada = para_centavos(self.entrada_entry.get())
+            saida = para_centavos(self.saida_entry.get())
+            investimento = para_centavos(self.investimento_entry.get())
             parcelas = int(self.parcelas_entry.get() or 0)
             
             status_map = {"✅ Paga": "paga", "❌ Não Paga": "nao-paga", "💳 Parcelada": "parcelada"}
@@ -569,7 +3837,16 @@ class ControleFinanceiroApp(ctk.CTk):
                 'recorrente': self.recorrente_var.get() and parcelas < 2
             }
             
-            self.controle.adicionar(lancamento)
+            mensagem = "✅ Lançamento adicionado com sucesso!"
+            if parcelas >= 2:
+                mensagem += f"\n💳 {parcelas} parcelas criadas automaticamente!"
+            elif lancamento['recorrente']:
+                mensagem += "\n🔄 Conta fixa cadastrada!"
+            
+            self.trabalhador.executar(
+                self.controle.adicionar, lancamento,
+                ao_concluir=lambda _: self._concluir_mutacao(mensagem)
+            )
             
             # Limpar campos
             self.descricao_entry.delete(0, 'end')
@@ -579,320 +3856,352 @@ class ControleFinanceiroApp(ctk.CTk):
             self.parcelas_entry.delete(0, 'end')
             self.desnecessario_var.set(False)
             self.recorrente_var.set(False)
+            self._escolhas_manuais.clear()
             self.data_entry.delete(0, 'end')
             self.data_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
             
-            self.atualizar_dashboard()
-            
-            mensagem = "✅ Lançamento adicionado com sucesso!"
-            if parcelas >= 2:
-                mensagem += f"\n💳 {parcelas} parcelas criadas automaticamente!"
-            elif lancamento['recorrente']:
-                mensagem += "\n🔄 Conta fixa cadastrada!"
-            
-            messagebox.showinfo("Sucesso", mensagem)
-            
         except ValueError:
             messagebox.showerror("Erro", "Valores numéricos inválidos!")
     
-    def atualizar_dashboard(self):
-        """Atualiza todos os dados do dashboard"""
-        resumo = self.controle.calcular_resumo()
-        
-        # Atualizar resumo
-        self.resumo_labels['entradas'].configure(text=f"R$ {resumo['totalEntradas']:,.2f}")
-        self.resumo_labels['saidas'].configure(text=f"R$ {resumo['totalSaidas']:,.2f}")
-        self.resumo_labels['investimentos'].configure(text=f"R$ {resumo['totalInvestimentos']:,.2f}")
-        self.resumo_labels['desnecessarios'].configure(text=f"R$ {resumo['totalDesnecessarios']:,.2f}")
-        self.resumo_labels['saldo'].configure(text=f"R$ {resumo['saldoDisponivel']:,.2f}")
-        self.resumo_labels['patrimonio'].configure(text=f"R$ {resumo['patrimonioTotal']:,.2f}")
-        
-        # Status
-        if resumo['patrimonioTotal'] > 0:
-            self.status_label.configure(text="✅ POSITIVO", text_color="#28a745")
-        else:
-            self.status_label.configure(text="❌ ENDIVIDADO", text_color="#dc3545")
-        
-        # Estatísticas
-        self.stats_labels['economizado'].configure(text=f"{resumo['percentualEconomizado']:.1f}%")
-        self.stats_labels['maior_gasto'].configure(text=f"R$ {resumo['maiorGasto']:,.2f}")
-        self.stats_labels['lancamentos'].configure(text=str(resumo['totalLancamentos']))
-        self.stats_labels['nao_pagas'].configure(text=str(resumo['totalNaoPagas']))
-        
-        # Atualizar tabelas
-        self.atualizar_lancamentos()
-        self.atualizar_parcelamentos()
-        self.atualizar_contas_fixas()
-        self.atualizar_categorias()
+    def _concluir_mutacao(self, mensagem=None, partes=()):
+        """Atualiza a tela depois que o worker gravou uma alteração"""
+        self.agendador.marcar(*partes)
+        if mensagem:
+            messagebox.showinfo("Sucesso", mensagem)
     
-    def atualizar_lancamentos(self):
-        """Atualiza a lista de lançamentos do mês"""
-        # Limpar frame
-        for widget in self.lancamentos_frame.winfo_children():
-            widget.destroy()
-        
-        lancamentos_mes = self.controle.obter_lancamentos_mes_atual()
-        
-        if not lancamentos_mes:
-            ctk.CTkLabel(
-                self.lancamentos_frame,
-                text="📭 Nenhum lançamento neste mês",
-                font=ctk.CTkFont(size=14)
-            ).pack(pady=50)
+    def abrir_consolidado(self):
+        """Soma todos os perfis em processos separados e mostra o resultado"""
+        perfis = listar_perfis()
+        if not self.perfil_nome and os.path.exists(self.controle.arquivo_dados):
+            perfis = {"principal": ".", **perfis}
+        if len(perfis) < 2:
+            messagebox.showinfo(
+                "Perfis",
+                f"A visão consolidada precisa de pelo menos dois perfis. "
+                f"Crie outros com --perfil NOME (ficam em {DIRETORIO_PERFIS}/)."
+            )
             return
         
-        # Ordenar por data (mais recente primeiro)
-        lancamentos_mes.sort(key=lambda x: x['data'], reverse=True)
-        
-        for lanc in lancamentos_mes:
-            self.criar_card_lancamento(lanc)
+        self.trabalhador.executar(
+            consolidar_perfis, perfis,
+            chave='consolidado',
+            isolada=True,
+            ao_concluir=self.exibir_consolidado,
+            ao_falhar=lambda erro: messagebox.showerror("Erro", f"Falha ao consolidar perfis: {erro}")
+        )
     
-    def criar_card_lancamento(self, lancamento):
-        """Cria um card para um lançamento"""
-        card = ctk.CTkFrame(self.lancamentos_frame, corner_radius=10)
-        card.pack(padx=5, pady=5, fill="x")
-        
-        # Linha principal
-        main_frame = ctk.CTkFrame(card, fg_color="transparent")
-        main_frame.pack(fill="x", padx=10, pady=5)
-        
-        # Data e descrição
-        data_formatada = datetime.strptime(lancamento['data'], '%Y-%m-%d').strftime('%d/%m/%Y')
-        icon = self.controle.categorias.get(lancamento['categoria'], '')
-        
-        info_text = f"{data_formatada} | {icon} {lancamento['descricao']}"
-        if lancamento.get('parcelaAtual'):
-            info_text += f" ({lancamento['parcelaAtual']}/{lancamento['totalParcelas']})"
-        
-        ctk.CTkLabel(
-            main_frame,
-            text=info_text,
-            font=ctk.CTkFont(size=12, weight="bold")
-        ).pack(side="left", padx=5)
-        
-        # Valor
-        valor = lancamento.get('entrada', 0) or lancamento.get('saida', 0) or lancamento.get('investimento', 0)
-        cor = "#28a745" if lancamento.get('entrada', 0) > 0 else "#dc3545" if lancamento.get('saida', 0) > 0 else "#007bff"
-        
-        ctk.CTkLabel(
-            main_frame,
-            text=f"R$ {valor:,.2f}",
-            font=ctk.CTkFont(size=12, weight="bold"),
-            text_color=cor
-        ).pack(side="right", padx=5)
-        
-        # Botões de ação
-        btn_frame = ctk.CTkFrame(card, fg_color="transparent")
-        btn_frame.pack(fill="x", padx=10, pady=5)
+    def exibir_consolidado(self, consolidado):
+        """Janela com o resumo de cada perfil, o total e as saídas por categoria e perfil"""
+        janela = ctk.CTkToplevel(self)
+        janela.title("🏘️ Visão consolidada")
+        janela.geometry("900x600")
         
-        if lancamento['statusPagamento'] != 'paga':
-            ctk.CTkButton(
-                btn_frame,
-                text="✅ Pagar",
-                command=lambda l=lancamento: self.marcar_como_paga(l['id']),
-                width=80,
-                height=30,
-                fg_color="#28a745"
-            ).pack(side="left", padx=2)
+        perfis = list(consolidado['perfis'])
+        largura = max(12, *(len(nome) for nome in perfis))
+        linhas = [f"{'':24}" + "".join(f"{nome:>{largura + 4}}" for nome in perfis) + f"{'TOTAL':>18}"]
         
-        ctk.CTkButton(
-            btn_frame,
-            text="🗑️ Excluir",
-            command=lambda l=lancamento: self.excluir_lancamento(l['id']),
-            width=80,
-            height=30,
-            fg_color="#dc3545"
-        ).pack(side="left", padx=2)
+        campos = (
+            ('Entradas', 'totalEntradas'), ('Saídas', 'totalSaidas'),
+            ('Investimentos', 'totalInvestimentos'), ('Saldo', 'saldoDisponivel'),
+            ('Lançamentos', 'totalLancamentos'), ('Não pagas', 'totalNaoPagas')
+        )
+        for rotulo, campo in campos:
+            formatar = str if campo in ('totalLancamentos', 'totalNaoPagas') else formatar_moeda
+            linhas.append(
+                f"{rotulo:24}"
+                + "".join(f"{formatar(consolidado['perfis'][nome]['resumo'][campo]):>{largura + 4}}" for nome in perfis)
+                + f"{formatar(consolidado['resumo'][campo]):>18}"
+            )
+        linhas.append(
+            f"{'Parcelamentos a pagar':24}"
+            + "".join(
+                f"{formatar_moeda(consolidado['perfis'][nome]['parcelamentos']['valorRestante']):>{largura + 4}}"
+                for nome in perfis
+            )
+            + f"{formatar_moeda(consolidado['parcelamentos']['valorRestante']):>18}"
+        )
         
-        # Status
-        status_colors = {'paga': '#28a745', 'nao-paga': '#dc3545', 'parcelada': '#ffc107'}
-        status_text = {'paga': '✅ Paga', 'nao-paga': '❌ Não Paga', 'parcelada': '💳 Parcelada'}
+        linhas += ["", "SAÍDAS POR CATEGORIA"]
+        for categoria, pivo in sorted(consolidado['categorias'].items(), key=lambda item: -item[1]['total']):
+            linhas.append(
+                f"{self.controle.categorias.get(categoria, '')} {categoria:21}"
+                + "".join(f"{formatar_moeda(pivo['porPerfil'].get(nome, 0)):>{largura + 4}}" for nome in perfis)
+                + f"{formatar_moeda(pivo['total']):>18}"
+            )
         
-        ctk.CTkLabel(
-            btn_frame,
-            text=status_text.get(lancamento['statusPagamento'], ''),
-            text_color=status_colors.get(lancamento['statusPagamento'], 'white'),
-            font=ctk.CTkFont(size=10, weight="bold")
-        ).pack(side="right", padx=5)
+        texto = ctk.CTkTextbox(janela, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        texto.pack(fill="both", expand=True, padx=10, pady=10)
+        texto.insert("1.0", "\n".join(linhas))
+        texto.configure(state="disabled")
     
-    def atualizar_parcelamentos(self):
-        """Atualiza a lista de parcelamentos"""
-        for widget in self.parcelamentos_frame.winfo_children():
-            widget.destroy()
-        
-        parcelamentos = self.controle.obter_parcelamentos()
-        
-        if not parcelamentos:
-            ctk.CTkLabel(
-                self.parcelamentos_frame,
-                text="💳 Nenhum parcelamento ativo",
-                font=ctk.CTkFont(size=14)
-            ).pack(pady=50)
+    def abrir_conciliacao(self):
+        """Lê um extrato CSV e propõe, no worker, quais lançamentos não pagos ele quita"""
+        arquivo = filedialog.askopenfilename(
+            title="Extrato bancário (CSV)",
+            filetypes=[("CSV", "*.csv"), ("Todos os arquivos", "*.*")]
+        )
+        if not arquivo:
             return
         
-        for parc in parcelamentos:
-            self.criar_card_parcelamento(parc)
+        self.trabalhador.executar(
+            lambda: self.controle.propor_conciliacao(ler_extrato(arquivo)),
+            chave='conciliacao',
+            ao_concluir=lambda resultado: self.exibir_conciliacao(*resultado),
+            ao_falhar=lambda erro: messagebox.showerror("Erro", f"Falha ao ler o extrato: {erro}")
+        )
     
-    def criar_card_parcelamento(self, parcelamento):
-        """Cria um card para um parcelamento"""
-        card = ctk.CTkFrame(self.parcelamentos_frame, corner_radius=10, border_width=2, border_color="#17a2b8")
-        card.pack(padx=5, pady=10, fill="x")
-        
-        # Cabeçalho
-        header = ctk.CTkFrame(card, fg_color="transparent")
-        header.pack(fill="x", padx=10, pady=10)
-        
-        icon = self.controle.categorias.get(parcelamento['categoria'], '')
-        ctk.CTkLabel(
-            header,
-            text=f"{icon} {parcelamento['descricao']}",
-            font=ctk.CTkFont(size=16, weight="bold")
-        ).pack(side="left")
+    def exibir_conciliacao(self, propostas, sem_correspondencia):
+        """Janela com as correspondências propostas para confirmar de uma vez"""
+        if not propostas:
+            messagebox.showinfo(
+                "Conciliação",
+                f"Nenhuma das {len(sem_correspondencia)} linhas do extrato corresponde a um lançamento não pago."
+            )
+            return
         
-        ctk.CTkButton(
-            header,
-            text="🗑️ Excluir Tudo",
-            command=lambda p=parcelamento: self.excluir_parcelamento(p['id']),
-            width=100,
-            height=30,
-            fg_color="#dc3545"
-        ).pack(side="right")
+        janela = ctk.CTkToplevel(self)
+        janela.title("🏦 Conciliação do extrato")
+        janela.geometry("900x600")
         
-        # Informações
-        info_frame = ctk.CTkFrame(card)
-        info_frame.pack(fill="x", padx=10, pady=5)
+        linhas = [f"{'EXTRATO':52}   LANÇAMENTO NÃO PAGO", ""]
+        for proposta in propostas:
+            linha, lancamento = proposta['linha'], proposta['lancamento']
+            dias = f"({proposta['diferencaDias']:+d}d)" if proposta['diferencaDias'] else ""
+            linhas.append(
+                f"{linha['data']}  {linha['descricao'][:24]:24} {formatar_moeda(linha['valor']):>14}"
+                f" → {lancamento['data']}  {lancamento['descricao'][:30]:30} {dias}"
+            )
+        if sem_correspondencia:
+            linhas += ["", f"SEM CORRESPONDÊNCIA ({len(sem_correspondencia)})"]
+            linhas += [
+                f"{l['data']}  {l['descricao'][:24]:24} {formatar_moeda(l['valor']):>14}"
+                + (f"   {self.controle.categorias.get(l['categoriaSugerida'], '')} {l['categoriaSugerida']}"
+                   if l['categoriaSugerida'] else "")
+                for l in sem_correspondencia
+            ]
         
-        infos = [
-            ("Valor Total", f"R$ {parcelamento['valorTotal']:,.2f}"),
-            ("Parcela", f"R$ {parcelamento['valorParcela']:,.2f}"),
-            ("Parcelas Pagas", f"{parcelamento['parcelasPagas']}/{parcelamento['totalParcelas']}"),
-            ("Valor Pago", f"R$ {parcelamento['valorPago']:,.2f}"),
-            ("Restante", f"R$ {parcelamento['valorRestante']:,.2f}")
-        ]
+        texto = ctk.CTkTextbox(janela, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        texto.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        texto.insert("1.0", "\n".join(linhas))
+        texto.configure(state="disabled")
         
-        for i, (label, value) in enumerate(infos):
-            frame = ctk.CTkFrame(info_frame, fg_color="transparent")
-            frame.grid(row=i//3, column=i%3, padx=5, pady=5, sticky="ew")
-            
-            ctk.CTkLabel(frame, text=label, font=ctk.CTkFont(size=10)).pack()
-            ctk.CTkLabel(frame, text=value, font=ctk.CTkFont(size=11, weight="bold")).pack()
+        def confirmar():
+            janela.destroy()
+            self.trabalhador.executar(
+                self.controle.aplicar_conciliacao, [p['lancamentoId'] for p in propostas],
+                ao_concluir=lambda alterados: self._concluir_mutacao(
+                    f"✅ {alterados} lançamentos marcados como pagos!",
+                    partes=('resumo', 'lancamentos', 'parcelamentos', 'historico', 'projecao')
+                )
+            )
         
-        # Progresso
-        percentual = (parcelamento['parcelasPagas'] / parcelamento['totalParcelas']) * 100
-        ctk.CTkProgressBar(card, progress_color="#28a745").pack(fill="x", padx=10, pady=5)
-        ctk.CTkLabel(
-            card,
-            text=f"{percentual:.1f}% pago",
-            font=ctk.CTkFont(size=10)
-        ).pack(pady=(0, 10))
+        botoes = ctk.CTkFrame(janela, fg_color="transparent")
+        botoes.pack(fill="x", padx=10, pady=(5, 10))
+        ctk.CTkButton(
+            botoes, text=f"✅ Marcar {len(propostas)} como pagos", command=confirmar, fg_color="#28a745"
+        ).pack(side="right")
+        ctk.CTkButton(botoes, text="Cancelar", command=janela.destroy, fg_color="gray").pack(side="right", padx=10)
     
-    def atualizar_contas_fixas(self):
-        """Atualiza a lista de contas fixas"""
-        for widget in self.contas_fixas_frame.winfo_children():
-            widget.destroy()
+    def atualizar_dashboard(self):
+        """Atualiza todos os dados do dashboard"""
+        self.agendador.marcar()
+    
+    def atualizar_partes(self, partes):
+        """Recalcula no worker as partes sujas do dashboard"""
+        if 'historico' in partes:
+            self.carregar_pagina_historico()
+        if 'projecao' in partes:
+            self.carregar_projecao()
+        if 'tendencias' in partes:
+            self.carregar_tendencias()
         
-        if not self.controle.contasFixas:
-            ctk.CTkLabel(
-                self.contas_fixas_frame,
-                text="🔄 Nenhuma conta fixa cadastrada",
-                font=ctk.CTkFont(size=14)
-            ).pack(pady=50)
+        # Um pedido novo descarta o anterior ainda não entregue, então ele
+        # precisa levar também as partes que o anterior iria atualizar
+        self._partes_pendentes |= set(partes) - {'historico', 'projecao', 'tendencias'}
+        if not self._partes_pendentes:
             return
         
-        for conta in self.controle.contasFixas:
-            self.criar_card_conta_fixa(conta)
+        self.trabalhador.executar(
+            self.controle.calcular_painel, frozenset(self._partes_pendentes),
+            chave='painel',
+            ao_concluir=self.aplicar_painel
+        )
     
-    def criar_card_conta_fixa(self, conta):
-        """Cria um card para uma conta fixa"""
-        card = ctk.CTkFrame(self.contas_fixas_frame, corner_radius=10, border_width=2, border_color="#6f42c1")
-        card.pack(padx=5, pady=5, fill="x")
+    def aplicar_painel(self, painel):
+        """Desenha na tela as partes calculadas pelo worker"""
+        self._partes_pendentes -= painel.keys()
         
-        main_frame = ctk.CTkFrame(card, fg_color="transparent")
-        main_frame.pack(fill="x", padx=10, pady=10)
+        aplicar = {
+            'resumo': self.atualizar_resumo,
+            'lancamentos': self.atualizar_lancamentos,
+            'parcelamentos': self.atualizar_parcelamentos,
+            'contas_fixas': self.atualizar_contas_fixas,
+            'categorias': self.atualizar_categorias,
+            'orcamentos': self.atualizar_orcamentos,
+            'janelas': self.atualizar_janelas
+        }
+        for parte, atualizar in aplicar.items():
+            if parte in painel:
+                with self.perfil.secao(parte):
+                    atualizar(painel[parte])
+    
+    def atualizar_resumo(self, resumo):
+        """Atualiza os cards e estatísticas do resumo"""
+        # Atualizar resumo
+        self.resumo_labels['entradas'].configure(text=formatar_moeda(resumo['totalEntradas']))
+        self.resumo_labels['saidas'].configure(text=formatar_moeda(resumo['totalSaidas']))
+        self.resumo_labels['investimentos'].configure(text=formatar_moeda(resumo['totalInvestimentos']))
+        self.resumo_labels['desnecessarios'].configure(text=formatar_moeda(resumo['totalDesnecessarios']))
+        self.resumo_labels['saldo'].configure(text=formatar_moeda(resumo['saldoDisponivel']))
+        self.resumo_labels['patrimonio'].configure(text=formatar_moeda(resumo['patrimonioTotal']))
         
-        icon = self.controle.categorias.get(conta['categoria'], '')
-        ctk.CTkLabel(
-            main_frame,
-            text=f"{icon} {conta['descricao']} 🔄",
-            font=ctk.CTkFont(size=14, weight="bold")
-        ).pack(side="left")
+        # Status
+        if resumo['patrimonioTotal'] > 0:
+            self.status_label.configure(text="✅ POSITIVO", text_color="#28a745")
+        else:
+            self.status_label.configure(text="❌ ENDIVIDADO", text_color="#dc3545")
         
-        valor = conta.get('entrada', 0) or conta.get('saida', 0) or conta.get('investimento', 0)
-        cor = "#28a745" if conta.get('entrada', 0) > 0 else "#dc3545"
+        # Estatísticas
+        self.stats_labels['economizado'].configure(text=f"{resumo['percentualEconomizado']:.1f}%")
+        self.stats_labels['maior_gasto'].configure(text=formatar_moeda(resumo['maiorGasto']))
+        self.stats_labels['lancamentos'].configure(text=str(resumo['totalLancamentos']))
+        self.stats_labels['nao_pagas'].configure(text=str(resumo['totalNaoPagas']))
+    
+    def atualizar_janelas(self, janelas):
+        """Atualiza os gastos das janelas móveis: total, média por dia e parte desnecessária"""
+        for janela, dados in janelas.items():
+            self.janelas_labels[janela].configure(
+                text=f"{formatar_moeda(dados['gasto'])} · {formatar_moeda(dados['mediaDiaria'])}/dia"
+                     f" · {dados['razaoDesnecessario'] * 100:.0f}% desnec."
+            )
+    
+    def atualizar_orcamentos(self, orcamentos):
+        """Atualiza as barras de orçamento e avisa sobre limiares ultrapassados"""
+        self.pool_orcamentos.exibir(list(orcamentos['status'].items()))
         
-        ctk.CTkLabel(
-            main_frame,
-            text=f"R$ {valor:,.2f}",
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=cor
-        ).pack(side="right", padx=10)
+        if orcamentos['alertas']:
+            linhas = [
+                f"{'🚨' if a['nivel'] >= 100 else '⚠️'} {a['categoria']}: "
+                f"{formatar_moeda(a['gasto'])} de {formatar_moeda(a['limite'])} ({a['nivel']}% do orçamento)"
+                for a in orcamentos['alertas']
+            ]
+            messagebox.showwarning("Orçamento", "\n".join(linhas))
+    
+    def definir_orcamento(self):
+        """Define o orçamento mensal da categoria selecionada"""
+        try:
+            categoria = self.orcamento_categoria_combo.get().split(' ', 1)[1]
+            limite = para_centavos(self.orcamento_limite_entry.get())
+        except (ValueError, IndexError):
+            messagebox.showerror("Erro", "Valor de orçamento inválido!")
+            return
         
-        ctk.CTkButton(
-            main_frame,
-            text="🗑️ Excluir",
-            command=lambda c=conta: self.excluir_conta_fixa(c['id']),
-            width=80,
-            height=30,
-            fg_color="#dc3545"
-        ).pack(side="right")
+        self.orcamento_limite_entry.delete(0, 'end')
+        self.trabalhador.executar(
+            self.controle.definir_orcamento, categoria, limite,
+            ao_concluir=lambda _: self.agendador.marcar('orcamentos')
+        )
+    
+    def criar_card_lancamento(self, master):
+        """Cria um card de lançamento vazio para os pools"""
+        return CardLancamento(master, self.controle.categorias, self.marcar_como_paga, self.excluir_lancamento)
+    
+    def atualizar_lancamentos(self, lancamentos_mes):
+        """Atualiza a lista de lançamentos do mês"""
+        self.pool_lancamentos.exibir(lancamentos_mes)
+    
+    def atualizar_parcelamentos(self, parcelamentos):
+        """Atualiza a lista de parcelamentos"""
+        self.pool_parcelamentos.exibir(parcelamentos)
+    
+    def atualizar_contas_fixas(self, contas_fixas):
+        """Atualiza a lista de contas fixas"""
+        self.pool_contas_fixas.exibir(contas_fixas)
     
-    def atualizar_categorias(self):
+    def atualizar_categorias(self, categorias):
         """Atualiza a lista de categorias"""
-        for widget in self.categorias_container.winfo_children():
-            widget.destroy()
-        
-        categorias = self.controle.calcular_por_categoria()
-        
-        for nome, dados in categorias.items():
-            if dados['total'] > 0:
-                card = ctk.CTkFrame(self.categorias_container, corner_radius=8)
-                card.pack(padx=5, pady=5, fill="x")
-                
-                frame = ctk.CTkFrame(card, fg_color="transparent")
-                frame.pack(fill="x", padx=10, pady=10)
-                
-                ctk.CTkLabel(
-                    frame,
-                    text=f"{dados['icon']} {nome}",
-                    font=ctk.CTkFont(size=12, weight="bold")
-                ).pack(side="left")
-                
-                ctk.CTkLabel(
-                    frame,
-                    text=f"R$ {dados['total']:,.2f}",
-                    font=ctk.CTkFont(size=12, weight="bold"),
-                    text_color="#4a9eff"
-                ).pack(side="right")
+        self.pool_categorias.exibir([(nome, dados) for nome, dados in categorias.items() if dados['total'] > 0])
     
     def marcar_como_paga(self, lancamento_id):
         """Marca um lançamento como pago"""
-        self.controle.alterar_status_pagamento(lancamento_id, 'paga')
-        self.atualizar_dashboard()
+        self.trabalhador.executar(
+            self.controle.alterar_status_pagamento, lancamento_id, 'paga',
+            ao_concluir=lambda _: self._concluir_mutacao(
+                partes=('resumo', 'lancamentos', 'parcelamentos', 'historico', 'projecao')
+            )
+        )
     
     def excluir_lancamento(self, lancamento_id):
         """Exclui um lançamento"""
         if messagebox.askyesno("Confirmar", "Deseja realmente excluir este lançamento?"):
-            self.controle.excluir(lancamento_id)
-            self.atualizar_dashboard()
+            self.trabalhador.executar(
+                self.controle.excluir, lancamento_id,
+                ao_concluir=lambda _: self._concluir_mutacao(
+                    partes=('resumo', 'lancamentos', 'parcelamentos', 'categorias',
+                            'orcamentos', 'historico', 'projecao', 'tendencias', 'janelas')
+                )
+            )
     
     def excluir_parcelamento(self, grupo_id):
         """Exclui um parcelamento completo"""
         if messagebox.askyesno("Confirmar", "Deseja excluir TODAS as parcelas deste parcelamento?"):
-            self.controle.excluir_grupo_parcelamento(grupo_id)
-            self.atualizar_dashboard()
-            messagebox.showinfo("Sucesso", "Parcelamento excluído com sucesso!")
+            self.trabalhador.executar(
+                self.controle.excluir_grupo_parcelamento, grupo_id,
+                ao_concluir=lambda _: self._concluir_mutacao(
+                    "Parcelamento excluído com sucesso!",
+                    partes=('resumo', 'lancamentos', 'parcelamentos', 'categorias',
+                            'orcamentos', 'historico', 'projecao', 'tendencias', 'janelas')
+                )
+            )
     
     def excluir_conta_fixa(self, conta_id):
         """Exclui uma conta fixa"""
         if messagebox.askyesno("Confirmar", "Deseja excluir esta conta fixa e todos os lançamentos associados?"):
-            self.controle.excluir_conta_fixa(conta_id)
-            self.atualizar_dashboard()
-            messagebox.showinfo("Sucesso", "Conta fixa excluída com sucesso!")
+            self.trabalhador.executar(
+                self.controle.excluir_conta_fixa, conta_id,
+                ao_concluir=lambda _: self._concluir_mutacao("Conta fixa excluída com sucesso!")
+            )
 
 
 def main():
     """Função principal"""
-    app = ControleFinanceiroApp()
+    parser = argparse.ArgumentParser(description="Controle Financeiro")
+    parser.add_argument('--perfil', metavar='NOME',
+                        help=f"usa os arquivos do perfil em {DIRETORIO_PERFIS}/NOME (criado se não existir)")
+    parser.add_argument('--metricas', metavar='ARQUIVO',
+                        help="coleta métricas dos métodos do motor e grava em ARQUIVO ao sair")
+    parser.add_argument('--perfil-interface', metavar='ARQUIVO', nargs='?', const='-',
+                        help="relata o tempo de cada redesenho, widgets e travamentos (no terminal ou em ARQUIVO)")
+    parser.add_argument('--perfil-memoria', '--profile-memory', metavar='N', type=int,
+                        nargs='?', const=20, default=0,
+                        help="fotografa a memória antes/depois do carregamento e após N redesenhos (padrão: 20)")
+    parser.add_argument('--arquivar-ate', metavar='ANO', type=int,
+                        help="move os anos até ANO para o arquivo frio e sai, sem abrir a janela")
+    parser.add_argument('--arquivar-automaticamente', action='store_true',
+                        help=f"arquiva nas folgas os anos anteriores aos {ControleFinanceiro.ANOS_QUENTES} "
+                             "mais recentes (lançamentos arquivados ficam só para leitura)")
+    args = parser.parse_args()
+    
+    if args.arquivar_ate:
+        diretorio = diretorio_perfil(args.perfil) if args.perfil else "."
+        try:
+            anos = ControleFinanceiro(diretorio=diretorio).arquivar_ate(args.arquivar_ate)
+        except ValueError as erro:
+            parser.error(str(erro))
+        print(f"Anos arquivados: {', '.join(anos)}" if anos else "Nenhum ano para arquivar")
+        return
+    
+    if args.perfil_memoria:
+        tracemalloc.start()
+    
+    if args.metricas:
+        instrumentacao.ativar()
+        atexit.register(instrumentacao.gravar, os.path.abspath(args.metricas))
+    
+    app = ControleFinanceiroApp(
+        perfil=args.perfil, perfil_interface=args.perfil_interface, perfil_memoria=args.perfil_memoria,
+        arquivamento_automatico=args.arquivar_automaticamente
+    )
     app.mainloop()
 
 
@@ -0,0 +1,215 @@
+"""
+Esquema versionado do arquivo de lançamentos (dados_financeiros.json)
+
+Os dois aplicativos gravam o mesmo arquivo. Até a versão 1 ele era só uma
+lista de lançamentos, e cada app gravava um formato: o controle_financeiro_app
+com ids sequenciais e sem statusPagamento, o controle_financeiro_completo com
+ids por timestamp, statusPagamento, grupoParcelaId e contaFixaId.
+
+A partir da versão 2 o arquivo começa com um cabeçalho e traz um lançamento
+por linha, sempre com todos os campos obrigatórios e valores em texto
+decimal:
+
+    {"esquema": {"formato": "controle-financeiro", "versao": 2}, "lancamentos": [
+    {"id": 1, "data": "2024-01-05", ...},
+    {"id": 2, "data": "2024-01-07", ...}
+    ]}
+
+ler_lancamentos() migra arquivos antigos na primeira leitura. A migração
+lê e grava linha a linha, sem carregar o arquivo inteiro na memória; só os
+ids sequenciais do app simples são guardados, para achar os repetidos.
+"""
+import json
+import os
+import re
+import time
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+FORMATO = "controle-financeiro"
+VERSAO_ESQUEMA = 2
+
+CAMPOS_VALOR = ('entrada', 'saida', 'investimento')
+
+# Campos que todo lançamento tem a partir da versão 2, com o valor usado
+# quando um arquivo antigo não os traz
+PADROES_LANCAMENTO = {
+    'descricao': '',
+    'categoria': 'Outros',
+    'entrada': '0.00',
+    'saida': '0.00',
+    'investimento': '0.00',
+    'statusPagamento': 'paga',  # o app simples só registrava o que já aconteceu
+    'desnecessario': False,
+    'recorrente': False
+}
+
+TAMANHO_BLOCO = 1 << 16
+# Ids a partir daqui são timestamps em ms (2001 em diante) do controle_financeiro_completo,
+# únicos por construção; abaixo, ids sequenciais do app simples, que podem se repetir
+ID_TIMESTAMP_MINIMO = 10 ** 12
+_ESPACOS = re.compile(r'[\s,]*')
+
+
+def para_centavos(valor):
+    """Converte um valor em reais (número ou texto decimal, com ponto ou vírgula) para centavos inteiros"""
+    if isinstance(valor, int):
+        return valor * 100
+    try:
+        reais = Decimal(str(valor).strip().replace(',', '.') or 0)
+        return int((reais * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"valor inválido: {valor!r}")
+
+
+def formatar_decimal(centavos):
+    """Texto decimal ('1234.56') de um valor em centavos, usado nos arquivos"""
+    sinal = '-' if centavos < 0 else ''
+    reais, resto = divmod(abs(int(centavos)), 100)
+    return f"{sinal}{reais}.{resto:02d}"
+
+
+def formatar_moeda(centavos):
+    """Texto para exibição ('R$ 1,234.56') de um valor em centavos"""
+    sinal = '-' if centavos < 0 else ''
+    reais, resto = divmod(abs(int(centavos)), 100)
+    return f"R$ {sinal}{reais:,}.{resto:02d}"
+
+
+def _iterar_array(f, buffer=''):
+    """Gera os itens de um array JSON lendo o arquivo em blocos
+
+    `buffer` é o que já foi lido depois do '['. Termina no ']' que fecha o
+    array; a memória usada é a de um bloco mais um item.
+    """
+    decodificador = json.JSONDecoder()
+    posicao = 0
+    while True:
+        posicao = _ESPACOS.match(buffer, posicao).end()
+        if posicao < len(buffer) and buffer[posicao] == ']':
+            return
+        try:
+            item, posicao = decodificador.raw_decode(buffer, posicao)
+        except json.JSONDecodeError:
+            bloco = f.read(TAMANHO_BLOCO)
+            if not bloco:
+                raise ValueError("arquivo de lançamentos truncado")
+            buffer = buffer[posicao:] + bloco
+            posicao = 0
+            continue
+        yield item
+
+
+def _abrir_lancamentos(f):
+    """Lê o início do arquivo e retorna (versão, gerador dos lançamentos)"""
+    inicio = f.read(1)
+    while inicio.isspace():
+        inicio = f.read(1)
+
+    if inicio == '[':
+        return 1, _iterar_array(f)
+    if inicio != '{':
+        raise ValueError("arquivo de lançamentos em formato desconhecido")
+
+    # O cabeçalho ocupa a primeira linha e termina abrindo a lista
+    cabecalho = inicio + f.readline()
+    abertura = cabecalho.rindex('[')
+    esquema = json.loads(cabecalho[:abertura + 1] + ']}')['esquema']
+    return esquema['versao'], _iterar_array(f, cabecalho[abertura + 1:])
+
+
+def versao_arquivo(arquivo):
+    """Versão do esquema de um arquivo de lançamentos (1 = lista sem cabeçalho)"""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        return _abrir_lancamentos(f)[0]
+
+
+def normalizar_lancamento(lancamento):
+    """Completa um lançamento de qualquer versão com os campos obrigatórios da atual"""
+    for campo, padrao in PADROES_LANCAMENTO.items():
+        if lancamento.get(campo) is None:
+            lancamento[campo] = padrao
+    for campo in CAMPOS_VALOR:
+        if not isinstance(lancamento[campo], str):
+            lancamento[campo] = formatar_decimal(para_centavos(lancamento[campo]))
+    return lancamento
+
+
+def gravar_lancamentos(arquivo, lancamentos):
+    """Grava lançamentos (já com valores em texto) no formato atual, um por linha"""
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        _gravar(f, lancamentos)
+        return f.tell()
+
+
+def _gravar(f, lancamentos):
+    esquema = json.dumps({'formato': FORMATO, 'versao': VERSAO_ESQUEMA})
+    f.write(f'{{"esquema": {esquema}, "lancamentos": [\n')
+    primeiro = True
+    for lancamento in lancamentos:
+        if not primeiro:
+            f.write(',\n')
+        f.write(json.dumps(lancamento, ensure_ascii=False))
+        primeiro = False
+    f.write('\n]}\n')
+
+
+def migrar_arquivo(arquivo):
+    """Atualiza um arquivo de lançamentos para a versão atual do esquema
+
+    Lê e grava um lançamento por vez em um arquivo temporário, que só
+    substitui o original no fim. Se algo falhar, o original fica intacto.
+    Ids ausentes ou repetidos (o app simples reaproveitava ids depois de
+    exclusões) recebem ids novos. Para isso os ids sequenciais já vistos
+    ficam em um conjunto, que cresce com o número de lançamentos do app
+    simples; os ids por timestamp não são guardados. Retorna False se já
+    estava atualizado.
+    """
+    temporario = arquivo + '.migrando'
+    with open(arquivo, 'r', encoding='utf-8') as origem:
+        versao, lancamentos = _abrir_lancamentos(origem)
+        if versao >= VERSAO_ESQUEMA:
+            return False
+
+        try:
+            with open(temporario, 'w', encoding='utf-8') as destino:
+                _gravar(destino, _migrados(lancamentos))
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    os.replace(temporario, arquivo)
+    return True
+
+
+def _migrados(lancamentos):
+    """Gera os lançamentos de uma versão antiga já no formato atual, um por vez"""
+    vistos = set()
+    proximo_id = int(time.time() * 1000)
+    for numero, lancamento in enumerate(lancamentos, 1):
+        if not lancamento.get('data'):
+            raise ValueError(f"lançamento {numero} sem data")
+        if not isinstance(lancamento.get('id'), int) or lancamento['id'] in vistos:
+            lancamento['id'] = proximo_id
+            proximo_id += 1
+        elif lancamento['id'] < ID_TIMESTAMP_MINIMO:
+            vistos.add(lancamento['id'])
+        yield normalizar_lancamento(lancamento)
+
+
+def ler_lancamentos(arquivo, migrar=True):
+    """Lê os lançamentos de um arquivo, migrando-o antes se estiver em versão antiga
+
+    Depois da migração todos os lançamentos têm os campos obrigatórios, então
+    quem lê pode acessá-los direto, sem .get() com valor padrão. Com
+    migrar=False um arquivo antigo é convertido só na memória e fica como
+    está no disco (perfis abertos somente para leitura).
+    """
+    if versao_arquivo(arquivo) < VERSAO_ESQUEMA:
+        if not migrar:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                return list(_migrados(_abrir_lancamentos(f)[1]))
+        migrar_arquivo(arquivo)
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        return json.load(f)['lancamentos']
@@ -0,0 +1,29 @@
+"""
+Gráficos compartilhados pelos aplicativos e pelos relatórios
+
+Só usa objetos Axes do matplotlib, sem pyplot nem backend de interface,
+então pode ser importado pelos processos que renderizam os relatórios
+(relatorios.py) em máquinas sem tela.
+"""
+
+
+CORES_PIZZA = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#2193b0', '#C9CBCF']
+
+
+def desenhar_pizza_categorias(ax, categorias):
+    """Desenha a distribuição de gastos por categoria; retorna False se não há gastos
+    
+    Usada pelo dashboard e pelos relatórios (relatorios.py).
+    """
+    categorias_com_valores = {k: v for k, v in categorias.items() if v['total'] > 0}
+    
+    if not categorias_com_valores:
+        return False
+    
+    labels = [f"{v['icon']} {k}" for k, v in categorias_com_valores.items()]
+    values = [v['total'] for v in categorias_com_valores.values()]
+    
+    ax.pie(values, labels=labels, autopct='%1.1f%%', colors=CORES_PIZZA, 
+           textprops={'color': 'white', 'fontsize': 9})
+    ax.set_title('Distribuição de Gastos', color='white', fontsize=12, pad=20)
+    return True
@@ -0,0 +1,261 @@
+"""
+Relatórios mensais em lote (PNG, PDF e HTML)
+
+Cada mês vira um gráfico de pizza por categoria (o mesmo do dashboard do
+controle_financeiro_app) ao lado de uma tabela de resumo, e um HTML com o
+gráfico, o resumo, as categorias e os lançamentos. A renderização roda em
+processos separados com o backend Agg, um mês por tarefa.
+
+Os arquivos gerados ficam em cache: cada mês é identificado pelo hash dos
+dados que aparecem no relatório, e um mês cujo hash não mudou não é
+renderizado de novo. Um mês que falha não impede os outros nem a gravação
+do cache.
+
+Os processos de renderização importam este módulo: no nível do módulo só
+entram o matplotlib sem backend de tela e módulos sem interface. O motor
+(controle_financeiro_completo, que importa o customtkinter) só é importado
+no processo principal, dentro das funções que carregam os perfis.
+
+    python relatorios.py                          # todos os meses, pasta atual
+    python relatorios.py --meses 2024-01,2024-02 --formatos png,html
+    python relatorios.py --todos-perfis --saida relatorios
+"""
+import argparse
+import base64
+import hashlib
+import html
+import io
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from esquema_dados import formatar_moeda
+from graficos import desenhar_pizza_categorias
+
+
+FORMATOS = ('png', 'pdf', 'html')
+ARQUIVO_CACHE = "cache_relatorios.json"
+VERSAO_RELATORIO = 1  # Mudar o layout invalida todo o cache
+
+LINHAS_RESUMO = (
+    ('Entradas', 'totalEntradas'),
+    ('Saídas', 'totalSaidas'),
+    ('Investimentos', 'totalInvestimentos'),
+    ('Desnecessários', 'totalDesnecessarios'),
+    ('Saldo', 'saldoDisponivel'),
+    ('Maior gasto', 'maiorGasto')
+)
+
+
+def dados_mes(controle, mes):
+    """Tudo o que aparece no relatório de um mês, em tipos simples (vai para outro processo)"""
+    return {
+        'mes': mes,
+        'resumo': controle.calcular_resumo(mes),
+        'categorias': {
+            nome: dados for nome, dados in controle.calcular_por_categoria(mes).items() if dados['count']
+        },
+        'lancamentos': [
+            [l['data'], l['descricao'], l['categoria'], l['entrada'], l['saida'],
+             l['investimento'], l['statusPagamento']]
+            for l in controle.lancamentos_do_mes(mes)
+        ]
+    }
+
+
+def hash_dados(dados, formatos):
+    """Chave de cache de um mês: muda se qualquer dado exibido ou o layout mudar"""
+    conteudo = json.dumps([VERSAO_RELATORIO, sorted(formatos), dados], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def _figura_mes(dados):
+    """Figura do mês: pizza das categorias e tabela de resumo"""
+    fig = Figure(figsize=(11, 5), facecolor='#2b2b2b')
+    FigureCanvasAgg(fig)
+    ax_pizza, ax_tabela = fig.subplots(1, 2, gridspec_kw={'width_ratios': [3, 2]})
+
+    if not desenhar_pizza_categorias(ax_pizza, dados['categorias']):
+        ax_pizza.text(0.5, 0.5, "Sem gastos no mês", color='white', ha='center', va='center')
+        ax_pizza.axis('off')
+
+    ax_tabela.axis('off')
+    resumo = dados['resumo']
+    linhas = [[rotulo, formatar_moeda(resumo[campo])] for rotulo, campo in LINHAS_RESUMO]
+    linhas.append(['Lançamentos', f"{resumo['totalLancamentos']} ({resumo['totalNaoPagas']} não pagos)"])
+    tabela = ax_tabela.table(cellText=linhas, loc='center', cellLoc='left')
+    tabela.scale(1, 1.6)
+    for celula in tabela.get_celld().values():
+        celula.set_facecolor('#2b2b2b')
+        celula.set_edgecolor('#555555')
+        celula.get_text().set_color('white')
+    ax_tabela.set_title(f"Resumo {dados['mes']}", color='white', fontsize=12)
+
+    fig.tight_layout()
+    return fig
+
+
+def _html_mes(dados, png):
+    """Página HTML do mês com o gráfico embutido e as tabelas"""
+    def tabela(cabecalho, linhas):
+        th = "".join(f"<th>{html.escape(c)}</th>" for c in cabecalho)
+        tr = "".join("<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in linha) + "</tr>" for linha in linhas)
+        return f"<table><thead><tr>{th}</tr></thead><tbody>{tr}</tbody></table>"
+
+    resumo = dados['resumo']
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Relatório {dados['mes']}</title>
+<style>
+body {{ font-family: sans-serif; background: #1e1e1e; color: #eee; margin: 2em; }}
+table {{ border-collapse: collapse; margin: 1em 0; }}
+th, td {{ border: 1px solid #555; padding: 4px 10px; text-align: left; }}
+th {{ background: #2c5f8d; }}
+</style></head><body>
+<h1>💰 Relatório de {dados['mes']}</h1>
+<img src="data:image/png;base64,{base64.b64encode(png).decode('ascii')}" alt="Gráfico do mês">
+<h2>Resumo</h2>
+{tabela(('', 'Valor'), [(r, formatar_moeda(resumo[c])) for r, c in LINHAS_RESUMO])}
+<h2>Categorias</h2>
+{tabela(('Categoria', 'Saídas', '%', 'Lançamentos'), [
+    (f"{d['icon']} {nome}", formatar_moeda(d['total']), f"{d['percent']:.1f}", d['count'])
+    for nome, d in sorted(dados['categorias'].items(), key=lambda item: -item[1]['total'])
+])}
+<h2>Lançamentos</h2>
+{tabela(('Data', 'Descrição', 'Categoria', 'Entrada', 'Saída', 'Investimento', 'Status'), [
+    (data, descricao, categoria, formatar_moeda(e), formatar_moeda(s), formatar_moeda(i), status)
+    for data, descricao, categoria, e, s, i, status in dados['lancamentos']
+])}
+</body></html>
+"""
+
+
+def renderizar_mes(dados, destino, formatos):
+    """Gera os arquivos de um mês (roda em um processo do pool) e retorna os caminhos"""
+    fig = _figura_mes(dados)
+    base = os.path.join(destino, dados['mes'])
+    gerados = []
+
+    png = None
+    if 'png' in formatos or 'html' in formatos:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=100, facecolor=fig.get_facecolor())
+        png = buffer.getvalue()
+    if 'png' in formatos:
+        with open(base + '.png', 'wb') as f:
+            f.write(png)
+        gerados.append(base + '.png')
+    if 'pdf' in formatos:
+        fig.savefig(base + '.pdf', format='pdf', facecolor=fig.get_facecolor())
+        gerados.append(base + '.pdf')
+    if 'html' in formatos:
+        with open(base + '.html', 'w', encoding='utf-8') as f:
+            f.write(_html_mes(dados, png))
+        gerados.append(base + '.html')
+    return gerados
+
+
+def gerar_relatorios(perfis, saida="relatorios", meses=None, formatos=FORMATOS, processos=None):
+    """Gera os relatórios mensais de um ou mais perfis em paralelo
+
+    perfis: {nome: pasta dos dados}. Com um único perfil os arquivos vão
+    direto para `saida`; com vários, para `saida/<perfil>`. meses: lista de
+    'AAAA-MM' (padrão: todos os meses com lançamentos). Retorna
+    {(perfil, mês): 'gerado' | 'em cache' | 'falhou: <erro>'}.
+    """
+    from controle_financeiro_completo import ControleFinanceiro
+
+    caminho_cache = os.path.join(saida, ARQUIVO_CACHE)
+    cache = {}
+    if os.path.exists(caminho_cache):
+        with open(caminho_cache, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    situacao = {}
+    tarefas = []
+    for nome, diretorio in perfis.items():
+        destino = saida if len(perfis) == 1 else os.path.join(saida, nome)
+        os.makedirs(destino, exist_ok=True)
+
+        # Só leitura: o perfil pode estar aberto no aplicativo
+        controle = ControleFinanceiro(diretorio=diretorio, somente_leitura=True)
+        for mes in sorted(meses or controle.meses_com_lancamentos()):
+            dados = dados_mes(controle, mes)
+            chave = f"{nome}/{mes}"
+            hash_mes = hash_dados(dados, formatos)
+            arquivos = [os.path.join(destino, f"{mes}.{formato}") for formato in formatos]
+            if cache.get(chave) == hash_mes and all(os.path.exists(a) for a in arquivos):
+                situacao[(nome, mes)] = 'em cache'
+            else:
+                tarefas.append((nome, mes, chave, hash_mes, dados, destino))
+
+    if tarefas:
+        contexto = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+                futuros = [
+                    (tarefa, pool.submit(renderizar_mes, tarefa[4], tarefa[5], tuple(formatos)))
+                    for tarefa in tarefas
+                ]
+                for (nome, mes, chave, hash_mes, _, _), futuro in futuros:
+                    try:
+                        futuro.result()
+                    except Exception as erro:
+                        cache.pop(chave, None)
+                        situacao[(nome, mes)] = f'falhou: {erro}'
+                        continue
+                    cache[chave] = hash_mes
+                    situacao[(nome, mes)] = 'gerado'
+        finally:
+            # Os meses já renderizados não são refeitos na próxima execução
+            with open(caminho_cache, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+
+    return situacao
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Relatórios mensais do Controle Financeiro")
+    parser.add_argument('--meses', help="meses AAAA-MM separados por vírgula (padrão: todos)")
+    parser.add_argument('--formatos', default=",".join(FORMATOS), help="png, pdf e/ou html (padrão: %(default)s)")
+    parser.add_argument('--saida', default="relatorios", help="pasta dos relatórios (padrão: %(default)s)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--perfil', metavar='NOME', help="perfil em perfis/NOME (padrão: pasta atual)")
+    grupo.add_argument('--todos-perfis', action='store_true', help="gera para todos os perfis")
+    parser.add_argument('--processos', type=int, help="processos de renderização (padrão: um por núcleo)")
+    args = parser.parse_args()
+
+    from controle_financeiro_completo import listar_perfis
+
+    formatos = tuple(f.strip() for f in args.formatos.split(','))
+    invalidos = set(formatos) - set(FORMATOS)
+    if invalidos:
+        parser.error(f"formatos inválidos: {', '.join(sorted(invalidos))}")
+
+    if args.todos_perfis:
+        perfis = listar_perfis()
+    elif args.perfil:
+        perfis = {args.perfil: listar_perfis().get(args.perfil) or parser.error(f"perfil não encontrado: {args.perfil}")}
+    else:
+        perfis = {'principal': '.'}
+
+    situacao = gerar_relatorios(
+        perfis, args.saida, args.meses.split(',') if args.meses else None, formatos, args.processos
+    )
+    gerados = sum(1 for s in situacao.values() if s == 'gerado')
+    falhas = {chave: s for chave, s in situacao.items() if s.startswith('falhou')}
+    reaproveitados = len(situacao) - gerados - len(falhas)
+    print(f"{gerados} meses renderizados, {reaproveitados} reaproveitados do cache em {args.saida}/")
+    for (perfil, mes), s in sorted(falhas.items()):
+        print(f"  {perfil} {mes}: {s}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()